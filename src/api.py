@@ -0,0 +1,253 @@
+'''
+    Aggregate queries over the accident data, for the tools outside the dashboard.
+
+    A query groups the accidents matching some filters by dimensions (the
+    columns of the cross-filter index, see crossfilter.py) and returns
+    measures per group: the number of accidents and the sums of the injury
+    columns. It is answered from the bitmap index of the snapshot: the
+    filters select the rows with bitmap operations, the index gives the code
+    of every row for each dimension and kernel.aggregate reduces them.
+
+    A result is a table of numpy columns (categoricals for the dimensions),
+    sent as JSON, as an Arrow IPC stream built on those buffers (needs
+    pyarrow) or as CSV streamed in chunks. Row-level exports stream the
+    matching rows of the dataset as CSV.
+
+    The routes (/api/aggregate and /api/rows) are a blueprint registered on
+    the server by app.py; they answer from the current snapshot.
+'''
+import json
+from collections import namedtuple
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from cache import RESULT_CACHE, normalize_filters
+from kernel import Key, aggregate as aggregate_keys
+from pie_and_bar import INJURY_COLS
+import snapshot
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+Query = namedtuple('Query', ['dims', 'measures', 'filters', 'format'])
+
+MEASURES = ['count', *INJURY_COLS]
+MIMETYPES = {
+    'json': 'application/json',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'csv': 'text/csv',
+}
+# Combinations of dimension values a query may group by
+MAX_CELLS = 1_000_000
+CSV_CHUNK_ROWS = 10_000
+FILTER_VALUE_TYPES = (str, int, float, bool)
+
+blueprint = Blueprint('api', __name__, url_prefix='/api')
+
+
+def _split(value, name):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(',') if item.strip()]
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return value
+    raise ValueError(f'{name} must be a list of names or a comma-separated string')
+
+
+def parse_query(params, index):
+    '''
+        Reads a query from the parameters of a request (query string or JSON
+        body): dims and measures as lists or comma-separated names, filters
+        as a {column: [values]} object or its JSON text, and the format.
+        Raises ValueError if the query is invalid.
+    '''
+    if not isinstance(params, Mapping):
+        raise ValueError('The parameters must be given as an object')
+    dims = _split(params.get('dims'), 'dims')
+    measures = _split(params.get('measures'), 'measures') or ['count']
+    filters = params.get('filters') or {}
+    if isinstance(filters, str):
+        try:
+            filters = json.loads(filters)
+        except ValueError as error:
+            raise ValueError(f'filters is not valid JSON: {error}') from error
+    if not isinstance(filters, dict):
+        raise ValueError('filters must map columns to lists of values')
+    filters = {column: values if isinstance(values, list) else [values] for column, values in filters.items()}
+    if not all(isinstance(value, FILTER_VALUE_TYPES) for values in filters.values() for value in values):
+        raise ValueError('filter values must be strings, numbers or booleans')
+    output_format = params.get('format', 'json')
+
+    unknown = [name for name in [*dims, *filters] if name not in index.values]
+    if unknown:
+        raise ValueError(f"Unknown dimensions: {', '.join(unknown)} (known: {', '.join(index.values)})")
+    unknown = [name for name in measures if name not in MEASURES]
+    if unknown:
+        raise ValueError(f"Unknown measures: {', '.join(unknown)} (known: {', '.join(MEASURES)})")
+    if len(set(dims)) < len(dims):
+        raise ValueError('A dimension is given twice')
+    if not isinstance(output_format, str) or output_format not in MIMETYPES:
+        raise ValueError(f"Unknown format: {output_format} (known: {', '.join(MIMETYPES)})")
+    cells = int(np.prod([len(index.values[dim]) for dim in dims]))
+    if cells > MAX_CELLS:
+        raise ValueError(f'Too many combinations of dimensions ({cells}, at most {MAX_CELLS})')
+    return Query(dims, measures, filters, output_format)
+
+
+def _sorted_key(codes, labels):
+    # Recodes a dimension so its values come in sorted order
+    order = sorted(range(len(labels)), key=lambda code: labels[code])
+    rank = np.empty(len(labels) + 1, dtype=codes.dtype)
+    rank[order] = np.arange(len(labels))
+    rank[-1] = -1
+    return Key(rank[codes], [labels[code] for code in order])
+
+
+def aggregate(dataset, index, dims, measures, filters):
+    '''
+        Returns the measures per combination of dimension values of the rows
+        matching the filters, as a dict of columns: a Categorical per
+        dimension, then a numpy array per measure. Combinations without rows
+        are left out. The results are cached and must not be modified.
+    '''
+    cache_key = ('api.aggregate', dataset.version, tuple(dims), tuple(measures), normalize_filters(filters))
+    hit, table = RESULT_CACHE.get(cache_key)
+    if hit:
+        return table
+
+    rows = index.rows(filters)
+    # Without dimensions, every row falls in a single group
+    keys = [_sorted_key(index.codes(dim)[rows], index.get_values(dim)) for dim in dims] \
+        or [Key(np.zeros(len(rows), dtype=np.int8), [None])]
+    summed = [measure for measure in measures if measure != 'count']
+    result = aggregate_keys(keys, [dataset[column].to_numpy()[rows] for column in summed])
+
+    cells = np.nonzero(result.counts) if dims else (np.zeros(1, dtype=np.int64),)
+    table = {dim: pd.Categorical.from_codes(cell, categories=key.labels)
+             for dim, key, cell in zip(dims, keys, cells)}
+    for measure in measures:
+        if measure == 'count':
+            table[measure] = result.counts[cells]
+        else:
+            table[measure] = result.sums[cells + (summed.index(measure),)]
+    RESULT_CACHE.put(cache_key, table)
+    return table
+
+
+def to_json(table):
+    '''
+        Lists the rows of a table as JSON-compatible dicts.
+    '''
+    columns = [np.asarray(column).tolist() for column in table.values()]
+    return [dict(zip(table, row)) for row in zip(*columns)]
+
+
+def to_arrow(table):
+    '''
+        Writes a table as an Arrow IPC stream. The numeric columns and the
+        codes of the dimensions are wrapped without copies.
+    '''
+    if pa is None:
+        raise RuntimeError('The Arrow format needs pyarrow, which is not installed')
+    arrays = [
+        pa.DictionaryArray.from_arrays(column.codes, pa.array(list(column.categories)))
+        if isinstance(column, pd.Categorical) else pa.array(column)
+        for column in table.values()
+    ]
+    batch = pa.RecordBatch.from_arrays(arrays, names=list(table))
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue()
+
+
+def iter_csv(frame, rows=None, chunk_rows=CSV_CHUNK_ROWS):
+    '''
+        Yields a frame (or some of its rows) as CSV, chunk by chunk.
+    '''
+    rows = np.arange(len(frame)) if rows is None else rows
+    yield frame.iloc[:0].to_csv(index=False)
+    for start in range(0, len(rows), chunk_rows):
+        yield frame.take(rows[start:start + chunk_rows]).to_csv(index=False, header=False)
+
+
+def _csv_response(chunks, filename):
+    return Response(stream_with_context(chunks), mimetype=MIMETYPES['csv'],
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+
+def make_response(table, query, version):
+    '''
+        Sends the result of a query in the format it asks for.
+    '''
+    if query.format == 'arrow':
+        return Response(to_arrow(table).to_pybytes(), mimetype=MIMETYPES['arrow'])
+    if query.format == 'csv':
+        return _csv_response(iter_csv(pd.DataFrame(table, copy=False)), 'aggregate.csv')
+    # Not jsonify, which would sort the columns of every row
+    payload = dict(version=version, dims=query.dims, measures=query.measures,
+                   filters=query.filters, data=to_json(table))
+    return Response(json.dumps(payload), mimetype=MIMETYPES['json'])
+
+
+def export_rows(dataset, index, filters):
+    '''
+        Streams the rows of the dataset matching the filters as CSV.
+    '''
+    return _csv_response(iter_csv(dataset.frame, index.rows(filters)), 'accidents.csv')
+
+
+def get_query_params():
+    '''
+        Parameters of the request: its JSON body, else its query string,
+        where dims and measures may be repeated (?dims=a&dims=b). Raises
+        ValueError if another parameter is repeated.
+    '''
+    params = request.get_json(silent=True)
+    if params:
+        return params
+    params = request.args.to_dict()
+    for name, values in request.args.lists():
+        if name in ('dims', 'measures'):
+            params[name] = ','.join(values)
+        elif len(values) > 1:
+            raise ValueError(f'{name} is given twice')
+    return params
+
+
+@blueprint.route('/aggregate', methods=['GET', 'POST'])
+def api_aggregate():
+    '''
+        Aggregates the accidents matching the filters by the dimensions, as
+        JSON, Arrow IPC or CSV.
+    '''
+    snap = snapshot.current()
+    index = snap.figures['filter_index']
+    try:
+        query = parse_query(get_query_params(), index)
+        table = aggregate(snap.dataset, index, query.dims, query.measures, query.filters)
+        return make_response(table, query, snap.version)
+    except ValueError as error:
+        return jsonify(error=str(error)), 400
+    except RuntimeError as error:
+        return jsonify(error=str(error)), 501
+
+
+@blueprint.route('/rows', methods=['GET', 'POST'])
+def api_rows():
+    '''
+        Streams the accidents matching the filters as CSV.
+    '''
+    snap = snapshot.current()
+    index = snap.figures['filter_index']
+    try:
+        query = parse_query(get_query_params(), index)
+    except ValueError as error:
+        return jsonify(error=str(error)), 400
+    return export_rows(snap.dataset, index, query.filters)
@@ -8,512 +8,985 @@
     Entry point for the Dash app displaying traffic accident visualizations.
 '''
 
+import hmac
+import os
+
 import dash
-from dash import html, dcc
+from dash import html, dcc, Input, Output, State
+from flask import abort, jsonify, request
 import pandas as pd
-from pie_and_bar import plot_intersection_vs_injury, plot_condition_vs_injury
-from radar_chart2 import create_radar_charts
-from serie_temporelle import create_temporal_series
-from histogramme_type_jour import create_day_type_histogram
-from template import create_custom_theme, set_default_theme
-from heatmap import get_figure as get_heatmap_figure
-
-app = dash.Dash(__name__)
-app.title = 'Traffic Accidents Dashboard | INF8808'
+from radar_chart2 import LIGHTING_CONDITIONS, create_radar_charts
+from serie_temporelle import get_count_matrices, patch_temporal_series
+from histogramme_type_jour import get_day_type_data, patch_day_type_histogram
+from heatmap import patch_heatmap
+from pie_and_bar import get_category_totals, patch_dimension_vs_injury, prepare_category_data
+from template import DEFAULT_THEME, THEME_LABELS, apply_theme, create_custom_theme, get_theme_patch, set_default_theme
+import api
+import snapshot
+import static_assets
+from treemap2 import TREEMAP_LEVELS, create_treemap
+from serie_quotidienne import create_daily_series, get_relayout_range
+from builder import BUILDERS, serialize
+from crossfilter import CHART_FILTERS, PIE_BAR_COLUMNS, describe_filters, get_chart_filters, parse_click, toggle_filters
 
-import os
-csv_path = os.path.join(os.path.dirname(__file__), 'assets/data/traffic_accidents.csv')
-dataframe = pd.read_csv(csv_path)
+# The dataset is shared by every callback (see dataset.py): with copy-on-write,
+# a Series read from it and then modified is copied first, so no caller can
+# write back into the shared columns. Set here, once, for the whole process.
+pd.set_option('mode.copy_on_write', True)
+
+app = dash.Dash(__name__, assets_folder=static_assets.get_assets_folder())
+app.title = 'Traffic Accidents Dashboard | INF8808'
+server = app.server
+static_assets.install(server)
+server.register_blueprint(api.blueprint)
+# Dash's index page, with the fonts of the page preloaded
+app.index_string = app.index_string.replace(
+    '{%favicon%}', '{%favicon%}\n        ' + static_assets.get_preload_links(app.get_asset_url))
 
-temporal_fig = create_temporal_series(dataframe)
-histogram_fig = create_day_type_histogram(dataframe)
-heatmap_fig = get_heatmap_figure(dataframe)
-pie_bar_fig = plot_condition_vs_injury(dataframe)
+csv_path = os.environ.get('ACCIDENTS_CSV', os.path.join(os.path.dirname(__file__), 'assets/data/traffic_accidents.csv'))
 
 create_custom_theme()
 set_default_theme()
 
-app.layout = html.Div(
-    className='content',
-    children=[
-        html.Header(
-            children=[
-                html.Div(
-                    children=[
-                        html.Img(
-                            src='/assets/canada-logo.jpg',
-                            style={'height': '40px', 'marginRight': '20px'}
-                        ),
-                        html.H1(
-                            'TABLEAU DE BORD DES ACCIDENTS DE LA ROUTE', 
-                            style={
-                                'fontFamily': 'Lato, sans-serif',
-                                'flex': 1,
-                                'fontSize': 'clamp(16px, 3vw, 32px)',
-                                'margin': 0,
-                                'whiteSpace': 'nowrap',
-                                'overflow': 'hidden',
-                                'textOverflow': 'ellipsis'
-                            },
-                        ),
-                    ],
-                    style={'display': 'flex', 'alignItems': 'center'},
-                ),
-                html.Nav(
-                    children=[
-                        html.A('Accueil', href='#', className='header-nav-button'),
-                        html.A('Données', href='#', className='header-nav-button'),
-                        html.A('Analyses', href='#', className='header-nav-button'),
-                    ],
-                    style={
-                        'backgroundColor': '#336b95', 
-                        'padding': '10px 0px', 
-                        'marginTop': '10px', 
-                        'width': '100%'
-                    },
-                )
-            ]
-        ),
-        html.Div(
-            className='viz-container',
-            children=[
-                html.Div(
-                    className='nav-bar',
-                    children=[
-                        html.A(
-                            'Série temporelle',
-                            href='#temporal-section',
-                            className='nav-button',
-                        ),
-                        html.A(
-                            'Type de jour',
-                            href='#histogram-section',
-                            className='nav-button',
-                        ),
-                        html.A(
-                            "Conditions d'éclairage/météo",
-                            href='#radar-section',
-                            className='nav-button',
-                        ),
-                        html.A(
-                            'Type de collision',
-                            href='#heatmap-section',
-                            className='nav-button',
-                        ),
-                        html.A(
-                            'Condition de chaussée',
-                            href='#pie-bar1-section',
-                            className='nav-button',
-                        ),
-                        html.A(
-                            "Présence d'intersection",
-                            href='#pie-bar2-section',
-                            className='nav-button',
-                        ),
-                    ]
-                ),
-                # html.H2('Statistique Canada | Statistic Canada',),
-                html.P(
-                    'Released: 2025-04-25',
-                    className='general-text', 
-                    style={
-                        'fontSize': '10px', 
-                        'textAlign': 'right',
-                        'marginTop': '2rem',
-                    }
-                ),
-                html.H2(
-                    children=[
-                        html.Em(
-                            "Visualiser les tendances des accidents de la route", 
-                            style={'fontSize': '30px'},
-                        ),
-                    ],
-                    style={
-                        'fontFamily': 'Lato, sans-serif',
-                        'fontWeight': 'bold',
-                        'marginTop': '1rem',
-                    }
-                ),
-                html.P(
-                    'Ce tableau de bord offre un aperçu des accidents de la route, incluant les tendances temporelles, les conditions des accidents et leur gravité. Explorez les données à l’aide de visualisations interactives.',
-                    className='general-text',
-                    style={
-                        'marginTop': '1rem',
-                    }
-                ),
-                # Temporal Series
-                html.H3('Selon plusieurs échelles temporelles'),
-                html.P(
-                    'Cette visualisation a pour objectif d’analyser la répartition temporelle des accidents de la route selon différents critères : l’heure de la journée, le jour de la semaine, le mois et l’année. En identifiant les périodes les plus à risque, nous visons à sensibiliser les usagers de la route et à orienter les actions de prévention.',
-                    className='general-text',
-                    style={
-                        'marginTop': '1rem',
-                    }
-                ),
-                html.Div(
-                    id='temporal-section',
-                    className='chart-container',
-                    children=[
-                        html.Div(
-                            style={'display': 'flex', 'flexDirection': 'column', 'justifyContent': 'center', 'width': '100%'},
-                            className='graph',
-                            children=[
-                                dcc.Graph(
-                                    id='temporal-series',
-                                    figure=create_temporal_series(dataframe),
-                                    config=dict(
-                                        displayModeBar=True,
-                                        displaylogo=False,
-                                        scrollZoom=False,
-                                        showTips=False,
-                                        showAxisDragHandles=False,
-                                        doubleClick='reset',
-                                        modeBarButtonsToRemove=[
-                                            'select2d', 'lasso2d', 'pan2d', 'zoomIn2d', 'zoomOut2d',
-                                            'autoScale2d', 'resetScale2d', 'hoverClosestCartesian',
-                                            'hoverCompareCartesian', 'toggleSpikelines', 'toImage'
-                                        ],
-                                        modeBarButtonsToKeep=['zoom2d']
-                                    )
-                                )
-                            ]
-                        ),
-                        html.P(
-                            "Par heure, les accidents culminent entre 15h et 18h, heures de pointe associées aux retours à la maison. Par jour de semaine, le vendredi enregistre le plus grand nombre d’accidents, tandis que le dimanche est le jour le moins accidentogène. Par mois, le mois d’octobre montre un pic, possiblement lié à la baisse de luminosité et aux conditions météo variables. Par année, une hausse marquée est observée entre 2015 et 2019, suivie d’une relative stabilité.",
-                            className='under-chart-text',
-                            style={
-                                'marginTop': '1rem',
-                            }
-                        ),
-                        html.P(
-                            "Cette analyse met en évidence des moments critiques où la prudence doit être redoublée, notamment en fin d’après-midi et les vendredis. Nous encourageons les conducteurs à adapter leur conduite aux conditions de circulation, à éviter les distractions et à prévoir des marges de sécurité accrues lors des périodes identifiées comme à risque. Une vigilance accrue peut contribuer à sauver des vies.",
-                            className='under-chart-text',
-                            style={
-                                'marginTop': '1rem',
-                            }
-                        ),
-                    ],
-                    style={'scrollMarginTop': '100px'}
-                ),
-                html.Hr(className='divider'),
-                # Day Type Histogram
-                html.H3("Selon le type de jour de l'année"),
-                html.P(
-                    'Cette visualisation présente un histogramme comparant la moyenne quotidienne des accidents de la route selon trois types de jours : les jours ordinaires, les fins de semaine et les jours fériés. L’objectif est de dégager des tendances en fonction du calendrier et de mieux cibler les périodes à risque.',
-                    className='general-text',
-                    style={
-                        'marginTop': '1rem',
-                    }
-                ),
-                html.Div(
-                    id='histogram-section',
-                    className='chart-container',
-                    children=[
-                        html.Div(
-                            style={'display': 'flex', 'justifyContent': 'center', 'width': '100%'},
-                            className='graph',
-                            children=[
-                                dcc.Graph(
-                                    id='day-type-histogram',
-                                    figure=create_day_type_histogram(dataframe),
-                                    config=dict(
-                                        displayModeBar=True,
-                                        displaylogo=False,
-                                        scrollZoom=False,
-                                        showTips=False,
-                                        showAxisDragHandles=False,
-                                        doubleClick='reset',
-                                        modeBarButtonsToRemove=[
-                                            'select2d', 'lasso2d', 'pan2d', 'zoomIn2d', 'zoomOut2d',
-                                            'autoScale2d', 'resetScale2d', 'hoverClosestCartesian',
-                                            'hoverCompareCartesian', 'toggleSpikelines', 'toImage'
-                                        ],
-                                        modeBarButtonsToKeep=['zoom2d']
+snapshot.initialize(csv_path)
+snapshot.watch(csv_path)
+snapshot.install_signal_handler(csv_path)
+
+# Token of the administration endpoints (disabled when unset)
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Value of the year dropdowns showing every year
+ALL_YEARS = 'all'
+
+# Shown by the graphs of a section until it scrolls into view
+PLACEHOLDER_FIGURE = {
+    'data': [],
+    'layout': {
+        'xaxis': {'visible': False},
+        'yaxis': {'visible': False},
+        'annotations': [{'text': 'Chargement…', 'showarrow': False, 'font': {'size': 16}}],
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'plot_bgcolor': 'rgba(0,0,0,0)',
+    },
+}
+
+# Graphs taking part in the cross-filtering, by chart
+CHART_GRAPHS = {
+    'temporal': ['temporal-series'],
+    'histogram': ['day-type-histogram'],
+    'radar': [f'radar-chart-{i}' for i in range(len(LIGHTING_CONDITIONS) + 1)],
+    'heatmap': ['heatmap-chart'],
+    'pie_bar_road': ['pie-bar1-chart'],
+    'pie_bar_intersection': ['pie-bar2-chart'],
+}
+GRAPH_CHARTS = {graph: chart for chart, graphs in CHART_GRAPHS.items() for graph in graphs}
+
+# Sections loaded when they scroll into view, with the graphs showing the
+# figures of the snapshot once loaded
+LAZY_SECTIONS = {
+    'daily-section': ['daily-series'],
+    'histogram-section': CHART_GRAPHS['histogram'],
+    'radar-section': CHART_GRAPHS['radar'],
+    'heatmap-section': CHART_GRAPHS['heatmap'],
+    'pie-bar1-section': CHART_GRAPHS['pie_bar_road'],
+    'pie-bar2-section': CHART_GRAPHS['pie_bar_intersection'],
+    # The treemap is built by update_treemap once its section is loaded
+    'treemap-section': [],
+}
+CHART_SECTIONS = {GRAPH_CHARTS[graph]: section for section, graphs in LAZY_SECTIONS.items()
+                  for graph in graphs if graph in GRAPH_CHARTS}
+
+
+def year_dropdown(dropdown_id, years):
+    '''
+        Dropdown selecting the year shown by a chart (all years by default).
+    '''
+    return dcc.Dropdown(
+        id=dropdown_id,
+        options=[{'label': 'Toutes les années', 'value': ALL_YEARS}]
+                + [{'label': str(year), 'value': year} for year in years],
+        value=ALL_YEARS,
+        clearable=False,
+        style={'width': '200px'},
+    )
+
+
+def get_loaded_id(section):
+    return f'{section}-loaded'
+
+
+def get_page_class(theme):
+    return f"content theme-{theme.replace('_', '-')}"
+
+
+def serve_layout():
+    '''
+        Builds the page from the current snapshot, so a reload is visible
+        on the next page load.
+    '''
+    snap = snapshot.current()
+    # Only the first section is sent with its figure, the others are loaded lazily
+    radar_charts = create_radar_charts(figures=[PLACEHOLDER_FIGURE] * len(CHART_GRAPHS['radar']))
+    return html.Div(
+        id='page',
+        className=get_page_class(DEFAULT_THEME),
+        children=[
+            html.Header(
+                children=[
+                    html.Div(
+                        children=[
+                            html.Img(
+                                src=app.get_asset_url(static_assets.get_asset_path('canada-logo.jpg')),
+                                style={'height': '40px', 'marginRight': '20px'}
+                            ),
+                            html.H1(
+                                'TABLEAU DE BORD DES ACCIDENTS DE LA ROUTE', 
+                                style={
+                                    'fontFamily': 'Lato, sans-serif',
+                                    'flex': 1,
+                                    'fontSize': 'clamp(16px, 3vw, 32px)',
+                                    'margin': 0,
+                                    'whiteSpace': 'nowrap',
+                                    'overflow': 'hidden',
+                                    'textOverflow': 'ellipsis'
+                                },
+                            ),
+                        ],
+                        style={'display': 'flex', 'alignItems': 'center'},
+                    ),
+                    html.Nav(
+                        children=[
+                            html.A('Accueil', href='#', className='header-nav-button'),
+                            html.A('Données', href='#', className='header-nav-button'),
+                            html.A('Analyses', href='#', className='header-nav-button'),
+                            dcc.RadioItems(
+                                id='theme',
+                                options=[{'label': label, 'value': name} for name, label in THEME_LABELS.items()],
+                                value=DEFAULT_THEME,
+                                inline=True,
+                                className='theme-switch',
+                            ),
+                        ],
+                        style={
+                            'backgroundColor': '#336b95', 
+                            'padding': '10px 0px', 
+                            'marginTop': '10px', 
+                            'width': '100%'
+                        },
+                    )
+                ]
+            ),
+            html.Div(
+                className='viz-container',
+                children=[
+                    html.Div(
+                        className='nav-bar',
+                        children=[
+                            html.A(
+                                'Série temporelle',
+                                href='#temporal-section',
+                                className='nav-button',
+                            ),
+                            html.A(
+                                'Série quotidienne',
+                                href='#daily-section',
+                                className='nav-button',
+                            ),
+                            html.A(
+                                'Type de jour',
+                                href='#histogram-section',
+                                className='nav-button',
+                            ),
+                            html.A(
+                                "Conditions d'éclairage/météo",
+                                href='#radar-section',
+                                className='nav-button',
+                            ),
+                            html.A(
+                                'Type de collision',
+                                href='#heatmap-section',
+                                className='nav-button',
+                            ),
+                            html.A(
+                                'Condition de chaussée',
+                                href='#pie-bar1-section',
+                                className='nav-button',
+                            ),
+                            html.A(
+                                "Présence d'intersection",
+                                href='#pie-bar2-section',
+                                className='nav-button',
+                            ),
+                            html.A(
+                                'Hiérarchie des conditions',
+                                href='#treemap-section',
+                                className='nav-button',
+                            ),
+                        ]
+                    ),
+                    # html.H2('Statistique Canada | Statistic Canada',),
+                    html.P(
+                        'Released: 2025-04-25',
+                        className='general-text', 
+                        style={
+                            'fontSize': '10px', 
+                            'textAlign': 'right',
+                            'marginTop': '2rem',
+                        }
+                    ),
+                    html.H2(
+                        children=[
+                            html.Em(
+                                "Visualiser les tendances des accidents de la route", 
+                                style={'fontSize': '30px'},
+                            ),
+                        ],
+                        style={
+                            'fontFamily': 'Lato, sans-serif',
+                            'fontWeight': 'bold',
+                            'marginTop': '1rem',
+                        }
+                    ),
+                    html.P(
+                        'Ce tableau de bord offre un aperçu des accidents de la route, incluant les tendances temporelles, les conditions des accidents et leur gravité. Explorez les données à l’aide de visualisations interactives.',
+                        className='general-text',
+                        style={
+                            'marginTop': '1rem',
+                        }
+                    ),
+                    # Cross-filtering
+                    dcc.Store(id='crossfilter', data={}),
+                    # Lazy loading: the sections seen so far (set by assets/lazy_sections.js)
+                    # and, for each section, whether its figures were sent
+                    dcc.Store(id='visible-sections', data=[]),
+                    *[dcc.Store(id=get_loaded_id(section), data=False) for section in LAZY_SECTIONS],
+                    html.Div(
+                        className='general-text',
+                        children=[
+                            html.Span(id='crossfilter-status'),
+                            html.Button(
+                                'Réinitialiser les filtres',
+                                id='crossfilter-reset',
+                                className='nav-button',
+                                style={'marginLeft': '1rem'},
+                            ),
+                        ],
+                        style={
+                            'marginTop': '1rem',
+                            'display': 'flex',
+                            'alignItems': 'center',
+                            'justifyContent': 'space-between',
+                        }
+                    ),
+                    # Temporal Series
+                    html.H3('Selon plusieurs échelles temporelles'),
+                    html.P(
+                        'Cette visualisation a pour objectif d’analyser la répartition temporelle des accidents de la route selon différents critères : l’heure de la journée, le jour de la semaine, le mois et l’année. En identifiant les périodes les plus à risque, nous visons à sensibiliser les usagers de la route et à orienter les actions de prévention.',
+                        className='general-text',
+                        style={
+                            'marginTop': '1rem',
+                        }
+                    ),
+                    html.Div(
+                        id='temporal-section',
+                        className='chart-container',
+                        children=[
+                            year_dropdown('temporal-year', get_count_matrices(snap.dataset)['years']),
+                            html.Div(
+                                style={'display': 'flex', 'flexDirection': 'column', 'justifyContent': 'center', 'width': '100%'},
+                                className='graph',
+                                children=[
+                                    dcc.Graph(
+                                        id='temporal-series',
+                                        figure=apply_theme(snap.figures['temporal']),
+                                        config=dict(
+                                            displayModeBar=True,
+                                            displaylogo=False,
+                                            scrollZoom=False,
+                                            showTips=False,
+                                            showAxisDragHandles=False,
+                                            doubleClick='reset',
+                                            modeBarButtonsToRemove=[
+                                                'select2d', 'lasso2d', 'pan2d', 'zoomIn2d', 'zoomOut2d',
+                                                'autoScale2d', 'resetScale2d', 'hoverClosestCartesian',
+                                                'hoverCompareCartesian', 'toggleSpikelines', 'toImage'
+                                            ],
+                                            modeBarButtonsToKeep=['zoom2d']
+                                        )
                                     )
-                                ),
-                            ]
-                        ),
-                        html.P(
-                            "Les jours ordinaires présentent la moyenne d’accidents la plus élevée, probablement liée aux déplacements domicile-travail et à la densité du trafic. Les fins de semaine affichent une moyenne légèrement inférieure, mais restent élevées, peut-être en raison des déplacements récréatifs ou festifs. Les jours fériés enregistrent la plus faible moyenne, ce qui pourrait s’expliquer par une circulation réduite.",
-                            className='under-chart-text',
-                            style={
-                                'marginTop': '1rem',
-                            }
-                        ),
-                        html.P(
-                            "Bien que les jours fériés soient les moins accidentogènes, les jours ordinaires et les fins de semaine demeurent des périodes critiques nécessitant vigilance et prudence.",
-                            className='under-chart-text',
-                            style={
-                                'marginTop': '1rem',
-                            }
-                        ),
-                    ],
-                    style={'scrollMarginTop': '100px'}
-                ),
-                html.Hr(className='divider'),
-                # Radar Charts
-                html.H3("Selon les conditions d'éclairage et de météo et la gravité des blessures"),
-                html.P(
-                    'Cette série de visualisations examine comment les conditions d’éclairage (plein jour, crépuscule, nuit éclairée ou sombre) et les conditions météorologiques (dégagé, nuageux, pluie, neige) influencent à la fois le nombre et la gravité des accidents de la route.',
-                    className='general-text',
-                    style={
-                        'marginTop': '1rem',
-                    }
-                ),
-                html.Div(
-                    id='radar-section',
-                    className='chart-container',
-                    children=[
-                        html.Div(
-                            children=create_radar_charts(dataframe)[0],
-                            style={
-                                'display': 'flex',
-                                'flexDirection': 'row',
-                                'justifyContent': 'space-evenly',
-                                'flexWrap': 'wrap',
-                                'gap': '20px',
-                                'width': '100%',
-                            }
-                        ),
-                        html.P(
-                            'En plein jour, malgré une visibilité optimale, le nombre d’accidents est le plus élevé, possiblement en raison d’un faux sentiment de sécurité, d’une densité de circulation accrue ou d’une vigilance réduite. La majorité des accidents surviennent sous un temps dégagé, indépendamment de l’éclairage.',
-                            className='under-chart-text',
-                            style={
-                                'marginTop': '1rem',
-                            }
-                        ),
-                        html.Div(
-                            children=create_radar_charts(dataframe)[1:3],
-                            style={
-                                'display': 'flex',
-                                'flexDirection': 'row',
-                                'justifyContent': 'space-evenly',
-                                'flexWrap': 'wrap',
-                                'gap': '20px',
-                                'width': '100%',
-                            }
-                        ),
-                        html.P(
-                            'Les conditions extrêmes comme la neige ou la pluie sont associées à moins d’accidents, mais ceux-ci peuvent être plus graves. Peu importe les conditions, les accidents sans blessure dominent, mais des blessures mortelles ou incapacitantes surviennent dans tous les contextes.',
-                            className='under-chart-text',
-                            style={
-                                'marginTop': '1rem',
-                            }
-                        ),
-                        html.Div(
-                            children=create_radar_charts(dataframe)[3:],
-                            style={
-                                'display': 'flex',
-                                'flexDirection': 'row',
-                                'justifyContent': 'space-evenly',
-                                'flexWrap': 'wrap',
-                                'gap': '20px',
-                                'width': '100%',
-                            }
-                        ),
-                        html.P(
-                            'Contrairement à l’intuition, ce ne sont pas les conditions difficiles qui génèrent le plus d’accidents, mais bien les situations perçues comme sécuritaires. Cela montre que la vigilance ne doit jamais être relâchée, même par beau temps ou en plein jour. Une conduite attentive en tout temps est essentielle pour réduire les risques.',
-                            className='under-chart-text',
-                            style={
-                                'marginTop': '1rem',
-                            }
-                        ),
-                    ],
-                    style={'scrollMarginTop': '100px'}
-                ),
-                html.Hr(className='divider'),
-                # Heatmap
-                html.H3('Selon le type de collision et la gravité des blessures'),
-                html.P(
-                    'Cette heatmap illustre la relation entre cinq types de collision routière et la gravité des blessures résultantes, révélant clairement que la majorité des accidents n’entraînent pas de blessures visibles, indépendamment du type de collision.',
-                    className='general-text',
-                    style={
-                        'marginTop': '1rem',
-                    }
-                ),
-                html.Div(
-                    id='heatmap-section',
-                    className='chart-container',
-                    children=[
-                        html.Div(
-                            style={'display': 'flex', 'justifyContent': 'center', 'width': '100%'},
-                            className='graph',
-                            children=[
-                                dcc.Graph(
-                                    id='heatmap-chart',
-                                    figure=heatmap_fig,
-                                    config=dict(
-                                        displayModeBar=True,
-                                        displaylogo=False,
-                                        scrollZoom=False,
-                                        showTips=False,
-                                        showAxisDragHandles=False,
-                                        doubleClick='reset',
-                                        modeBarButtonsToRemove=[
-                                            'select2d', 'lasso2d', 'pan2d', 'zoomIn2d', 'zoomOut2d',
-                                            'autoScale2d', 'resetScale2d', 'hoverClosestCartesian',
-                                            'hoverCompareCartesian', 'toggleSpikelines', 'toImage'
-                                        ],
-                                        modeBarButtonsToKeep=['zoom2d']
+                                ]
+                            ),
+                            html.P(
+                                "Par heure, les accidents culminent entre 15h et 18h, heures de pointe associées aux retours à la maison. Par jour de semaine, le vendredi enregistre le plus grand nombre d’accidents, tandis que le dimanche est le jour le moins accidentogène. Par mois, le mois d’octobre montre un pic, possiblement lié à la baisse de luminosité et aux conditions météo variables. Par année, une hausse marquée est observée entre 2015 et 2019, suivie d’une relative stabilité.",
+                                className='under-chart-text',
+                                style={
+                                    'marginTop': '1rem',
+                                }
+                            ),
+                            html.P(
+                                "Cette analyse met en évidence des moments critiques où la prudence doit être redoublée, notamment en fin d’après-midi et les vendredis. Nous encourageons les conducteurs à adapter leur conduite aux conditions de circulation, à éviter les distractions et à prévoir des marges de sécurité accrues lors des périodes identifiées comme à risque. Une vigilance accrue peut contribuer à sauver des vies.",
+                                className='under-chart-text',
+                                style={
+                                    'marginTop': '1rem',
+                                }
+                            ),
+                        ],
+                        style={'scrollMarginTop': '100px'}
+                    ),
+                    html.Hr(className='divider'),
+                    # Daily Series
+                    html.H3('Au jour le jour'),
+                    html.P(
+                        'Cette série présente le nombre d’accidents pour chaque jour de la période étudiée. Utilisez le curseur sous le graphique ou la sélection à la souris pour zoomer sur une plage de dates.',
+                        className='general-text',
+                        style={
+                            'marginTop': '1rem',
+                        }
+                    ),
+                    html.Div(
+                        id='daily-section',
+                        className='chart-container',
+                        **{'data-lazy': 'true'},
+                        children=[
+                            html.Div(
+                                style={'display': 'flex', 'justifyContent': 'center', 'width': '100%'},
+                                className='graph',
+                                children=[
+                                    dcc.Graph(
+                                        id='daily-series',
+                                        figure=PLACEHOLDER_FIGURE,
+                                        config=dict(
+                                            displayModeBar=True,
+                                            displaylogo=False,
+                                            scrollZoom=False,
+                                            showTips=False,
+                                            doubleClick='reset',
+                                            modeBarButtonsToRemove=[
+                                                'select2d', 'lasso2d', 'pan2d', 'zoomIn2d', 'zoomOut2d',
+                                                'autoScale2d', 'hoverClosestCartesian',
+                                                'hoverCompareCartesian', 'toggleSpikelines', 'toImage'
+                                            ],
+                                            modeBarButtonsToKeep=['zoom2d', 'resetScale2d']
+                                        )
                                     ),
-                                ),
-                            ]
-                        ),
-                        html.P(
-                            'Les collisions lors de virages (Turning) et à angle produisent le plus grand nombre d’accidents sans blessure apparente, suivies par les collisions par l’arrière, tandis que les accidents impliquant des piétons sont moins fréquents mais présentent une proportion plus élevée de blessures par rapport au nombre total d’incidents de ce type.',
-                            className='under-chart-text',
-                            style={
-                                'marginTop': '1rem',
-                            }
-                        ),
-                        html.P(
-                            'Bien que la plupart des accidents ne causent pas de blessures graves, une attention particulière devrait être portée aux collisions en virage et aux intersections où des mesures d’infrastructure et de signalisation pourraient réduire considérablement le nombre d’accidents.',
-                            className='under-chart-text',
-                            style={
-                                'marginTop': '1rem',
-                            }
-                        ),
-                    ],
-                    style={'scrollMarginTop': '100px'}
-                ),
-                html.Hr(className='divider'),
-                # Pie/Bar Chart (Road Condition)
-                html.H3("Nombre de blessures selon la condition de la chaussée et la gravité des blessures"),
-                html.P(
-                    "Pour étudier le risque potentiel de blessure et sa gravité selon l'état de la chaussée, cette visualisation établit le nombre de blessures associé à ces deux éléments.",
-                    className='general-text',
-                    style={
-                        'marginTop': '1rem',
-                    }
-                ),
-                html.Div(
-                    id='pie-bar1-section',
-                    className='chart-container',
-                    children=[
-                        html.Div(
-                            style={'display': 'flex', 'justifyContent': 'center', 'width': '100%'},
-                            className='graph',
-                            children=[
-                                dcc.Graph(
-                                    id='pie-bar1-chart',
-                                    figure=plot_condition_vs_injury(dataframe),
-                                    config=dict(
-                                        displayModeBar=True,
-                                        displaylogo=False,
-                                        scrollZoom=False,
-                                        showTips=False,
-                                        showAxisDragHandles=False,
-                                        doubleClick='reset',
-                                        modeBarButtonsToRemove=[
-                                            'select2d', 'lasso2d', 'pan2d', 'zoomIn2d', 'zoomOut2d',
-                                            'autoScale2d', 'resetScale2d', 'hoverClosestCartesian',
-                                            'hoverCompareCartesian', 'toggleSpikelines', 'toImage'
-                                        ],
-                                        modeBarButtonsToKeep=['zoom2d']
-                                    )
-                                ),
-                            ]
-                        ),
-                        html.P(
-                            "Elle montre que la majorité des accidents se produit lorsque la chaussée est sèche, donc à bonne condition météorologique que ces accidents sont majoritairement sans blessure. Ce grand nombre laisse à penser que c'est la vigilance des conducteurs qui fait défaut. Les blessures mortelles se produisent le plus souvent en état de chaussée sèche et rarement lorsqu'elle est mouillée. Une recommandation exhaustive se porte alors à l'attention des automobilistes avant de d'observer d'autres facteurs non ènumérés comme la présence d'animaux.",
-                            className='under-chart-text',
-                            style={
-                                'marginTop': '1rem',
-                            }
-                        ),
-                    ],
-                    style={'scrollMarginTop': '100px'}
-                ),
-                html.Hr(className='divider'),
-                # Pie/Bar Chart (Intersection)
-                html.H3("Nombre d'accidents selon la présence/absence d'intersection et la gravité des blessures"),
-                html.P(
-                    "Cette visualisation établit le nombre de blessures en fonction de leur gravité selon s'il y a présence ou absence d'une intersection. Elle vise à dégager comme le montre les graphiques le danger que court les automobilistes à l'approche d'une intersection.",
-                    className='general-text',
-                    style={
-                        'marginTop': '1rem',
-                    }
-                ),
-                html.Div(
-                    id='pie-bar2-section',
-                    className='chart-container',
-                    children=[
-                        html.Div(
-                            style={'display': 'flex', 'justifyContent': 'center', 'width': '100%'},
-                            className='graph',
-                            children=[
-                                dcc.Graph(
-                                    id='pie-bar2-chart',
-                                    figure=plot_intersection_vs_injury(dataframe),
-                                    config=dict(
-                                        displayModeBar=True,
-                                        displaylogo=False,
-                                        scrollZoom=False,
-                                        showTips=False,
-                                        showAxisDragHandles=False,
-                                        doubleClick='reset',
-                                        modeBarButtonsToRemove=[
-                                            'select2d', 'lasso2d', 'pan2d', 'zoomIn2d', 'zoomOut2d',
-                                            'autoScale2d', 'resetScale2d', 'hoverClosestCartesian',
-                                            'hoverCompareCartesian', 'toggleSpikelines', 'toImage'
-                                        ],
-                                        modeBarButtonsToKeep=['zoom2d']
-                                    )
-                                ),
-                            ]
-                        ),
-                        html.P(
-                            "Comme la précédente, elle montre que la majorité des accidents se produit quand il y a une intersection, encore avec aucune blessure et un nombre de décès peu élevés. Cependant pour ces deux visualisations, l'attention devrait être portée sur les blesssures incapacitantes qui présentent un grand risque à la mobilité de la personne. Il serait encouragé de  mettre plus de panneaux de signalisation aux intersections et à toujours appeler à la vigilance. ",
-                            className='under-chart-text',
-                            style={
-                                'marginTop': '1rem',
-                            }
-                        ),
-                    ],
-                    style={'scrollMarginTop': '100px',}
-                ),
-                html.Div(
-                    className="footer",
-                    children=[
-                        html.Div(
-                            className="footer-text",
-                            children=[
-                                html.P(
-                                    children=[
-                                        html.Small("Toutes les données sont fournies à titre indicatif et doivent être utilisées avec discernement."),
-                                        html.Strong("Statistiques Canada - Statistic Canada"),
-                                        html.Br(),
-                                    ]
-                                ),
-                            ]
-                        ),
-                        html.Img(
-                            src='/assets/canada-logo.png',
-                            style={'height': '40px', 'marginTop': '1rem'}
-                        ),
-                    ]
-                ),
-                # JavaScript for chart visibility animation only
-                html.Script(
-                    '''
-                    document.addEventListener("DOMContentLoaded", function() {
-                        const elements = document.querySelectorAll(".chart-container");
-                        const observer = new IntersectionObserver((entries) => {
-                            entries.forEach(entry => {
-                                if (entry.isIntersecting) {
-                                    entry.target.classList.add("visible");
+                                ]
+                            ),
+                        ],
+                        style={'scrollMarginTop': '100px'}
+                    ),
+                    html.Hr(className='divider'),
+                    # Day Type Histogram
+                    html.H3("Selon le type de jour de l'année"),
+                    html.P(
+                        'Cette visualisation présente un histogramme comparant la moyenne quotidienne des accidents de la route selon trois types de jours : les jours ordinaires, les fins de semaine et les jours fériés. L’objectif est de dégager des tendances en fonction du calendrier et de mieux cibler les périodes à risque.',
+                        className='general-text',
+                        style={
+                            'marginTop': '1rem',
+                        }
+                    ),
+                    html.Div(
+                        id='histogram-section',
+                        className='chart-container',
+                        **{'data-lazy': 'true'},
+                        children=[
+                            year_dropdown('histogram-year', get_day_type_data(snap.dataset)['years']),
+                            html.Div(
+                                style={'display': 'flex', 'justifyContent': 'center', 'width': '100%'},
+                                className='graph',
+                                children=[
+                                    dcc.Graph(
+                                        id='day-type-histogram',
+                                        figure=PLACEHOLDER_FIGURE,
+                                        config=dict(
+                                            displayModeBar=True,
+                                            displaylogo=False,
+                                            scrollZoom=False,
+                                            showTips=False,
+                                            showAxisDragHandles=False,
+                                            doubleClick='reset',
+                                            modeBarButtonsToRemove=[
+                                                'select2d', 'lasso2d', 'pan2d', 'zoomIn2d', 'zoomOut2d',
+                                                'autoScale2d', 'resetScale2d', 'hoverClosestCartesian',
+                                                'hoverCompareCartesian', 'toggleSpikelines', 'toImage'
+                                            ],
+                                            modeBarButtonsToKeep=['zoom2d']
+                                        )
+                                    ),
+                                ]
+                            ),
+                            html.P(
+                                "Les jours ordinaires présentent la moyenne d’accidents la plus élevée, probablement liée aux déplacements domicile-travail et à la densité du trafic. Les fins de semaine affichent une moyenne légèrement inférieure, mais restent élevées, peut-être en raison des déplacements récréatifs ou festifs. Les jours fériés enregistrent la plus faible moyenne, ce qui pourrait s’expliquer par une circulation réduite.",
+                                className='under-chart-text',
+                                style={
+                                    'marginTop': '1rem',
+                                }
+                            ),
+                            html.P(
+                                "Bien que les jours fériés soient les moins accidentogènes, les jours ordinaires et les fins de semaine demeurent des périodes critiques nécessitant vigilance et prudence.",
+                                className='under-chart-text',
+                                style={
+                                    'marginTop': '1rem',
+                                }
+                            ),
+                        ],
+                        style={'scrollMarginTop': '100px'}
+                    ),
+                    html.Hr(className='divider'),
+                    # Radar Charts
+                    html.H3("Selon les conditions d'éclairage et de météo et la gravité des blessures"),
+                    html.P(
+                        'Cette série de visualisations examine comment les conditions d’éclairage (plein jour, crépuscule, nuit éclairée ou sombre) et les conditions météorologiques (dégagé, nuageux, pluie, neige) influencent à la fois le nombre et la gravité des accidents de la route.',
+                        className='general-text',
+                        style={
+                            'marginTop': '1rem',
+                        }
+                    ),
+                    html.Div(
+                        id='radar-section',
+                        className='chart-container',
+                        **{'data-lazy': 'true'},
+                        children=[
+                            html.Div(
+                                children=radar_charts[0],
+                                style={
+                                    'display': 'flex',
+                                    'flexDirection': 'row',
+                                    'justifyContent': 'space-evenly',
+                                    'flexWrap': 'wrap',
+                                    'gap': '20px',
+                                    'width': '100%',
+                                }
+                            ),
+                            html.P(
+                                'En plein jour, malgré une visibilité optimale, le nombre d’accidents est le plus élevé, possiblement en raison d’un faux sentiment de sécurité, d’une densité de circulation accrue ou d’une vigilance réduite. La majorité des accidents surviennent sous un temps dégagé, indépendamment de l’éclairage.',
+                                className='under-chart-text',
+                                style={
+                                    'marginTop': '1rem',
+                                }
+                            ),
+                            html.Div(
+                                children=radar_charts[1:3],
+                                style={
+                                    'display': 'flex',
+                                    'flexDirection': 'row',
+                                    'justifyContent': 'space-evenly',
+                                    'flexWrap': 'wrap',
+                                    'gap': '20px',
+                                    'width': '100%',
+                                }
+                            ),
+                            html.P(
+                                'Les conditions extrêmes comme la neige ou la pluie sont associées à moins d’accidents, mais ceux-ci peuvent être plus graves. Peu importe les conditions, les accidents sans blessure dominent, mais des blessures mortelles ou incapacitantes surviennent dans tous les contextes.',
+                                className='under-chart-text',
+                                style={
+                                    'marginTop': '1rem',
+                                }
+                            ),
+                            html.Div(
+                                children=radar_charts[3:],
+                                style={
+                                    'display': 'flex',
+                                    'flexDirection': 'row',
+                                    'justifyContent': 'space-evenly',
+                                    'flexWrap': 'wrap',
+                                    'gap': '20px',
+                                    'width': '100%',
+                                }
+                            ),
+                            html.P(
+                                'Contrairement à l’intuition, ce ne sont pas les conditions difficiles qui génèrent le plus d’accidents, mais bien les situations perçues comme sécuritaires. Cela montre que la vigilance ne doit jamais être relâchée, même par beau temps ou en plein jour. Une conduite attentive en tout temps est essentielle pour réduire les risques.',
+                                className='under-chart-text',
+                                style={
+                                    'marginTop': '1rem',
+                                }
+                            ),
+                        ],
+                        style={'scrollMarginTop': '100px'}
+                    ),
+                    html.Hr(className='divider'),
+                    # Heatmap
+                    html.H3('Selon le type de collision et la gravité des blessures'),
+                    html.P(
+                        'Cette heatmap illustre la relation entre cinq types de collision routière et la gravité des blessures résultantes, révélant clairement que la majorité des accidents n’entraînent pas de blessures visibles, indépendamment du type de collision.',
+                        className='general-text',
+                        style={
+                            'marginTop': '1rem',
+                        }
+                    ),
+                    html.Div(
+                        id='heatmap-section',
+                        className='chart-container',
+                        **{'data-lazy': 'true'},
+                        children=[
+                            html.Div(
+                                style={'display': 'flex', 'justifyContent': 'center', 'width': '100%'},
+                                className='graph',
+                                children=[
+                                    dcc.Graph(
+                                        id='heatmap-chart',
+                                        figure=PLACEHOLDER_FIGURE,
+                                        config=dict(
+                                            displayModeBar=True,
+                                            displaylogo=False,
+                                            scrollZoom=False,
+                                            showTips=False,
+                                            showAxisDragHandles=False,
+                                            doubleClick='reset',
+                                            modeBarButtonsToRemove=[
+                                                'select2d', 'lasso2d', 'pan2d', 'zoomIn2d', 'zoomOut2d',
+                                                'autoScale2d', 'resetScale2d', 'hoverClosestCartesian',
+                                                'hoverCompareCartesian', 'toggleSpikelines', 'toImage'
+                                            ],
+                                            modeBarButtonsToKeep=['zoom2d']
+                                        ),
+                                    ),
+                                ]
+                            ),
+                            html.P(
+                                'Les collisions lors de virages (Turning) et à angle produisent le plus grand nombre d’accidents sans blessure apparente, suivies par les collisions par l’arrière, tandis que les accidents impliquant des piétons sont moins fréquents mais présentent une proportion plus élevée de blessures par rapport au nombre total d’incidents de ce type.',
+                                className='under-chart-text',
+                                style={
+                                    'marginTop': '1rem',
                                 }
-                            });
-                        }, { threshold: 0.1 });
-
-                        elements.forEach(element => {
-                            observer.observe(element);
-                        });
-                    });
-                    '''
-                )
-            ]
-        )
-    ]
+                            ),
+                            html.P(
+                                'Bien que la plupart des accidents ne causent pas de blessures graves, une attention particulière devrait être portée aux collisions en virage et aux intersections où des mesures d’infrastructure et de signalisation pourraient réduire considérablement le nombre d’accidents.',
+                                className='under-chart-text',
+                                style={
+                                    'marginTop': '1rem',
+                                }
+                            ),
+                        ],
+                        style={'scrollMarginTop': '100px'}
+                    ),
+                    html.Hr(className='divider'),
+                    # Pie/Bar Chart (Road Condition)
+                    html.H3("Nombre de blessures selon la condition de la chaussée et la gravité des blessures"),
+                    html.P(
+                        "Pour étudier le risque potentiel de blessure et sa gravité selon l'état de la chaussée, cette visualisation établit le nombre de blessures associé à ces deux éléments.",
+                        className='general-text',
+                        style={
+                            'marginTop': '1rem',
+                        }
+                    ),
+                    html.Div(
+                        id='pie-bar1-section',
+                        className='chart-container',
+                        **{'data-lazy': 'true'},
+                        children=[
+                            html.Div(
+                                style={'display': 'flex', 'justifyContent': 'center', 'width': '100%'},
+                                className='graph',
+                                children=[
+                                    dcc.Graph(
+                                        id='pie-bar1-chart',
+                                        figure=PLACEHOLDER_FIGURE,
+                                        config=dict(
+                                            displayModeBar=True,
+                                            displaylogo=False,
+                                            scrollZoom=False,
+                                            showTips=False,
+                                            showAxisDragHandles=False,
+                                            doubleClick='reset',
+                                            modeBarButtonsToRemove=[
+                                                'select2d', 'lasso2d', 'pan2d', 'zoomIn2d', 'zoomOut2d',
+                                                'autoScale2d', 'resetScale2d', 'hoverClosestCartesian',
+                                                'hoverCompareCartesian', 'toggleSpikelines', 'toImage'
+                                            ],
+                                            modeBarButtonsToKeep=['zoom2d']
+                                        )
+                                    ),
+                                ]
+                            ),
+                            html.P(
+                                "Elle montre que la majorité des accidents se produit lorsque la chaussée est sèche, donc à bonne condition météorologique que ces accidents sont majoritairement sans blessure. Ce grand nombre laisse à penser que c'est la vigilance des conducteurs qui fait défaut. Les blessures mortelles se produisent le plus souvent en état de chaussée sèche et rarement lorsqu'elle est mouillée. Une recommandation exhaustive se porte alors à l'attention des automobilistes avant de d'observer d'autres facteurs non ènumérés comme la présence d'animaux.",
+                                className='under-chart-text',
+                                style={
+                                    'marginTop': '1rem',
+                                }
+                            ),
+                        ],
+                        style={'scrollMarginTop': '100px'}
+                    ),
+                    html.Hr(className='divider'),
+                    # Pie/Bar Chart (Intersection)
+                    html.H3("Nombre d'accidents selon la présence/absence d'intersection et la gravité des blessures"),
+                    html.P(
+                        "Cette visualisation établit le nombre de blessures en fonction de leur gravité selon s'il y a présence ou absence d'une intersection. Elle vise à dégager comme le montre les graphiques le danger que court les automobilistes à l'approche d'une intersection.",
+                        className='general-text',
+                        style={
+                            'marginTop': '1rem',
+                        }
+                    ),
+                    html.Div(
+                        id='pie-bar2-section',
+                        className='chart-container',
+                        **{'data-lazy': 'true'},
+                        children=[
+                            html.Div(
+                                style={'display': 'flex', 'justifyContent': 'center', 'width': '100%'},
+                                className='graph',
+                                children=[
+                                    dcc.Graph(
+                                        id='pie-bar2-chart',
+                                        figure=PLACEHOLDER_FIGURE,
+                                        config=dict(
+                                            displayModeBar=True,
+                                            displaylogo=False,
+                                            scrollZoom=False,
+                                            showTips=False,
+                                            showAxisDragHandles=False,
+                                            doubleClick='reset',
+                                            modeBarButtonsToRemove=[
+                                                'select2d', 'lasso2d', 'pan2d', 'zoomIn2d', 'zoomOut2d',
+                                                'autoScale2d', 'resetScale2d', 'hoverClosestCartesian',
+                                                'hoverCompareCartesian', 'toggleSpikelines', 'toImage'
+                                            ],
+                                            modeBarButtonsToKeep=['zoom2d']
+                                        )
+                                    ),
+                                ]
+                            ),
+                            html.P(
+                                "Comme la précédente, elle montre que la majorité des accidents se produit quand il y a une intersection, encore avec aucune blessure et un nombre de décès peu élevés. Cependant pour ces deux visualisations, l'attention devrait être portée sur les blesssures incapacitantes qui présentent un grand risque à la mobilité de la personne. Il serait encouragé de  mettre plus de panneaux de signalisation aux intersections et à toujours appeler à la vigilance. ",
+                                className='under-chart-text',
+                                style={
+                                    'marginTop': '1rem',
+                                }
+                            ),
+                        ],
+                        style={'scrollMarginTop': '100px',}
+                    ),
+                    html.Hr(className='divider'),
+                    # Treemap
+                    html.H3("Selon la combinaison des conditions d'éclairage, de météo, de chaussée et la gravité des blessures"),
+                    html.P(
+                        "Cette visualisation hiérarchique répartit les accidents selon l'éclairage, puis la météo, l'état de la chaussée et la gravité des blessures. Cliquez sur un rectangle pour explorer le niveau suivant.",
+                        className='general-text',
+                        style={
+                            'marginTop': '1rem',
+                        }
+                    ),
+                    html.Div(
+                        id='treemap-section',
+                        className='chart-container',
+                        **{'data-lazy': 'true'},
+                        children=[
+                            dcc.Dropdown(
+                                id='treemap-depth',
+                                options=[
+                                    {'label': 'Éclairage → météo', 'value': 2},
+                                    {'label': 'Éclairage → météo → chaussée', 'value': 3},
+                                    {'label': 'Éclairage → météo → chaussée → gravité', 'value': 4},
+                                ],
+                                value=2,
+                                clearable=False,
+                                style={'width': '400px'},
+                            ),
+                            html.Div(
+                                style={'display': 'flex', 'justifyContent': 'center', 'width': '100%'},
+                                className='graph',
+                                children=[
+                                    dcc.Graph(
+                                        id='treemap-chart',
+                                        config=dict(
+                                            displayModeBar=False,
+                                            displaylogo=False,
+                                        )
+                                    ),
+                                ]
+                            ),
+                        ],
+                        style={'scrollMarginTop': '100px'}
+                    ),
+                    html.Div(
+                        className="footer",
+                        children=[
+                            html.Div(
+                                className="footer-text",
+                                children=[
+                                    html.P(
+                                        children=[
+                                            html.Small("Toutes les données sont fournies à titre indicatif et doivent être utilisées avec discernement."),
+                                            html.Strong("Statistiques Canada - Statistic Canada"),
+                                            html.Br(),
+                                        ]
+                                    ),
+                                ]
+                            ),
+                            html.Img(
+                                src=app.get_asset_url(static_assets.get_asset_path('canada-logo.png')),
+                                style={'height': '40px', 'marginTop': '1rem'}
+                            ),
+                        ]
+                    ),
+                ]
+            )
+        ]
+    )
+
+
+app.layout = serve_layout
+
+
+@app.callback(
+    Output('treemap-chart', 'figure'),
+    Input('treemap-depth', 'value'),
+    Input(get_loaded_id('treemap-section'), 'data'),
+    State('theme', 'value'),
 )
+def update_treemap(depth, loaded, theme):
+    '''
+        Builds the treemap up to the selected depth from the precomputed rollups.
+    '''
+    if not loaded:
+        return dash.no_update
+    treemap = create_treemap(snapshot.current().figures['treemap_rollups'], min(depth, len(TREEMAP_LEVELS)))
+    return apply_theme(serialize(treemap), theme)
+
+
+@app.callback(
+    Output('daily-series', 'figure'),
+    Input('daily-series', 'relayoutData'),
+    State(get_loaded_id('daily-section'), 'data'),
+    State('theme', 'value'),
+    prevent_initial_call=True,
+)
+def update_daily_series(relayout_data, loaded, theme):
+    '''
+        Downsamples the daily series again for the visible date range.
+    '''
+    if not loaded:
+        # The placeholder also reports its layout
+        return dash.no_update
+    start, end = get_relayout_range(relayout_data)
+    return apply_theme(serialize(create_daily_series(snapshot.current().figures['daily_rollup'], start, end)), theme)
+
+
+def get_section_figures(snap, graphs):
+    '''
+        Figures of the snapshot shown by the graphs of a section.
+    '''
+    figures = []
+    for graph in graphs:
+        if graph == 'daily-series':
+            figures.append(serialize(create_daily_series(snap.figures['daily_rollup'])))
+            continue
+        chart = GRAPH_CHARTS[graph]
+        figure = snap.figures[chart]
+        figures.append(figure[CHART_GRAPHS[chart].index(graph)] if isinstance(figure, list) else figure)
+    return figures
+
+
+def register_section_loader(section, graphs):
+    '''
+        Sends the figures of a section the first time it becomes visible.
+        The charts then apply the active cross-filters (see get_loaded_inputs).
+    '''
+    @app.callback(
+        [Output(get_loaded_id(section), 'data')]
+        + [Output(graph, 'figure', allow_duplicate=True) for graph in graphs],
+        Input('visible-sections', 'data'),
+        State(get_loaded_id(section), 'data'),
+        State('theme', 'value'),
+        prevent_initial_call=True,
+    )
+    def load_section(visible_sections, loaded, theme):
+        if loaded or section not in visible_sections:
+            return [dash.no_update] * (len(graphs) + 1)
+        return [True] + apply_theme(get_section_figures(snapshot.current(), graphs), theme)
+
+
+for section, graphs in LAZY_SECTIONS.items():
+    register_section_loader(section, graphs)
+
+
+def get_loaded_inputs(chart):
+    '''
+        Input of the loaded flag of the chart's section, if it is loaded lazily.
+    '''
+    section = CHART_SECTIONS.get(chart)
+    return [Input(get_loaded_id(section), 'data')] if section else []
+
+
+@app.callback(
+    Output('crossfilter', 'data'),
+    [Input(graph, 'clickData') for graph in GRAPH_CHARTS],
+    Input('crossfilter-reset', 'n_clicks'),
+    State('crossfilter', 'data'),
+    prevent_initial_call=True,
+)
+def update_crossfilter(*args):
+    '''
+        Turns a click on a chart into cross-filters, or clears them.
+    '''
+    filters = args[-1]
+    graph = dash.ctx.triggered_id
+    if graph == 'crossfilter-reset':
+        return {}
+    chart = GRAPH_CHARTS[graph]
+    graph_number = CHART_GRAPHS[chart].index(graph)
+    filter_index = snapshot.current().figures['filter_index']
+    selected = parse_click(chart, dash.ctx.triggered[0]['value'], filter_index, graph_number)
+    return toggle_filters(filters, selected)
+
+
+@app.callback(
+    Output('crossfilter-status', 'children'),
+    Input('crossfilter', 'data'),
+)
+def show_crossfilter(filters):
+    '''
+        Summarizes the active cross-filters and the number of matching accidents.
+    '''
+    if not filters:
+        return 'Cliquez sur un élément d’un graphique pour filtrer les autres.'
+    count = snapshot.current().figures['filter_index'].count(filters)
+    return f'{describe_filters(filters)} — {count} accidents'
+
+
+def get_filtered_dataset(snap, filters, chart):
+    '''
+        Returns the rows of the snapshot matching the cross-filters of the
+        other charts, or None if no row matches.
+    '''
+    chart_filters = get_chart_filters(filters, chart)
+    if not chart_filters:
+        return snap.dataset
+    rows = snap.figures['filter_index'].rows(chart_filters)
+    return snap.dataset.take(rows, chart_filters) if len(rows) else None
+
+
+def get_year(value):
+    return None if value == ALL_YEARS else value
+
+
+def register_chart_callback(chart):
+    '''
+        Rebuilds a chart from the rows matching the cross-filters of the other charts.
+    '''
+    graphs = CHART_GRAPHS[chart]
+
+    @app.callback(
+        [Output(graph, 'figure') for graph in graphs],
+        Input('crossfilter', 'data'),
+        get_loaded_inputs(chart),
+        State('theme', 'value'),
+        prevent_initial_call=True,
+    )
+    def update_chart(filters, *args):
+        *loaded, theme = args
+        if not all(loaded):
+            # The figures are sent with the section, then filtered
+            return [dash.no_update] * len(graphs)
+        # One snapshot for the whole request, even if a reload swaps it meanwhile
+        snap = snapshot.current()
+        dataset = get_filtered_dataset(snap, filters, chart)
+        if dataset is None or (dataset is snap.dataset and dash.ctx.triggered_id != 'crossfilter'):
+            # Nothing to filter in a section that was just loaded
+            return [dash.no_update] * len(graphs)
+        result = snap.figures[chart] if dataset is snap.dataset else serialize(BUILDERS[chart](dataset))
+        result = apply_theme(result, theme)
+        return result if isinstance(result, list) else [result]
+
+
+def register_patch_callback(chart, patch, inputs=()):
+    '''
+        Updates a chart in place with a Patch of the values that depend on
+        the cross-filters and on the chart's own inputs (e.g. its year).
+        patch is called with the snapshot, the filtered rows and the inputs.
+    '''
+    @app.callback(
+        Output(CHART_GRAPHS[chart][0], 'figure'),
+        [Input(component, 'value') for component in inputs],
+        Input('crossfilter', 'data'),
+        get_loaded_inputs(chart),
+        prevent_initial_call=True,
+    )
+    def update_chart(*args):
+        values, filters, loaded = args[:len(inputs)], args[len(inputs)], args[len(inputs) + 1:]
+        if not all(loaded):
+            return dash.no_update
+        snap = snapshot.current()
+        dataset = get_filtered_dataset(snap, filters, chart)
+        if dataset is None or (dataset is snap.dataset and dash.ctx.triggered_id in map(get_loaded_id, LAZY_SECTIONS)):
+            return dash.no_update
+        return patch(snap, dataset, *values)
+
+
+def get_pie_bar_patch(chart):
+    column = PIE_BAR_COLUMNS[chart]
+
+    def patch(snap, dataset):
+        # The figure keeps the categories of the whole dataset, in its order
+        categories = get_category_totals(prepare_category_data(snap.dataset), column).index
+        return patch_dimension_vs_injury(dataset, column, categories.tolist())
+    return patch
+
+
+# Charts updated with a Patch instead of being rebuilt, with their inputs
+PATCH_CALLBACKS = {
+    'temporal': (lambda snap, dataset, year: patch_temporal_series(
+        dataset, get_count_matrices(snap.dataset)['years'], get_year(year)), ['temporal-year']),
+    'histogram': (lambda snap, dataset, year: patch_day_type_histogram(dataset, get_year(year)), ['histogram-year']),
+    'heatmap': (lambda snap, dataset: patch_heatmap(dataset), []),
+    'pie_bar_road': (get_pie_bar_patch('pie_bar_road'), []),
+    'pie_bar_intersection': (get_pie_bar_patch('pie_bar_intersection'), []),
+}
+
+for chart in CHART_FILTERS:
+    if chart in PATCH_CALLBACKS:
+        register_patch_callback(chart, *PATCH_CALLBACKS[chart])
+    else:
+        register_chart_callback(chart)
+
+
+# Every graph of the page, restyled when the theme changes
+THEMED_GRAPHS = list(GRAPH_CHARTS) + ['daily-series', 'treemap-chart']
+
+
+@app.callback(
+    Output('page', 'className'),
+    [Output(graph, 'figure', allow_duplicate=True) for graph in THEMED_GRAPHS],
+    Input('theme', 'value'),
+    prevent_initial_call=True,
+)
+def switch_theme(theme):
+    '''
+        Restyles the page and its graphs with the selected theme. Only the
+        layout of the graphs changes: nothing is rebuilt nor sent again.
+    '''
+    return [get_page_class(theme)] + [get_theme_patch(theme)] * len(THEMED_GRAPHS)
+
+
+def check_admin_token():
+    '''
+        Rejects the request unless it carries the administration token.
+    '''
+    if not ADMIN_TOKEN:
+        abort(404)
+    token = request.headers.get('Authorization', '')
+    if token.startswith('Bearer '):
+        token = token[len('Bearer '):]
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        abort(403)
+
+
+@server.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    '''
+        Starts a background reload of the dataset.
+    '''
+    check_admin_token()
+    started = snapshot.reload(csv_path)
+    return jsonify(started=started, **snapshot.get_status()), 202 if started else 409
+
+
+@server.route('/admin/status')
+def admin_status():
+    '''
+        Describes the snapshot being served.
+    '''
+    check_admin_token()
+    return jsonify(snapshot.get_status())
+
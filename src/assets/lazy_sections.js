@@ -0,0 +1,42 @@
+/*
+ * Shows the chart sections as they scroll into view, and tells the server
+ * which lazy sections became visible so it sends their figures.
+ *
+ * The page is rendered by Dash after the document is loaded, so the
+ * sections are observed as soon as they are added to the page. The ids of
+ * the visible lazy sections are written to the 'visible-sections' store.
+ */
+(function () {
+    const visibleSections = new Set();
+    const observed = new WeakSet();
+
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (!entry.isIntersecting) {
+                return;
+            }
+            const section = entry.target;
+            section.classList.add('visible');
+            observer.unobserve(section);
+            if (section.dataset.lazy && !visibleSections.has(section.id)) {
+                visibleSections.add(section.id);
+                window.dash_clientside.set_props('visible-sections', {data: Array.from(visibleSections)});
+            }
+        });
+    // Load the figures slightly before their section is reached
+    }, { threshold: 0.1, rootMargin: '200px 0px' });
+
+    function observeSections() {
+        document.querySelectorAll('.chart-container').forEach(section => {
+            if (!observed.has(section)) {
+                observed.add(section);
+                observer.observe(section);
+            }
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        new MutationObserver(observeSections).observe(document.body, {childList: true, subtree: true});
+        observeSections();
+    });
+})();
@@ -0,0 +1,90 @@
+'''
+    Bitmap indexes over coded categorical columns.
+
+    Every column is factorized once; each of its values then gets a bitmap of
+    the rows holding it, packed 8 rows per byte. Any AND of value filters is
+    resolved with bitwise operations on those bitmaps and counted with a
+    popcount, without building pandas boolean masks over the whole frame.
+'''
+import numpy as np
+import pandas as pd
+
+
+class BitmapIndex:
+    '''
+        Packed per-value bitmaps for a set of columns of the same length.
+    '''
+
+    def __init__(self, n_rows):
+        self.n_rows = n_rows
+        self.values = {}
+        self.bitmaps = {}
+
+    def add_column(self, name, values, normalize=None):
+        '''
+            Indexes a column. normalize, if given, is applied to its unique
+            values only; values it maps together share the same bitmap.
+            Missing values (and values normalized to None) are not indexed.
+        '''
+        codes, uniques = pd.factorize(np.asarray(values))
+        uniques = list(uniques) if normalize is None else [normalize(value) for value in uniques]
+        uniques = [value.item() if isinstance(value, np.generic) else value for value in uniques]
+
+        merged_codes, merged_uniques = pd.factorize(pd.Series(uniques, dtype=object))
+        remap = np.append(merged_codes, -1)
+        codes = remap[codes]
+
+        self.values[name] = {value: code for code, value in enumerate(merged_uniques)}
+        self.bitmaps[name] = np.stack([
+            np.packbits(codes == code) for code in range(len(merged_uniques))
+        ]) if len(merged_uniques) else np.zeros((0, (self.n_rows + 7) // 8), dtype=np.uint8)
+
+    def get_values(self, name):
+        '''
+            Returns the indexed values of a column.
+        '''
+        return list(self.values[name])
+
+    def bitmap(self, name, values):
+        '''
+            Returns the packed bitmap of the rows whose column holds any of the values.
+        '''
+        codes = [self.values[name][value] for value in values if value in self.values[name]]
+        if not codes:
+            return np.zeros(self.bitmaps[name].shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bitmaps[name][codes], axis=0)
+
+    def codes(self, name):
+        '''
+            Returns the code of every row for a column (its position in
+            get_values), or -1 where the row holds no indexed value.
+        '''
+        codes = np.full(self.n_rows, -1, dtype=np.int32)
+        for code, bitmap in enumerate(self.bitmaps[name]):
+            codes[np.unpackbits(bitmap, count=self.n_rows).view(bool)] = code
+        return codes
+
+    def select(self, filters):
+        '''
+            Returns the packed bitmap of the rows matching every filter,
+            given as a mapping of column name to accepted values.
+        '''
+        selected = None
+        for name, values in filters.items():
+            bitmap = self.bitmap(name, values)
+            selected = bitmap if selected is None else selected & bitmap
+        if selected is None:
+            selected = np.packbits(np.ones(self.n_rows, dtype=bool))
+        return selected
+
+    def count(self, filters):
+        '''
+            Counts the rows matching every filter.
+        '''
+        return int(np.bitwise_count(self.select(filters)).sum())
+
+    def rows(self, filters):
+        '''
+            Returns the positions of the rows matching every filter.
+        '''
+        return np.flatnonzero(np.unpackbits(self.select(filters), count=self.n_rows))
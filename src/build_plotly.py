@@ -0,0 +1,102 @@
+'''
+    Builds a plotly.js bundle holding only the trace types of the dashboard.
+
+    Dash serves the full plotly.js bundle unless window.Plotly is already
+    defined, which a script of the assets folder does. This script bundles
+    the plotly.js core (scatter traces, layout components such as the range
+    slider and the update menus) with the other trace types used by the
+    charts, for the plotly.js version Dash would serve otherwise, and writes
+    it to assets/ under a name holding the hash of its content.
+
+    It needs Node.js (npm); without it, nothing is built and Dash keeps
+    serving its full bundle. A chart using a trace type missing from
+    TRACE_TYPES would not render with the trimmed bundle.
+
+    Usage: python build_plotly.py
+'''
+import glob
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from plotly.offline import get_plotlyjs_version
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+BUNDLE_PATTERN = 'plotly-*.min.js'
+ESBUILD_VERSION = '0.25.0'
+# Seconds allowed to install the packages
+INSTALL_TIMEOUT = 600
+
+# Trace types of the charts; scatter is part of the plotly.js core
+TRACE_TYPES = ['bar', 'pie', 'heatmap', 'scatterpolar', 'treemap']
+
+ENTRY = '''var Plotly = require('plotly.js/lib/core');
+Plotly.register([
+{modules}
+]);
+module.exports = Plotly;
+'''
+
+
+def write_entry(build_dir, trace_types=TRACE_TYPES):
+    path = os.path.join(build_dir, 'index.js')
+    modules = ',\n'.join(f"    require('plotly.js/lib/{trace_type}')" for trace_type in trace_types)
+    with open(path, 'w', encoding='utf-8') as entry_file:
+        entry_file.write(ENTRY.format(modules=modules))
+    return path
+
+
+def bundle(build_dir, version, trace_types=TRACE_TYPES):
+    '''
+        Installs plotly.js and esbuild in build_dir and bundles the trace
+        types into a minified script defining window.Plotly.
+    '''
+    npm = shutil.which('npm')
+    subprocess.run([npm, 'init', '-y'], cwd=build_dir, check=True, capture_output=True)
+    subprocess.run([npm, 'install', '--no-audit', '--no-fund', f'plotly.js@{version}', f'esbuild@{ESBUILD_VERSION}'],
+                   cwd=build_dir, check=True, timeout=INSTALL_TIMEOUT)
+    entry = write_entry(build_dir, trace_types)
+    output = os.path.join(build_dir, 'plotly.min.js')
+    # Same settings as the plotly.js dist bundles
+    subprocess.run([os.path.join(build_dir, 'node_modules', '.bin', 'esbuild'), entry, '--bundle', '--minify',
+                    '--format=iife', '--global-name=Plotly', '--define:global=window', '--target=es2016',
+                    f'--outfile={output}'], cwd=build_dir, check=True)
+    with open(output, 'rb') as bundle_file:
+        return bundle_file.read()
+
+
+def write_bundle(content, version, assets_dir=ASSETS_DIR):
+    '''
+        Writes the bundle under a fingerprinted name and removes the previous ones.
+    '''
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    path = os.path.join(assets_dir, f'plotly-{version}-{digest}.min.js')
+    for previous in glob.glob(os.path.join(assets_dir, BUNDLE_PATTERN)):
+        if previous != path:
+            os.remove(previous)
+    with open(path, 'wb') as bundle_file:
+        bundle_file.write(content)
+    return path
+
+
+def main():
+    if shutil.which('npm') is None:
+        print('npm not found: the full plotly.js bundle will be served', file=sys.stderr)
+        return 0
+    version = get_plotlyjs_version()
+    with tempfile.TemporaryDirectory() as build_dir:
+        try:
+            content = bundle(build_dir, version)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as error:
+            print(f'plotly.js bundle failed ({error}): the full bundle will be served', file=sys.stderr)
+            return 0
+    path = write_bundle(content, version)
+    print(f'{os.path.relpath(path)}: {len(content) / 1024:.0f} kB (plotly.js {version}, {", ".join(TRACE_TYPES)})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
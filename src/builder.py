@@ -0,0 +1,121 @@
+'''
+    Builds the dashboard figures in parallel at startup.
+
+    Every figure is independent, so each one is built by its own task. With
+    the 'process' executor the workers are forked after the data is loaded:
+    they inherit the dataset instead of receiving a pickled copy, and only
+    send back the serialized figures.
+'''
+import functools
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from compactor import compact_figure
+from crossfilter import build_filter_index
+from dataset import as_dataset
+from heatmap import get_figure as get_heatmap_figure
+from histogramme_type_jour import create_day_type_histogram
+from pie_and_bar import plot_dimension_vs_injury, prepare_category_data
+from radar_chart2 import create_radar_figures
+from serie_quotidienne import build_daily_rollup
+from serie_temporelle import create_temporal_series
+from template import THEMED_TRACE_PROPERTIES
+from treemap2 import prepare_treemap_rollups
+
+# 'process', 'thread' or 'serial'; processes are only used where fork exists
+BUILD_EXECUTOR = os.environ.get('BUILD_EXECUTOR', 'process')
+BUILD_WORKERS = int(os.environ.get('BUILD_WORKERS', os.cpu_count() or 1))
+
+BUILDERS = {
+    'temporal': create_temporal_series,
+    'daily_rollup': build_daily_rollup,
+    'histogram': create_day_type_histogram,
+    'radar': create_radar_figures,
+    'heatmap': get_heatmap_figure,
+    'pie_bar_road': lambda df: plot_dimension_vs_injury(df, 'roadway_surface_cond'),
+    'pie_bar_intersection': lambda df: plot_dimension_vs_injury(df, 'intersection_related_i'),
+    'treemap_rollups': prepare_treemap_rollups,
+    'filter_index': build_filter_index,
+}
+
+# Aggregations shared by several builders: they are computed once before the
+# builders run, which then read them from the result cache (forked workers
+# inherit it)
+SHARED_AGGREGATIONS = {
+    prepare_category_data: ['pie_bar_road', 'pie_bar_intersection'],
+}
+
+# Built from the row positions of the loaded frame: they are not persisted
+# with the figures but rebuilt at every load (see snapshot.load_snapshot)
+ROW_INDEXED = ['filter_index']
+
+# Set by build_figures right before the workers are forked
+_dataframe = None
+
+
+def serialize(result):
+    '''
+        Serializes a figure (or a list of figures) to plain JSON-compatible
+        dicts, compacted by compactor.compact_figure. The template is left
+        out: the theme is applied when the figure is sent to the page (see
+        template.apply_theme), so the same figures serve every theme, and
+        the trace properties the themes set stay on the traces.
+    '''
+    if isinstance(result, list):
+        return [serialize(item) for item in result]
+    if hasattr(result, 'to_json'):
+        figure = json.loads(result.to_json())
+        figure['layout'].pop('template', None)
+        return compact_figure(figure, THEMED_TRACE_PROPERTIES)
+    return result
+
+
+def prepare_shared(dataframe, names):
+    '''
+        Computes the aggregations shared by several of the requested figures.
+    '''
+    for aggregation, charts in SHARED_AGGREGATIONS.items():
+        if len(set(charts) & set(names)) > 1:
+            aggregation(dataframe)
+
+
+def _build(name, dataframe=None):
+    # The dataset is read-only, so every builder can share it as is
+    return name, serialize(BUILDERS[name](_dataframe if dataframe is None else dataframe))
+
+
+def build_figures(dataframe, names=None, executor=BUILD_EXECUTOR, workers=BUILD_WORKERS):
+    '''
+        Builds the requested figures (all of them by default) and returns
+        a dict mapping each name to its serialized figure.
+
+        Processes are only forked from the main thread: a fork from another
+        thread (e.g. a background reload) could copy locks held by the
+        other threads into the workers, so threads are used there instead.
+    '''
+    global _dataframe
+    names = list(BUILDERS) if names is None else list(names)
+    workers = max(1, min(workers, len(names)))
+    dataframe = as_dataset(dataframe)
+
+    if executor == 'process' and ('fork' not in multiprocessing.get_all_start_methods()
+                                  or threading.current_thread() is not threading.main_thread()):
+        executor = 'thread'
+    if executor == 'serial' or workers == 1:
+        return dict(_build(name, dataframe) for name in names)
+    prepare_shared(dataframe, names)
+    if executor == 'thread':
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return dict(pool.map(functools.partial(_build, dataframe=dataframe), names))
+
+    # Derive the shared columns before forking so workers do not each compute them
+    _dataframe = dataframe.derive()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+            return dict(pool.map(_build, names))
+    finally:
+        # The workers have their copy: do not keep the dataset alive until the next build
+        _dataframe = None
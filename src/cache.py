@@ -0,0 +1,251 @@
+'''
+    Caches for the results of the chart aggregations and the built figures.
+
+    Results are keyed by (chart id, normalized filter state, dataset version),
+    read from the attrs of the dataframe given to the aggregation: the data
+    layer sets attrs['dataset_version'] and attrs['filters'] on the frames it
+    hands to the charts. Frames without a dataset version are never cached.
+
+    The built figures and aggregates are also persisted on disk, keyed by a
+    content fingerprint of the dataset and a hash of the application sources,
+    so restarts with unchanged data and code skip every pipeline.
+'''
+import functools
+import glob
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 256 * 1024 * 1024))
+CACHE_TTL = float(os.environ['CACHE_TTL']) if os.environ.get('CACHE_TTL') else None
+FIGURE_CACHE_DIR = os.environ.get('FIGURE_CACHE_DIR',
+                                  os.path.join(os.path.dirname(__file__), '.cache', 'figures'))
+FIGURE_CACHE_KEEP = 4
+
+
+def sizeof(value):
+    '''
+        Estimates the memory used by a cached result, in bytes.
+    '''
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, (list, tuple)):
+        return sum(sizeof(item) for item in value) + 64
+    if isinstance(value, dict):
+        return sum(sizeof(key) + sizeof(item) for key, item in value.items()) + 64
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:  # pylint: disable=broad-except
+        return 1024
+
+
+def freeze(value):
+    '''
+        Converts lists, sets and dicts to hashable tuples, recursively.
+    '''
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), freeze(item)) for key, item in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((freeze(item) for item in value), key=repr))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def normalize_filters(filters):
+    '''
+        Normalizes a filter state so that equivalent filters share a key.
+    '''
+    return tuple(sorted(
+        (column, tuple(sorted(set(values), key=repr)))
+        for column, values in (filters or {}).items()
+    ))
+
+
+class ResultCache:
+    '''
+        Thread-safe LRU cache bounded by a byte budget, with an optional TTL.
+    '''
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        '''
+            Returns (True, value) on a hit and (False, None) on a miss.
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[2] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key, value):
+        '''
+            Stores a value, evicting the least recently used entries if needed.
+        '''
+        size = sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        '''
+            Returns the hit/miss statistics and the current size of the cache.
+        '''
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+RESULT_CACHE = ResultCache()
+
+
+def get_cache_key(chart_id, df, *args, **kwargs):
+    '''
+        Builds the cache key of an aggregation call, or None if the frame
+        does not carry a dataset version.
+    '''
+    version = df.attrs.get('dataset_version')
+    if version is None:
+        return None
+    filters = df.attrs.get('filters', ())
+    return (chart_id, filters, version, len(df), freeze(args), freeze(kwargs))
+
+
+def cached(chart_id, cache=None):
+    '''
+        Decorates an aggregation taking a dataframe as first argument so that
+        its results are served from the cache. The cached results are shared:
+        callers must not modify them.
+    '''
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(df, *args, **kwargs):
+            result_cache = cache or RESULT_CACHE
+            key = get_cache_key(f'{chart_id}.{function.__name__}', df, *args, **kwargs)
+            if key is None:
+                return function(df, *args, **kwargs)
+            hit, value = result_cache.get(key)
+            if hit:
+                return value
+            value = function(df, *args, **kwargs)
+            result_cache.put(key, value)
+            return value
+        return wrapper
+    return decorator
+
+
+def tag_frame(df, version, filters=None):
+    '''
+        Sets the attrs describing which rows of which dataset version a frame holds.
+    '''
+    df.attrs['dataset_version'] = version
+    df.attrs['filters'] = normalize_filters(filters)
+    return df
+
+
+def fingerprint_file(path, chunk_size=1 << 20):
+    '''
+        Returns the SHA-256 digest of a file's content.
+    '''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as data_file:
+        for chunk in iter(lambda: data_file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_code_version(source_dir=os.path.dirname(os.path.abspath(__file__))):
+    '''
+        Hashes the sources of the application modules building the figures.
+    '''
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(source_dir, '*.py'))):
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as source_file:
+            digest.update(source_file.read())
+    return digest.hexdigest()
+
+
+def get_figure_cache_key(dataset_fingerprint, code_version=None):
+    '''
+        Key of the figures built from a dataset by the current code.
+    '''
+    code_version = code_version or get_code_version()
+    return hashlib.sha256(f'{dataset_fingerprint}:{code_version}'.encode()).hexdigest()[:32]
+
+
+def load_figures(key, cache_dir=FIGURE_CACHE_DIR):
+    '''
+        Loads the persisted figures and aggregates, or returns None if absent or unreadable.
+    '''
+    try:
+        with open(os.path.join(cache_dir, f'{key}.pkl'), 'rb') as cache_file:
+            return pickle.load(cache_file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+
+def save_figures(key, figures, cache_dir=FIGURE_CACHE_DIR, keep=FIGURE_CACHE_KEEP):
+    '''
+        Persists the figures and aggregates atomically, keeping only the most recent entries.
+    '''
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, f'{key}.pkl')
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as cache_file:
+            pickle.dump(figures, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+        entries = sorted(glob.glob(os.path.join(cache_dir, '*.pkl')), key=os.path.getmtime, reverse=True)
+        for old_path in entries[keep:]:
+            os.remove(old_path)
+    except OSError:
+        # The cache is an optimization: a read-only disk only costs a rebuild
+        pass
@@ -0,0 +1,172 @@
+'''
+    Calendar table used to classify every day of the dataset span as an
+    ordinary day, a weekend day or a holiday.
+
+    Holiday calendars are lists of rules; a rule receives an array of years
+    and returns the matching dates, so fixed and moving holidays (Labor Day,
+    Thanksgiving, ...) are computed for every year at once.
+'''
+import numpy as np
+import pandas as pd
+
+DAY_TYPES = ['Jour ordinaire', 'Fin de semaine', 'Jour férié']
+ORDINARY, WEEKEND, HOLIDAY = 0, 1, 2
+
+MONDAY, THURSDAY = 0, 3
+
+
+def _first_of_month(years, month):
+    return (np.asarray(years) - 1970) * 12 + (month - 1)
+
+
+def fixed(month, day):
+    '''
+        Holiday falling on the same date every year.
+    '''
+    def rule(years):
+        months = _first_of_month(years, month).astype('datetime64[M]')
+        return months.astype('datetime64[D]') + (day - 1)
+    return rule
+
+
+def nth_weekday(month, weekday, n):
+    '''
+        Holiday falling on the n-th given weekday of a month (n=-1 for the last one).
+    '''
+    def rule(years):
+        if n > 0:
+            first = _first_of_month(years, month).astype('datetime64[M]').astype('datetime64[D]')
+            offset = (weekday - (first.astype(np.int64) - 4)) % 7
+            return first + offset + 7 * (n - 1)
+        last = (_first_of_month(years, month) + 1).astype('datetime64[M]').astype('datetime64[D]') - 1
+        offset = ((last.astype(np.int64) - 4) - weekday) % 7
+        return last - offset - 7 * (-n - 1)
+    return rule
+
+
+def weekday_before(month, day, weekday):
+    '''
+        Holiday falling on the last given weekday strictly before a date
+        (e.g. Victoria Day, the Monday preceding May 25).
+    '''
+    def rule(years):
+        limit = fixed(month, day)(years) - 1
+        offset = ((limit.astype(np.int64) - 4) - weekday) % 7
+        return limit - offset
+    return rule
+
+
+HOLIDAY_CALENDARS = {
+    'christmas_new_year': [
+        fixed(1, 1),
+        fixed(12, 25),
+    ],
+    'us_federal': [
+        fixed(1, 1),
+        nth_weekday(1, MONDAY, 3),       # Martin Luther King Jr. Day
+        nth_weekday(2, MONDAY, 3),       # Presidents' Day
+        nth_weekday(5, MONDAY, -1),      # Memorial Day
+        fixed(6, 19),
+        fixed(7, 4),
+        nth_weekday(9, MONDAY, 1),       # Labor Day
+        nth_weekday(10, MONDAY, 2),      # Columbus Day
+        fixed(11, 11),
+        nth_weekday(11, THURSDAY, 4),    # Thanksgiving
+        fixed(12, 25),
+    ],
+    'canada': [
+        fixed(1, 1),
+        weekday_before(5, 25, MONDAY),   # Fête de la Reine / Victoria Day
+        fixed(7, 1),
+        nth_weekday(9, MONDAY, 1),       # Fête du Travail / Labour Day
+        nth_weekday(10, MONDAY, 2),      # Action de grâce / Thanksgiving
+        fixed(12, 25),
+        fixed(12, 26),
+    ],
+}
+
+DEFAULT_CALENDAR = 'christmas_new_year'
+
+
+def get_holiday_rules(holidays):
+    '''
+        Returns the rules of a calendar given by name, or the rules themselves.
+    '''
+    if isinstance(holidays, str):
+        if holidays not in HOLIDAY_CALENDARS:
+            raise ValueError(f'Unknown holiday calendar: {holidays!r}')
+        return HOLIDAY_CALENDARS[holidays]
+    return list(holidays)
+
+
+def build_calendar(first_year, last_year, holidays=DEFAULT_CALENDAR):
+    '''
+        Builds the calendar table from Jan 1 of first_year to Dec 31 of last_year.
+
+        Returns a dict of aligned arrays, one entry per day: 'date',
+        'year' and the day type code 'type' (ORDINARY, WEEKEND or HOLIDAY).
+    '''
+    years = np.arange(first_year, last_year + 1)
+    start = np.datetime64(f'{first_year:04d}-01-01', 'D')
+    end = np.datetime64(f'{last_year + 1:04d}-01-01', 'D')
+    dates = np.arange(start, end)
+
+    # 1970-01-01 is a Thursday, so Monday-based weekdays are (days - 4) % 7
+    weekday = (dates.astype(np.int64) - 4) % 7
+    types = np.where(weekday >= 5, WEEKEND, ORDINARY).astype(np.uint8)
+
+    for rule in get_holiday_rules(holidays):
+        holiday_idx = (rule(years) - start).astype(np.int64)
+        types[holiday_idx[(holiday_idx >= 0) & (holiday_idx < len(dates))]] = HOLIDAY
+
+    return {
+        'years': years,
+        'date': dates,
+        'year': dates.astype('datetime64[Y]').astype(np.int64) + 1970,
+        'type': types,
+    }
+
+
+def get_day_index(calendar, dates):
+    '''
+        Returns the position of each timestamp's day in the calendar table.
+    '''
+    days = pd.DatetimeIndex(dates).values.astype('datetime64[D]')
+    return (days - calendar['date'][0]).astype(np.int64)
+
+
+def match_days(calendar, months=None, weekdays=None):
+    '''
+        Tells which days of the calendar fall in the given months (1 to 12)
+        and on the given weekdays (1 for Monday to 7), all of them by default.
+    '''
+    dates = calendar['date']
+    selected = np.ones(len(dates), dtype=bool)
+    if months is not None:
+        selected &= np.isin(dates.astype('datetime64[M]').astype(np.int64) % 12 + 1, list(months))
+    if weekdays is not None:
+        selected &= np.isin((dates.astype(np.int64) - 4) % 7 + 1, list(weekdays))
+    return selected
+
+
+def count_days(calendar, start=0, stop=None, days=None):
+    '''
+        Counts the days per (year, day type) over calendar[start:stop], only
+        those selected by the boolean mask days if given (see match_days).
+    '''
+    year_idx = calendar['year'][start:stop] - calendar['years'][0]
+    key = year_idx * len(DAY_TYPES) + calendar['type'][start:stop]
+    if days is not None:
+        key = key[days[start:stop]]
+    counts = np.bincount(key, minlength=len(calendar['years']) * len(DAY_TYPES))
+    return counts.reshape(len(calendar['years']), len(DAY_TYPES))
+
+
+def count_accidents(calendar, day_index):
+    '''
+        Counts the accidents per (year, day type) from their calendar positions.
+    '''
+    year_idx = calendar['year'][day_index] - calendar['years'][0]
+    key = year_idx * len(DAY_TYPES) + calendar['type'][day_index]
+    counts = np.bincount(key, minlength=len(calendar['years']) * len(DAY_TYPES))
+    return counts.reshape(len(calendar['years']), len(DAY_TYPES))
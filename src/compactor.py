@@ -0,0 +1,157 @@
+'''
+    Shrinks the JSON of serialized figures without changing how they render.
+
+    The builders style every trace on its own, so the traces of a figure
+    repeat the same hover labels, fonts, lines and hover templates. Two
+    passes remove that repetition:
+
+    - the most common value of each scalar property set on all the traces
+      of a type is moved to the figure's template, as a default for that
+      trace type; the traces with another value keep it as an override;
+    - the trace properties left equal to Plotly's defaults are dropped,
+      unless the template sets them to something else.
+
+    The traces keep their order and their data arrays, so Dash patches
+    addressing them by index still apply to the compacted figures.
+'''
+import copy
+
+# Trace properties whose value is the default of every trace type
+TRACE_DEFAULTS = {
+    'visible': True,
+    'showlegend': True,
+    'opacity': 1,
+    'xaxis': 'x',
+    'yaxis': 'y',
+}
+
+# Properties that identify a trace or its subplot rather than style it, and
+# are therefore not taken from templates by Plotly
+NOT_TEMPLATED = {'type', 'name', 'legendgroup', 'uid', 'ids', 'meta', 'customdata',
+                 'xaxis', 'yaxis', 'subplot', 'geo', 'domain', 'templateitemname'}
+
+HOVER_PROPERTIES = {'hoverinfo', 'hoverlabel', 'hovertemplate', 'hovertext'}
+DATA_ARRAYS = ['x', 'y', 'z', 'r', 'values', 'labels']
+
+
+def _is_scalar(value):
+    return isinstance(value, (str, int, float, bool))
+
+
+def _same(value, other):
+    # 1 == 1.0 == True in Python, but not in the figure's JSON
+    return type(value) is type(other) and value == other
+
+
+def _leaves(properties, prefix=()):
+    '''
+        Yields the (path, value) pairs of the scalar properties of a trace.
+    '''
+    for key, value in properties.items():
+        path = prefix + (key,)
+        if isinstance(value, dict) and 'bdata' not in value:
+            # Typed arrays are data, like lists, and are left on the traces
+            yield from _leaves(value, path)
+        elif _is_scalar(value):
+            yield path, value
+
+
+def _get(properties, path):
+    for key in path:
+        if not isinstance(properties, dict) or key not in properties:
+            return None
+        properties = properties[key]
+    return properties
+
+
+def _set(properties, path, value):
+    for key in path[:-1]:
+        properties = properties.setdefault(key, {})
+    properties[path[-1]] = value
+
+
+def _remove(properties, path):
+    '''
+        Removes a property, then the dicts left empty along its path.
+    '''
+    parents = [properties]
+    for key in path[:-1]:
+        parents.append(parents[-1][key])
+    del parents[-1][path[-1]]
+    for parent, key in zip(reversed(parents[:-1]), reversed(path[:-1])):
+        if parent[key]:
+            break
+        del parent[key]
+
+
+def strip_defaults(trace, template_trace):
+    '''
+        Drops the properties of a trace equal to their default value.
+    '''
+    for key, default in TRACE_DEFAULTS.items():
+        if _same(trace.get(key), default) and template_trace.get(key, default) == default:
+            del trace[key]
+
+
+def _has_points(trace):
+    return any(len(trace.get(key) or ()) for key in DATA_ARRAYS) or not any(key in trace for key in DATA_ARRAYS)
+
+
+def hoist_shared_properties(traces, template_traces, kept=()):
+    '''
+        Moves the most common value of the scalar properties set on every
+        trace to the template defaults of their trace type; the traces with
+        another value keep it as an override. The property paths in kept
+        stay on the traces. Returns the updated template entry, or None if
+        nothing is shared.
+    '''
+    if len(traces) < 2 or len(template_traces) > 1:
+        # One trace gains nothing, and several template entries are cycled through
+        return None
+    paths = {}
+    for trace in traces:
+        for path, value in _leaves(trace):
+            if path[0] not in NOT_TEMPLATED and path not in kept:
+                paths.setdefault(path, {}).setdefault((type(value), value), []).append(trace)
+
+    template_trace = copy.deepcopy(template_traces[0]) if template_traces else {}
+    hoisted = False
+    for path, values in paths.items():
+        # Traces without points are never hovered, so their hover styling does not matter
+        required = [trace for trace in traces if path[0] not in HOVER_PROPERTIES or _has_points(trace)]
+        if sum(len(holders) for holders in values.values()) < len(required):
+            continue
+        (_, value), holders = max(values.items(), key=lambda item: len(item[1]))
+        if len(holders) < 2:
+            continue
+        _set(template_trace, path, value)
+        for trace in holders:
+            _remove(trace, path)
+        hoisted = True
+    return template_trace if hoisted else None
+
+
+def compact_figure(figure, kept=None):
+    '''
+        Compacts a serialized figure (a dict with data and layout keys) in
+        place and returns it; other values are returned unchanged. kept maps
+        trace types to the property paths left on their traces.
+    '''
+    if not isinstance(figure, dict) or 'data' not in figure:
+        return figure
+    layout = figure.setdefault('layout', {})
+    template_data = layout.setdefault('template', {}).setdefault('data', {})
+
+    by_type = {}
+    for trace in figure['data']:
+        by_type.setdefault(trace.get('type', 'scatter'), []).append(trace)
+
+    for trace_type, traces in by_type.items():
+        template_trace = hoist_shared_properties(traces, template_data.get(trace_type, []),
+                                                 (kept or {}).get(trace_type, ()))
+        if template_trace is not None:
+            template_trace['type'] = trace_type
+            template_data[trace_type] = [template_trace]
+        for trace in traces:
+            strip_defaults(trace, (template_data.get(trace_type) or [{}])[0])
+    return figure
@@ -0,0 +1,76 @@
+'''
+    Synthetic accident data shared by the tests.
+'''
+import functools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cache
+import partitions
+import snapshot
+from preprocess import DATE_FORMAT
+
+# Same pandas mode as the app (see app.py)
+pd.set_option('mode.copy_on_write', True)
+
+
+def make_accidents(n_rows=400, seed=0):
+    '''
+        Accidents over 2018-2019 in random order, two of them without a date.
+    '''
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2018-01-01') + pd.to_timedelta(rng.integers(0, 2 * 365 * 24, n_rows), unit='h')
+    frame = pd.DataFrame({
+        'crash_date': pd.Series(dates),
+        'lighting_condition': pd.Categorical(rng.choice(['DAYLIGHT', 'DARKNESS'], n_rows)),
+        'weather_condition': pd.Categorical(rng.choice(['CLEAR', 'RAIN'], n_rows)),
+        'first_crash_type': pd.Categorical(rng.choice(['ANGLE', 'REAR END'], n_rows)),
+        'roadway_surface_cond': pd.Categorical(rng.choice(['DRY', 'WET'], n_rows)),
+        'intersection_related_i': pd.Categorical(rng.choice(['Y', 'N'], n_rows)),
+        'injuries_fatal': rng.integers(0, 2, n_rows).astype(np.uint8),
+        'injuries_incapacitating': rng.integers(0, 2, n_rows).astype(np.uint8),
+        'injuries_non_incapacitating': rng.integers(0, 2, n_rows).astype(np.uint8),
+        'injuries_reported_not_evident': rng.integers(0, 2, n_rows).astype(np.uint8),
+        'injuries_no_indication': rng.integers(0, 3, n_rows).astype(np.uint16),
+    })
+    frame.loc[[3, 50], 'crash_date'] = pd.NaT
+    return frame
+
+
+@pytest.fixture
+def accidents():
+    return make_accidents()
+
+
+@pytest.fixture
+def accidents_csv(tmp_path, accidents):
+    '''
+        Path of a CSV file holding the accidents, dates in the dataset's format.
+    '''
+    path = tmp_path / 'traffic_accidents.csv'
+    accidents.assign(crash_date=accidents['crash_date'].dt.strftime(DATE_FORMAT)).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def snapshot_storage(monkeypatch, tmp_path):
+    '''
+        Keeps the partitions and the figure cache of the snapshots in tmp_path.
+    '''
+    figure_dir = str(tmp_path / 'figures')
+    monkeypatch.setattr(snapshot, 'ingest', functools.partial(partitions.ingest, root=str(tmp_path / 'partitions')))
+    monkeypatch.setattr(snapshot, 'load_figures', functools.partial(cache.load_figures, cache_dir=figure_dir))
+    monkeypatch.setattr(snapshot, 'save_figures', functools.partial(cache.save_figures, cache_dir=figure_dir))
+
+
+@pytest.fixture
+def current_snapshot(monkeypatch, snapshot_storage, accidents_csv):
+    '''
+        Snapshot of the accidents, served as the current one. It is loaded
+        as after a restart, from the partitions and figures of a first load.
+    '''
+    snapshot.load_snapshot(accidents_csv)
+    monkeypatch.setattr(snapshot, '_current', snapshot.load_snapshot(accidents_csv))
+    return snapshot.current()
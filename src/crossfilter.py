@@ -0,0 +1,167 @@
+'''
+    Cross-filtering between the dashboard charts.
+
+    A click on a chart becomes a filter {column: [values]} over the columns
+    below, which are indexed once with packed bitmaps (see bitmaps.py). The
+    other charts are then rebuilt from the matching rows only; each chart
+    ignores the filters on its own columns so its other values stay visible.
+'''
+import numpy as np
+
+from bitmaps import BitmapIndex
+from calendrier import DAY_TYPES, build_calendar, get_day_index
+from dataset import as_dataset, register_columns
+from heatmap import COLLISION_TRANSLATIONS, INJURY_TRANSLATIONS
+from pie_and_bar import fold_categories, translate_categories
+from radar_chart2 import LIGHTING_CONDITIONS, LIGHTING_TRANSLATIONS, WEATHER_TRANSLATIONS
+from serie_temporelle import day_names_full, month_names_full
+
+FILTER_LABELS = {
+    'year': 'Année',
+    'month': 'Mois',
+    'day_of_week': 'Jour de la semaine',
+    'hour': 'Heure',
+    'day_type': 'Type de jour',
+    'lighting_condition': 'Éclairage',
+    'weather_condition': 'Météo',
+    'collision_type': 'Collision',
+    'injury_type': 'Blessure',
+    'roadway_surface_cond': 'Chaussée',
+    'intersection_related_i': 'Intersection',
+}
+
+# Columns each chart filters on when clicked, and therefore ignores itself
+CHART_FILTERS = {
+    'temporal': ['year', 'month', 'day_of_week', 'hour'],
+    'histogram': ['day_type'],
+    'radar': ['lighting_condition', 'weather_condition'],
+    'heatmap': ['collision_type', 'injury_type'],
+    'pie_bar_road': ['roadway_surface_cond'],
+    'pie_bar_intersection': ['intersection_related_i'],
+}
+
+PIE_BAR_COLUMNS = {
+    'pie_bar_road': 'roadway_surface_cond',
+    'pie_bar_intersection': 'intersection_related_i',
+}
+
+register_columns('filter_index', {
+    'crash_date': None,
+    'lighting_condition': 'category',
+    'weather_condition': 'category',
+    'first_crash_type': 'category',
+    **{column: 'category' for column in PIE_BAR_COLUMNS.values()},
+})
+
+
+def _reverse(translations):
+    return {label: key for key, label in translations.items()}
+
+
+def _normalize_label(value):
+    return str(value).strip().upper()
+
+
+def build_filter_index(df):
+    '''
+        Indexes every cross-filter column of the dataset.
+    '''
+    df = as_dataset(df)
+    dates = df['crash_date']
+    dated = dates.notna().to_numpy()
+    # The rows without a date get no day type (nor year, month, ...)
+    day_types = np.full(len(df), np.nan)
+    if dated.any():
+        calendar = build_calendar(dates.min().year, dates.max().year)
+        day_types[dated] = calendar['type'][get_day_index(calendar, dates[dated])]
+
+    index = BitmapIndex(len(df))
+    for column in ['year', 'month', 'day_of_week', 'hour']:
+        # Missing dates turn these columns into floats
+        index.add_column(column, df[column], int)
+    index.add_column('day_type', day_types, lambda code: DAY_TYPES[int(code)])
+    index.add_column('lighting_condition', df['lighting_condition'], _normalize_label)
+    index.add_column('weather_condition', df['weather_condition'], _normalize_label)
+    index.add_column('collision_type', df['collision_type'])
+    index.add_column('injury_type', df['injury_type'])
+    for column in PIE_BAR_COLUMNS.values():
+        index.add_column(column, df[column], lambda value, column=column: fold_categories([value], column)[0])
+    return index
+
+
+def parse_click(chart, click_data, index, graph_number=0):
+    '''
+        Converts the clickData of a chart into the filters it selects.
+        graph_number tells which radar was clicked (0 for the overview).
+    '''
+    if not click_data or not click_data.get('points'):
+        return {}
+    point = click_data['points'][0]
+
+    if chart == 'temporal':
+        customdata = point.get('customdata')
+        if customdata:
+            label = customdata[0] if isinstance(customdata, list) else customdata
+            if label in _reverse(day_names_full):
+                return {'day_of_week': [_reverse(day_names_full)[label]]}
+            return {'month': [_reverse(month_names_full)[label]]}
+        x = int(point['x'])
+        return {'hour': [x]} if x < 24 else {'year': [x]}
+
+    if chart == 'histogram':
+        return {'day_type': [point['x']]}
+
+    if chart == 'radar':
+        if graph_number == 0:
+            return {'lighting_condition': [_reverse(LIGHTING_TRANSLATIONS)[point['theta']]]}
+        return {
+            'lighting_condition': [LIGHTING_CONDITIONS[graph_number - 1]],
+            'weather_condition': [_reverse(WEATHER_TRANSLATIONS)[point['theta']]],
+        }
+
+    if chart == 'heatmap':
+        return {
+            'collision_type': [_reverse(COLLISION_TRANSLATIONS)[point['y']]],
+            'injury_type': [_reverse(INJURY_TRANSLATIONS)[point['x']]],
+        }
+
+    if chart in PIE_BAR_COLUMNS and 'label' in point:
+        column = PIE_BAR_COLUMNS[chart]
+        values = index.get_values(column)
+        labels = dict(zip(translate_categories(values, column), values))
+        return {column: [labels[point['label']]]} if point['label'] in labels else {}
+
+    return {}
+
+
+def toggle_filters(filters, selected):
+    '''
+        Applies the filters selected by a click: selecting the active
+        filters again removes them, otherwise they replace the previous
+        filters on the same columns.
+    '''
+    filters = dict(filters or {})
+    if selected and all(filters.get(column) == values for column, values in selected.items()):
+        for column in selected:
+            filters.pop(column)
+    else:
+        filters.update(selected)
+    return filters
+
+
+def get_chart_filters(filters, chart):
+    '''
+        Returns the filters applying to a chart (all but those on its own columns).
+    '''
+    return {column: values for column, values in (filters or {}).items()
+            if column not in CHART_FILTERS[chart]}
+
+
+def describe_filters(filters):
+    '''
+        Human-readable summary of the active filters.
+    '''
+    return ' | '.join(
+        f"{FILTER_LABELS.get(column, column)} : {', '.join(map(str, values))}"
+        for column, values in filters.items()
+    )
@@ -0,0 +1,153 @@
+'''
+    Read-only dataset shared by the figure builders and the callbacks.
+
+    The loaded frame is never modified: charts read its columns and the
+    derived columns registered below (date parts, injury type, ...), which
+    are computed at most once per dataset and kept next to the frame. Subsets
+    taken for the cross-filters slice the derived columns already computed
+    instead of computing them again. The app runs pandas in copy-on-write
+    mode (see app.py), so a column read here and then modified is copied
+    first rather than written back.
+'''
+import threading
+
+import numpy as np
+import pandas as pd
+
+from cache import tag_frame
+
+DERIVED_COLUMNS = {}
+
+# Source columns each chart reads, mapped to the compact dtype they are loaded
+# with (None keeps the type given by the parser)
+CHART_COLUMNS = {}
+
+
+def register_columns(chart, columns):
+    '''
+        Declares the source columns a chart reads and their dtypes.
+    '''
+    CHART_COLUMNS[chart] = dict(columns)
+
+
+def get_required_columns(charts=None):
+    '''
+        Returns the union of the columns read by the charts (all of them by
+        default), mapped to their dtype, with the columns in a stable order.
+    '''
+    required = {}
+    for chart in sorted(CHART_COLUMNS if charts is None else charts):
+        for column, dtype in CHART_COLUMNS[chart].items():
+            known = required.get(column)
+            if known is not None and dtype is not None and known != dtype:
+                raise ValueError(f'Column {column} is declared as {known} and {dtype}')
+            required[column] = known or dtype
+    return required
+
+
+def derived_column(name):
+    '''
+        Registers a function computing a derived column from a dataset.
+        It returns an array or a Series with one value per row.
+    '''
+    def decorator(function):
+        DERIVED_COLUMNS[name] = function
+        return function
+    return decorator
+
+
+derived_column('year')(lambda df: df['crash_date'].dt.year)
+derived_column('month')(lambda df: df['crash_date'].dt.month)
+derived_column('hour')(lambda df: df['crash_date'].dt.hour)
+derived_column('day_of_week')(lambda df: df['crash_date'].dt.dayofweek + 1)
+register_columns('dataset', {'crash_date': None})
+
+
+class Dataset:
+    '''
+        Immutable view of a dataframe with lazily computed derived columns.
+    '''
+
+    def __init__(self, frame, derived=None):
+        self._frame = frame
+        self._derived = dict(derived or {})
+        self._lock = threading.Lock()
+
+    @property
+    def frame(self):
+        '''
+            The underlying frame, which must be treated as read-only.
+        '''
+        return self._frame
+
+    @property
+    def attrs(self):
+        return self._frame.attrs
+
+    @property
+    def columns(self):
+        return self._frame.columns
+
+    @property
+    def version(self):
+        return self._frame.attrs.get('dataset_version')
+
+    def __len__(self):
+        return len(self._frame)
+
+    def __contains__(self, name):
+        return name in self._frame.columns or name in DERIVED_COLUMNS
+
+    def __getitem__(self, name):
+        if name in self._frame.columns:
+            return self._frame[name]
+        return self.derived(name)
+
+    def derived(self, name):
+        '''
+            Returns a derived column, computing it on first use only.
+        '''
+        values = self._derived.get(name)
+        if values is None:
+            with self._lock:
+                values = self._derived.get(name)
+                if values is None:
+                    values = DERIVED_COLUMNS[name](self)
+                    if not isinstance(values, pd.Series):
+                        values = pd.Series(values, index=self._frame.index)
+                    self._derived[name] = values.rename(name)
+                    values = self._derived[name]
+        return values
+
+    def derive(self, names=None):
+        '''
+            Computes the given derived columns (all of them by default) now.
+        '''
+        for name in DERIVED_COLUMNS if names is None else names:
+            self.derived(name)
+        return self
+
+    def groupby(self, by, **kwargs):
+        '''
+            Groups the frame by columns, derived columns or Series.
+        '''
+        keys = by if isinstance(by, list) else [by]
+        keys = [self[key] if isinstance(key, str) and key not in self._frame.columns else key
+                for key in keys]
+        return self._frame.groupby(keys if isinstance(by, list) else keys[0], **kwargs)
+
+    def take(self, rows, filters=None):
+        '''
+            Returns the dataset of the given row positions, tagged with the filters
+            that selected them. The derived columns computed so far are sliced.
+        '''
+        rows = np.asarray(rows)
+        frame = tag_frame(self._frame.take(rows), self.version, filters)
+        return Dataset(frame, {name: values.take(rows) for name, values in self._derived.items()})
+
+
+def as_dataset(df):
+    '''
+        Wraps a dataframe in a Dataset, or returns the dataset unchanged.
+    '''
+    return df if isinstance(df, Dataset) else Dataset(df)
@@ -0,0 +1,38 @@
+'''
+    Numeric trace data sent to the browser as binary typed arrays.
+
+    Plotly 6 serializes the numpy arrays of a figure as base64 typed arrays
+    (integers downcast to the smallest type holding their values), which are
+    much smaller and faster to encode and parse than lists of numbers. The
+    builders therefore keep their data as numpy arrays instead of lists.
+
+    Dash patches are not figures: their values are encoded as plain JSON, so
+    the arrays they set are converted here to the same typed array specs.
+'''
+import numpy as np
+from _plotly_utils.utils import to_typed_array_spec
+
+
+def closed(values):
+    '''
+        Appends the first value to the end of an array, to close the line of
+        a polar trace.
+    '''
+    values = np.asarray(values)
+    return np.append(values, values[:1])
+
+
+def typed_array(values):
+    '''
+        Encodes a numeric array as a typed array spec for a Dash Patch.
+    '''
+    return to_typed_array_spec(np.asarray(values))
+
+
+def epoch_ms(dates):
+    '''
+        Converts datetime64 values to milliseconds since the epoch, which
+        Plotly reads as dates on a date axis. Unlike date strings, they are
+        sent as a typed array.
+    '''
+    return np.asarray(dates, dtype='datetime64[ms]').astype(np.int64).astype(np.float64)
@@ -2,8 +2,14 @@
     Fichier contenant les fonctions pour créer la matrice de chaleur (heatmap)
     montrant la relation entre les types de collision et la sévérité des blessures.
 '''
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+from dash import Patch
+from cache import cached
+from dataset import as_dataset, derived_column, register_columns
+from figure_data import typed_array
+from kernel import aggregate, encode
 
 COLLISION_TYPES = ['Turning', 'Angle', 'Rear end', 'Sideswipe (same direction)', 'Pedestrian']
 INJURY_TYPES = ['No indication of injury', 'Non-incapacitating injury', 'Reported, not evident', 
@@ -17,6 +23,14 @@ COLLISION_TRANSLATIONS = {
     'Pedestrian': 'Piétonne'
 }
 
+COLLISION_MAPPING = {
+    'TURNING': 'Turning',
+    'ANGLE': 'Angle',
+    'REAR END': 'Rear end',
+    'SIDESWIPE SAME DIRECTION': 'Sideswipe (same direction)',
+    'PEDESTRIAN': 'Pedestrian'
+}
+
 INJURY_TRANSLATIONS = {
     'No indication of injury': 'Aucune blessure',
     'Non-incapacitating injury': 'Non incapacitante',
@@ -25,59 +39,65 @@ INJURY_TRANSLATIONS = {
     'Fatal': 'Mortelle'
 }
 
+register_columns('heatmap', {
+    'first_crash_type': 'category',
+    'injuries_fatal': 'uint8',
+    'injuries_incapacitating': 'uint8',
+    'injuries_non_incapacitating': 'uint8',
+    'injuries_reported_not_evident': 'uint8',
+})
+
+
+@derived_column('injury_type')
+def get_injury_types(df):
+    '''
+    Détermine le type de blessure le plus grave de chaque accident,
+    de façon vectorisée sur les colonnes de blessures.
+    '''
+    return np.select(
+        [
+            df['injuries_fatal'] > 0,
+            df['injuries_incapacitating'] > 0,
+            df['injuries_non_incapacitating'] > 0,
+            df['injuries_reported_not_evident'] > 0,
+        ],
+        ['Fatal', 'Incapacitating injury', 'Non-incapacitating injury', 'Reported, not evident'],
+        default='No indication of injury'
+    )
+
 
+@derived_column('collision_type')
+def get_collision_types(df):
+    '''
+    Ramène le premier type de collision de chaque accident aux types de la
+    heatmap (manquant pour les autres types).
+    '''
+    return df['first_crash_type'].str.upper().map(COLLISION_MAPPING)
+
+
+@cached('heatmap')
 def prepare_heatmap_data(df):
     '''
     Prépare les données pour la heatmap en comptant le nombre d'accidents 
     par type de collision et type de blessure.
     '''
-    df = df.copy()
-    df['first_crash_type'] = df['first_crash_type'].str.upper()
-    
-    collision_mapping = {
-        'TURNING': 'Turning',
-        'ANGLE': 'Angle',
-        'REAR END': 'Rear end',
-        'SIDESWIPE SAME DIRECTION': 'Sideswipe (same direction)',
-        'PEDESTRIAN': 'Pedestrian'
-    }
-    
-    df['collision_type'] = df['first_crash_type'].map(collision_mapping)
-    df = df[df['collision_type'].isin(COLLISION_TYPES)]
-    
-    def get_injury_type(row):
-        if row['injuries_fatal'] > 0:
-            return 'Fatal'
-        elif row['injuries_incapacitating'] > 0:
-            return 'Incapacitating injury'
-        elif row['injuries_non_incapacitating'] > 0:
-            return 'Non-incapacitating injury'
-        elif row['injuries_reported_not_evident'] > 0:
-            return 'Reported, not evident'
-        else:
-            return 'No indication of injury'
-    
-    df['injury_type'] = df.apply(get_injury_type, axis=1)
-    
-    heatmap_data = df.groupby(['collision_type', 'injury_type']).size().reset_index(name='count')
-    
-    pivot_data = heatmap_data.pivot(index='collision_type', columns='injury_type', values='count')
-    
-    for injury in INJURY_TYPES:
-        if injury not in pivot_data.columns:
-            pivot_data[injury] = 0
-    
-    pivot_data = pivot_data[INJURY_TYPES]
-    
-    for collision in COLLISION_TYPES:
-        if collision not in pivot_data.index:
-            pivot_data.loc[collision] = [0] * len(INJURY_TYPES)
-    
-    pivot_data = pivot_data.reindex(COLLISION_TYPES)
-    
-    pivot_data = pivot_data.fillna(0)
-    
-    return pivot_data
+    # Les colonnes dérivées sont calculées une seule fois par jeu de données ;
+    # les accidents d'un autre type de collision sont écartés par le noyau.
+    df = as_dataset(df)
+    counts = aggregate([
+        encode(df['collision_type'], COLLISION_TYPES),
+        encode(df['injury_type'], INJURY_TYPES),
+    ]).counts
+    return pd.DataFrame(counts, index=COLLISION_TYPES, columns=INJURY_TYPES).rename_axis(
+        index='collision_type', columns='injury_type')
+
+def patch_heatmap(df):
+    '''
+    Met à jour en place les valeurs de la heatmap pour les accidents de df.
+    '''
+    patch = Patch()
+    patch['data'][0]['z'] = typed_array(prepare_heatmap_data(df).values)
+    return patch
 
 def create_heatmap(df):
     '''
@@ -0,0 +1,136 @@
+'''
+    Grouped counts and sums over a few low-cardinality keys.
+
+    Every key column is coded once into small integers (categorical columns
+    already are). The codes of a row are combined into a single index in the
+    dense array of all key combinations, and the rows are reduced into that
+    array with np.bincount. Large inputs are split into row chunks reduced by
+    a thread pool, whose partial arrays are then added together.
+'''
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+KERNEL_THREADS = int(os.environ.get('KERNEL_THREADS', os.cpu_count() or 1))
+# Below this number of rows per chunk, threads cost more than they save
+MIN_CHUNK_ROWS = 256 * 1024
+
+Key = namedtuple('Key', ['codes', 'labels'])
+Aggregate = namedtuple('Aggregate', ['counts', 'sums'])
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=KERNEL_THREADS, thread_name_prefix='kernel')
+    return _executor
+
+
+def _reset_executor():
+    # The threads of the pool do not survive a fork (see builder.py)
+    global _executor
+    _executor = None
+
+
+os.register_at_fork(after_in_child=_reset_executor)
+
+
+def encode(values, labels=None, normalize=None, other=None):
+    '''
+        Codes a key column. Returns a Key holding the code of every row
+        (-1 for missing values) and the label of every code.
+
+        normalize is applied to the unique values only; values it maps
+        together share the same code. With labels, the codes follow that list
+        and the values absent from it get an extra code labelled other (or are
+        treated as missing if other is None).
+    '''
+    if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(np.asarray(values))
+    if labels is None and normalize is None:
+        return Key(codes, list(uniques))
+
+    uniques = [normalize(value) for value in uniques] if normalize else list(uniques)
+    if labels is None:
+        labels = list(dict.fromkeys(uniques))
+    remap = pd.Index(labels).get_indexer(uniques)
+    labels = list(labels)
+    if other is not None:
+        remap[remap < 0] = len(labels)
+        labels.append(other)
+    return Key(np.append(remap, -1)[codes], labels)
+
+
+def _reduce_chunk(codes, sizes, values, start, stop):
+    index = np.zeros(stop - start, dtype=np.int64)
+    valid = np.ones(stop - start, dtype=bool)
+    for key_codes, size in zip(codes, sizes):
+        chunk = key_codes[start:stop]
+        valid &= chunk >= 0
+        index *= size
+        index += chunk
+
+    rows = slice(start, stop)
+    if not valid.all():
+        index = index[valid]
+        rows = np.flatnonzero(valid) + start
+    total = math.prod(sizes)
+    counts = np.bincount(index, minlength=total)
+    sums = [np.bincount(index, weights=column[rows], minlength=total) for column in values]
+    return counts, sums
+
+
+def aggregate(keys, values=(), threads=KERNEL_THREADS):
+    '''
+        Counts the rows and sums the value columns per combination of keys.
+
+        keys are Key tuples (see encode) and rows with a missing key are left
+        out. Returns an Aggregate whose counts have one axis per key and whose
+        sums have an extra last axis, one slot per value column.
+    '''
+    sizes = [len(key.labels) for key in keys]
+    codes = [key.codes for key in keys]
+    values = [np.asarray(column) for column in values]
+    n_rows = len(codes[0]) if codes else 0
+
+    n_chunks = max(1, min(threads, n_rows // MIN_CHUNK_ROWS))
+    bounds = np.linspace(0, n_rows, n_chunks + 1).astype(int)
+    if n_chunks == 1:
+        parts = [_reduce_chunk(codes, sizes, values, 0, n_rows)]
+    else:
+        parts = list(_get_executor().map(
+            lambda start, stop: _reduce_chunk(codes, sizes, values, start, stop), bounds[:-1], bounds[1:]
+        ))
+
+    counts = sum(part[0] for part in parts).reshape(sizes)
+    sums = np.zeros(sizes + [len(values)], dtype=np.float64)
+    for _, part_sums in parts:
+        for k, column_sums in enumerate(part_sums):
+            sums[..., k] += column_sums.reshape(sizes)
+    if all(np.issubdtype(column.dtype, np.integer) for column in values):
+        sums = sums.astype(np.int64)
+    return Aggregate(counts, sums)
+
+
+def to_frame(counts, keys, names=None, sums=None, columns=(), count='count'):
+    '''
+        Lists the combinations of keys holding rows (non-zero counts) as a
+        DataFrame indexed by their labels and sorted like a pandas groupby,
+        with the row count and one column per summed value.
+    '''
+    cells = np.nonzero(counts)
+    index = pd.MultiIndex.from_arrays(
+        [np.asarray(key.labels, dtype=object)[cell] for key, cell in zip(keys, cells)], names=names
+    )
+    frame = pd.DataFrame({count: counts[cells]}, index=index)
+    for k, column in enumerate(columns):
+        frame[column] = sums[cells + (k,)]
+    return frame.sort_index()
@@ -0,0 +1,154 @@
+'''
+    Stores the accident data partitioned by year.
+
+    Each year is written to its own file next to a metadata index holding the
+    row count of each partition and the CSV file and columns they were written
+    from, so stale partitions are detected. The app reads every partition at
+    boot; the filters of a query over the partitions (see preprocess.Query)
+    apply to the rows read.
+
+    The rows without a date go to a partition of their own, and every row
+    keeps its position in the source: reads put the rows back in the order
+    of the CSV file, so the partitions give the same frame as the file.
+'''
+import json
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from cache import tag_frame
+from preprocess import DATE_COLUMN, Query
+
+PARTITION_DIR = os.path.join(os.path.dirname(__file__), 'data', 'partitions')
+INDEX_FILE = '_index.json'
+# Bumped when the layout of the partitions changes, so older ones are rewritten
+PARTITION_FORMAT = 2
+# Key of the partition of the rows without a date
+UNDATED = 'none'
+# Position of each row in the source, stored in the partitions only
+ROW_COLUMN = '_row'
+
+
+def _write_atomically(path, write):
+    # Every writer (process or thread) gets a temporary file of its own
+    handle, tmp_path = tempfile.mkstemp(prefix=f'{os.path.basename(path)}.', suffix='.tmp',
+                                        dir=os.path.dirname(path))
+    os.close(handle)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def write_partitions(dataframe, root=PARTITION_DIR, date_col=DATE_COLUMN, source=None, projection=None):
+    '''
+        Writes one partition per year and the metadata index.
+
+        The dates must already be parsed. source describes the file the data
+        was read from (see get_source_info) and projection the columns and
+        dtypes it was loaded with, so stale partitions can be detected.
+    '''
+    os.makedirs(root, exist_ok=True)
+    partitions = {}
+    rows = dataframe.assign(**{ROW_COLUMN: np.arange(len(dataframe))})
+    for year, part in rows.groupby(dataframe[date_col].dt.year.to_numpy(), dropna=False):
+        key = UNDATED if pd.isna(year) else str(int(year))
+        file_name = f'year={key}.pkl'
+        _write_atomically(os.path.join(root, file_name), part.reset_index(drop=True).to_pickle)
+        partitions[key] = {'file': file_name, 'rows': len(part)}
+
+    index = {
+        'format': PARTITION_FORMAT,
+        'date_col': date_col,
+        'columns': list(dataframe.columns),
+        'source': source,
+        'projection': projection,
+        'partitions': partitions,
+    }
+
+    def write_index(path):
+        with open(path, 'w', encoding='utf-8') as index_file:
+            json.dump(index, index_file)
+    _write_atomically(os.path.join(root, INDEX_FILE), write_index)
+    return index
+
+
+def read_index(root=PARTITION_DIR):
+    '''
+        Returns the metadata index of a partitioned dataset, or None if there is none.
+    '''
+    try:
+        with open(os.path.join(root, INDEX_FILE), encoding='utf-8') as index_file:
+            return json.load(index_file)
+    except (OSError, ValueError):
+        return None
+
+
+def is_partitioned(source):
+    '''
+        Tells whether the source is a directory holding a partitioned dataset.
+    '''
+    return isinstance(source, (str, os.PathLike)) and os.path.isfile(os.path.join(source, INDEX_FILE))
+
+
+def read_partitions(root=PARTITION_DIR, columns=None):
+    '''
+        Reads the rows of every partition, in the order of the source.
+    '''
+    index = read_index(root)
+    parts = []
+    for partition in index['partitions'].values():
+        part = pd.read_pickle(os.path.join(root, partition['file']))
+        parts.append(part if columns is None else part[columns + [ROW_COLUMN]])
+
+    if not parts:
+        empty = pd.DataFrame(columns=index['columns'])
+        return empty if columns is None else empty[columns]
+    result = pd.concat(parts, ignore_index=True)
+    order = np.argsort(result[ROW_COLUMN].to_numpy(), kind='stable')
+    return result.drop(columns=ROW_COLUMN).take(order).reset_index(drop=True)
+
+
+def get_source_info(path):
+    '''
+        Describes a source file by its size and modification time.
+    '''
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def ingest(csv_path, root=PARTITION_DIR, version=None, columns=None):
+    '''
+        Loads the dataset, from its partitions when they are up to date with the
+        CSV file, otherwise by reading the CSV and (re)writing the partitions.
+        columns maps the columns to load to their dtype (all columns by default,
+        see dataset.get_required_columns).
+        The frame is tagged with the dataset version used by the result cache
+        (by default derived from the size and modification time of the CSV).
+    '''
+    source = get_source_info(csv_path)
+    version = version or f"{source['size']}-{source['mtime']}"
+    index = read_index(root)
+    if (index is not None and index.get('format') == PARTITION_FORMAT
+            and index.get('source') == source and index.get('projection') == columns):
+        try:
+            return tag_frame(Query(root).collect(), version)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Missing or corrupt partitions are rewritten from the CSV
+            pass
+
+    query = Query(csv_path)
+    if columns is not None:
+        query = query.select(*columns).astype(columns)
+    dataframe = tag_frame(query.collect(), version)
+    try:
+        write_partitions(dataframe, root, source=source, projection=columns)
+    except OSError:
+        # A read-only deployment still works, it just keeps reading the CSV
+        pass
+    return dataframe
@@ -2,7 +2,12 @@ import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from plotly.colors import qualitative
+from dash import Patch
 import numpy as np
+from cache import cached
+from dataset import register_columns
+from figure_data import typed_array
+from kernel import aggregate, encode, to_frame
 
 INJURY_COLS = [
     "injuries_no_indication",
@@ -41,23 +46,120 @@ INTERSECTION_TRANSLATIONS = {
 def load_data(filepath):
     return pd.read_csv(filepath)
 
-def prepare_pie_data(df, category_col):
-    if category_col == "roadway_surface_cond":
-        df = df.copy()
-        others_categories = [
-            "UNKNOWN", 
-            "SNOW OR SLUSH", 
-            "ICE", 
-            "OTHER", 
-            "SAND, MUD, DIRT"
-        ]
-        df[category_col] = df[category_col].apply(
-            lambda x: "OTHERS" if str(x).strip().upper() in others_categories else x
-        )
-    
-    pie_df = df[category_col].value_counts().reset_index()
-    pie_df.columns = [category_col, "Count"]
-    return pie_df
+TRAFFICWAY_TRANSLATIONS = {
+    "NOT DIVIDED": "Non divisée",
+    "DIVIDED - W/MEDIAN (NOT RAISED)": "Divisée, terre-plein non surélevé",
+    "DIVIDED - W/MEDIAN BARRIER": "Divisée, barrière médiane",
+    "ONE-WAY": "Sens unique",
+    "FOUR WAY": "Intersection à quatre voies",
+    "T-INTERSECTION": "Intersection en T",
+    "OTHERS": "Autres"
+}
+
+TRAFFIC_CONTROL_TRANSLATIONS = {
+    "TRAFFIC SIGNAL": "Feu de circulation",
+    "STOP SIGN/FLASHER": "Arrêt ou feu clignotant",
+    "NO CONTROLS": "Aucune signalisation",
+    "UNKNOWN": "Inconnu",
+    "OTHERS": "Autres"
+}
+
+# Déclaration des dimensions croisées avec la gravité des blessures.
+# « others » regroupe les valeurs listées sous « OTHERS », « keep » regroupe
+# toutes les valeurs qui n'y figurent pas ; les couleurs sont indexées par
+# libellé traduit (palette qualitative de Plotly par défaut).
+DIMENSIONS = {
+    "roadway_surface_cond": {
+        "others": ["UNKNOWN", "SNOW OR SLUSH", "ICE", "OTHER", "SAND, MUD, DIRT"],
+        "labels": ROAD_COND_TRANSLATIONS,
+        "colors": {
+            "Sec": "#dd6700",
+            "Mouillé": "#1f77b4",
+            "Autres": "grey",
+        },
+        "default_color": "grey",
+        "legend_title": "Condition de<br>la chaussée",
+    },
+    "intersection_related_i": {
+        "labels": INTERSECTION_TRANSLATIONS,
+        "colors": {
+            "Oui": "#d62728",
+            "Non": "#2ca02c",
+            "Inconnu": "#D3D3D3"
+        },
+        "default_color": "grey",
+        "legend_title": "Intersection",
+    },
+    "trafficway_type": {
+        "keep": ["NOT DIVIDED", "DIVIDED - W/MEDIAN (NOT RAISED)", "DIVIDED - W/MEDIAN BARRIER",
+                 "ONE-WAY", "FOUR WAY", "T-INTERSECTION"],
+        "labels": TRAFFICWAY_TRANSLATIONS,
+        "legend_title": "Type de voie",
+    },
+    "traffic_control_device": {
+        "keep": ["TRAFFIC SIGNAL", "STOP SIGN/FLASHER", "NO CONTROLS", "UNKNOWN"],
+        "labels": TRAFFIC_CONTROL_TRANSLATIONS,
+        "legend_title": "Signalisation",
+    },
+}
+
+# Colonnes lues par les graphiques du tableau de bord (nombres de blessés compacts)
+INJURY_DTYPES = {col: "uint16" if col == "injuries_no_indication" else "uint8" for col in INJURY_COLS}
+register_columns("pie_bar_road", {"roadway_surface_cond": "category", **INJURY_DTYPES})
+register_columns("pie_bar_intersection", {"intersection_related_i": "category", **INJURY_DTYPES})
+
+def fold_categories(values, category_col):
+    """Regroupe les catégories rares sous « OTHERS » en ne traitant que les valeurs uniques"""
+    dimension = DIMENSIONS.get(category_col, {})
+    others = dimension.get("others", [])
+    keep = dimension.get("keep")
+    folded = []
+    for value in values:
+        key = str(value).strip().upper()
+        folded.append("OTHERS" if key in others or (keep is not None and key not in keep) else value)
+    return folded
+
+def translate_categories(categories, category_col):
+    """Traduit les clés de catégories (quelques valeurs) plutôt que chaque ligne"""
+    translations = DIMENSIONS.get(category_col, {}).get("labels", {})
+    return [translations.get(str(cat).strip().upper(), str(cat)) for cat in categories]
+
+def get_color_map(translated_categories, category_col):
+    """Associe une couleur à chaque libellé traduit selon la déclaration de la dimension"""
+    dimension = DIMENSIONS.get(category_col, {})
+    if "colors" in dimension:
+        color_map = dict(dimension["colors"])
+        default_color = dimension.get("default_color", "#CCCCCC")
+    else:
+        color_map = dict(zip(translated_categories, qualitative.Plotly[:len(translated_categories)]))
+        default_color = dimension.get("default_color", "#CCCCCC")
+
+    for cat in translated_categories:
+        if cat not in color_map:
+            color_map[cat] = default_color
+    return color_map, default_color
+
+@cached("pie_and_bar")
+def prepare_category_data(df, category_cols=None):
+    """
+    Compte les accidents et somme les blessures par combinaison de catégories
+    en une seule agrégation, les catégories rares étant regroupées sur les
+    valeurs uniques avant le comptage.
+    Par défaut, toutes les dimensions déclarées et présentes sont agrégées ensemble.
+    """
+    if category_cols is None:
+        category_cols = [col for col in DIMENSIONS if col in df.columns]
+    keys = [
+        encode(df[col], normalize=lambda value, col=col: fold_categories([value], col)[0])
+        for col in category_cols
+    ]
+    result = aggregate(keys, [df[col] for col in INJURY_COLS])
+    return to_frame(result.counts, keys, category_cols, result.sums, INJURY_COLS, count="Count")
+
+def get_category_totals(category_data, category_col):
+    """Marginalise l'agrégat partagé sur une seule catégorie, triée par nombre d'accidents"""
+    totals = category_data.groupby(level=category_col).sum()
+    return totals.sort_values("Count", ascending=False, kind="stable")
 
 def custom_hover_template(chart_type, **kwargs):
     """Génère des templates de tooltip personnalisés"""
@@ -76,55 +178,17 @@ def custom_hover_template(chart_type, **kwargs):
     )
     return ""
 
-def prepare_bar_data(df, category_col):
-    if category_col == "roadway_surface_cond":
-        df = df.copy()
-        others_categories = [
-            "UNKNOWN", 
-            "SNOW OR SLUSH", 
-            "ICE", 
-            "OTHER", 
-            "SAND, MUD, DIRT"
-        ]
-        df[category_col] = df[category_col].apply(
-            lambda x: "OTHERS" if str(x).strip().upper() in others_categories else x
-        )
-    
-    grouped = df.groupby(category_col)[INJURY_COLS].sum().reset_index()
-    melted = grouped.melt(id_vars=category_col, var_name="Injury Type", value_name="Count")
-    melted["Count"] = melted["Count"].replace(0, 0.1)
-    return melted
-
-def create_combined_figure(pie_data, bar_data, category_col, title, pie_title, bar_title):
-    categories = pie_data[category_col].tolist()
-    if category_col == "roadway_surface_cond":
-        translated_categories = [ROAD_COND_TRANSLATIONS.get(str(cat).strip().upper(), str(cat)) for cat in categories]
-    elif category_col == "intersection_related_i":
-        translated_categories = [INTERSECTION_TRANSLATIONS.get(str(cat).strip().upper(), str(cat)) for cat in categories]
-    else:
-        translated_categories = [str(cat) for cat in categories]
+def get_bar_values(totals):
+    """Valeurs des barres (catégorie × blessure) ; 0 devient 0.1 pour l'échelle logarithmique"""
+    bar_values = totals[INJURY_COLS].to_numpy(dtype=float)
+    bar_values[bar_values == 0] = 0.1
+    return bar_values
 
-    if category_col == "roadway_surface_cond":
-        color_map = {
-            "Sec": "#dd6700",
-            "Mouillé": "#1f77b4",
-            "Autres": "grey",
-        }
-        default_color = "grey"
-    elif category_col == "intersection_related_i":
-        color_map = {
-            "Oui": "#d62728",
-            "Non": "#2ca02c",
-            "Inconnu": "#D3D3D3"
-        }
-        default_color = "grey"
-    else:
-        color_map = dict(zip(translated_categories, qualitative.Plotly[:len(translated_categories)]))
-        default_color = "#CCCCCC"
+def create_combined_figure(totals, category_col, title, pie_title, bar_title):
+    translated_categories = translate_categories(totals.index, category_col)
+    bar_values = get_bar_values(totals)
 
-    for cat in translated_categories:
-        if cat not in color_map:
-            color_map[cat] = default_color
+    color_map, default_color = get_color_map(translated_categories, category_col)
 
     fig = make_subplots(
         rows=1, cols=2,
@@ -134,17 +198,12 @@ def create_combined_figure(pie_data, bar_data, category_col, title, pie_title, b
         horizontal_spacing=0.13,
     )
 
-    if category_col == "roadway_surface_cond":
-        translated_labels = [ROAD_COND_TRANSLATIONS.get(val.upper(), val) for val in pie_data[category_col]]
-    elif category_col == "intersection_related_i":
-        translated_labels = [INTERSECTION_TRANSLATIONS.get(val.upper(), val) for val in pie_data[category_col]]
-    else:
-        translated_labels = pie_data[category_col]
-    
+    translated_labels = translated_categories
+
     fig.add_trace(
         go.Pie(
             labels=translated_labels,
-            values=pie_data["Count"],
+            values=totals["Count"].to_numpy(),
             marker=dict(
                 colors=[color_map.get(val, default_color) for val in translated_labels],
                 line=dict(color="white", width=1),
@@ -181,11 +240,10 @@ def create_combined_figure(pie_data, bar_data, category_col, title, pie_title, b
     traces = []
     for j, injury in enumerate(INJURY_COLS):
         for i, cat in enumerate(translated_categories):
-            injury_data = bar_data[(bar_data[category_col] == cat) & (bar_data["Injury Type"] == injury)]
             fig.add_trace(
                 go.Bar(
                 x=[INJURY_TRANSLATIONS[injury]],
-                y=injury_data["Count"],
+                y=bar_values[i, j:j + 1],
                 marker_color=color_map.get(cat, default_color),
                 marker=dict(
                     line=dict(
@@ -258,9 +316,9 @@ def create_combined_figure(pie_data, bar_data, category_col, title, pie_title, b
                 color="#031732",
             ),
         )],
-        legend_title_text="Intersection" if category_col == "intersection_related_i" 
-                 else "Condition de<br>la chaussée" if category_col == "roadway_surface_cond" 
-                 else category_col.replace("_", " ").title(),
+        legend_title_text=DIMENSIONS.get(category_col, {}).get(
+            "legend_title", category_col.replace("_", " ").title()
+        ),
         legend=dict(itemclick=False, y=0.8, itemwidth=40, font=dict(family="Lato, sans-serif"),),
         paper_bgcolor='rgba(0,0,0,0)',
         plot_bgcolor='rgba(0,0,0,0)',
@@ -272,28 +330,35 @@ def create_combined_figure(pie_data, bar_data, category_col, title, pie_title, b
     return fig
 
 
-def plot_intersection_vs_injury(df):
-    category = "intersection_related_i"
-    pie_data = prepare_pie_data(df, category)
-    bar_data = prepare_bar_data(df, category)
-    if category == "intersection_related_i":
-        bar_data[category] = bar_data[category].apply(lambda x: INTERSECTION_TRANSLATIONS.get(str(x).upper(), x))
+def plot_dimension_vs_injury(df, category_col):
+    """
+    Construit la figure secteurs/barres d'une dimension à partir de l'agrégat
+    conjoint de toutes les dimensions, partagé (via le cache) par les figures
+    de toutes les dimensions.
+    """
     return create_combined_figure(
-        pie_data, bar_data, category,
-        title="",
-        pie_title="",
-        bar_title=""
-    )
-
-def plot_condition_vs_injury(df):
-    category = "roadway_surface_cond"
-    pie_data = prepare_pie_data(df, category)
-    bar_data = prepare_bar_data(df, category)
-    if category == "roadway_surface_cond":
-        bar_data[category] = bar_data[category].apply(lambda x: ROAD_COND_TRANSLATIONS.get(x.upper(), x))
-    return create_combined_figure(
-        pie_data, bar_data, category,
+        get_category_totals(prepare_category_data(df), category_col), category_col,
         title="",
         pie_title="",
         bar_title="",
     )
+
+def patch_dimension_vs_injury(df, category_col, categories):
+    """
+    Met à jour en place les valeurs du secteur et des barres pour les accidents
+    de df. categories donne l'ordre des catégories de la figure : les catégories
+    absentes de df y restent avec des valeurs nulles.
+    """
+    totals = get_category_totals(prepare_category_data(df), category_col)
+    totals = totals.reindex(categories, fill_value=0)
+    bar_values = get_bar_values(totals)
+
+    patch = Patch()
+    patch["data"][0]["values"] = typed_array(totals["Count"])
+    # Trace 0 : secteurs, puis une trace de légende par catégorie, puis une
+    # barre par (blessure, catégorie)
+    first_bar = 1 + len(categories)
+    for j in range(len(INJURY_COLS)):
+        for i in range(len(categories)):
+            patch["data"][first_bar + j * len(categories) + i]["y"] = typed_array(bar_values[i, j:j + 1])
+    return patch
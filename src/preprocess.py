@@ -1,7 +1,16 @@
 '''
-    Contains some functions to preprocess data (not used in current pie/bar chart).
+    Contains some functions to preprocess data.
+
+    The Query class is a lazy pipeline over the accident data: its filters are
+    only recorded, then pushed ahead of date parsing and column materialization
+    when the query is collected.
 '''
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+
+DATE_COLUMN = 'crash_date'
+DATE_FORMAT = '%m/%d/%Y %I:%M:%S %p'
 
 def convert_dates(dataframe: pd.DataFrame):
     '''
@@ -28,4 +37,188 @@ def restructure_df(yearly_df: pd.DataFrame):
     '''
         Restructures the dataframe for heatmap-like display.
     '''
-    return yearly_df.pivot(index='Arrond_Nom', columns='Date_Plantation', values='Counts').fillna(0)
\ No newline at end of file
+    return yearly_df.pivot(index='Arrond_Nom', columns='Date_Plantation', values='Counts').fillna(0)
+
+def parse_dates(dates: pd.Series, date_format=DATE_FORMAT):
+    '''
+        Parses the dates with the dataset's format, inferring it if they do not match.
+    '''
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    try:
+        return pd.to_datetime(dates, format=date_format)
+    except (ValueError, TypeError):
+        return pd.to_datetime(dates)
+
+def extract_years(dates: pd.Series):
+    '''
+        Reads the year of each raw date without parsing the whole date.
+    '''
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.dt.year
+    return pd.to_numeric(dates.astype('string').str.extract(r'(\d{4})', expand=False), errors='coerce')
+
+def cast_columns(dataframe: pd.DataFrame, dtypes):
+    '''
+        Converts the columns to compact dtypes ('category', 'uint8', ...).
+        Numeric columns keep their type when their values do not fit the
+        requested one (missing, fractional or out of range values).
+    '''
+    for column, dtype in dtypes.items():
+        if dtype is None or column not in dataframe.columns or dataframe[column].dtype == dtype:
+            continue
+        values = dataframe[column]
+        if dtype != 'category':
+            info = np.iinfo(dtype)
+            if (values.isna().any() or not values.empty and (
+                    values.min() < info.min or values.max() > info.max or (values % 1 != 0).any())):
+                continue
+        dataframe[column] = values.astype(dtype)
+    return dataframe
+
+def concat_chunks(chunks, columns=(), dtypes=None):
+    '''
+        Concatenates frames read by chunks, merging the categories of their
+        categorical columns instead of falling back to objects. Without any
+        chunk, returns an empty frame of the given columns and dtypes.
+    '''
+    chunks = list(chunks)
+    if not chunks:
+        empty = pd.DataFrame({column: pd.Series(dtype=object) for column in columns})
+        return cast_columns(empty, dtypes or {})
+    result = pd.concat(chunks, ignore_index=True)
+    for column in result.columns:
+        if isinstance(chunks[0][column].dtype, pd.CategoricalDtype) \
+                and not isinstance(result[column].dtype, pd.CategoricalDtype):
+            result[column] = union_categoricals([chunk[column] for chunk in chunks])
+    return result
+
+def get_daily_info(dataframe: pd.DataFrame, date_col=DATE_COLUMN):
+    '''
+        Counts the accidents of every calendar day, with the day's year and weekday.
+    '''
+    days = parse_dates(dataframe[date_col]).dt.normalize()
+    daily = days.value_counts().sort_index().rename_axis('date').reset_index(name='count')
+    daily['year'] = daily['date'].dt.year
+    daily['day_of_week'] = daily['date'].dt.dayofweek + 1
+    return daily
+
+
+class Query:
+    '''
+        Lazy query over a CSV file, a dataframe or a year-partitioned dataset
+        (see partitions.py).
+
+        Every method returns a new query; nothing is read until collect().
+    '''
+
+    def __init__(self, source, date_col=DATE_COLUMN, date_format=DATE_FORMAT, chunksize=200_000):
+        self.source = source
+        self.date_col = date_col
+        self.date_format = date_format
+        self.chunksize = chunksize
+        self.year_range = None
+        self.category_filters = {}
+        self.columns = None
+        self.dtypes = {}
+        self.daily = False
+
+    def _derive(self, **changes):
+        query = Query(self.source, self.date_col, self.date_format, self.chunksize)
+        query.year_range = self.year_range
+        query.category_filters = dict(self.category_filters)
+        query.columns = self.columns
+        query.dtypes = dict(self.dtypes)
+        query.daily = self.daily
+        for name, value in changes.items():
+            setattr(query, name, value)
+        return query
+
+    def years(self, start=None, end=None):
+        '''
+            Keeps the rows whose year is between start and end, inclusively.
+        '''
+        if self.year_range is not None:
+            old_start, old_end = self.year_range
+            start = old_start if start is None else start if old_start is None else max(start, old_start)
+            end = old_end if end is None else end if old_end is None else min(end, old_end)
+        return self._derive(year_range=(start, end))
+
+    def where_in(self, column, values):
+        '''
+            Keeps the rows whose value in the column belongs to the given set.
+        '''
+        filters = dict(self.category_filters)
+        values = set(values)
+        filters[column] = filters[column] & values if column in filters else values
+        return self._derive(category_filters=filters)
+
+    def select(self, *columns):
+        '''
+            Only materializes the given columns (the date column is always kept).
+        '''
+        return self._derive(columns=list(columns))
+
+    def astype(self, dtypes):
+        '''
+            Loads the columns with the given compact dtypes (see cast_columns).
+        '''
+        return self._derive(dtypes={**self.dtypes, **dtypes})
+
+    def daily_info(self):
+        '''
+            Ends the pipeline with the daily accident counts (see get_daily_info).
+        '''
+        return self._derive(daily=True)
+
+    def _needed_columns(self):
+        if self.columns is None:
+            return None
+        needed = [self.date_col] + [col for col in self.columns if col != self.date_col]
+        return needed + [col for col in self.category_filters if col not in needed]
+
+    def _filter(self, frame: pd.DataFrame):
+        '''
+            Applies the pushed-down filters on the raw, unparsed values.
+        '''
+        if frame.empty:
+            return frame
+        mask = pd.Series(True, index=frame.index)
+        for column, values in self.category_filters.items():
+            mask &= frame[column].isin(values)
+        if self.year_range is not None:
+            start, end = self.year_range
+            years = extract_years(frame[self.date_col])
+            if start is not None:
+                mask &= years >= start
+            if end is not None:
+                mask &= years <= end
+        # Rows whose year is missing do not match; take returns a frame of
+        # its own, which the casts may then modify
+        mask = mask.to_numpy(dtype=bool, na_value=False)
+        return frame if mask.all() else frame.take(np.flatnonzero(mask))
+
+    def collect(self):
+        '''
+            Runs the query and returns the resulting dataframe.
+        '''
+        from partitions import is_partitioned, read_partitions  # pylint: disable=import-outside-toplevel
+
+        needed = self._needed_columns()
+        if is_partitioned(self.source):
+            result = cast_columns(self._filter(read_partitions(self.source, needed)), self.dtypes)
+        elif isinstance(self.source, pd.DataFrame):
+            frame = self.source if needed is None else self.source[needed]
+            result = cast_columns(self._filter(frame).copy(), self.dtypes)
+        else:
+            chunks = pd.read_csv(self.source, usecols=needed, chunksize=self.chunksize)
+            # Only the rows left by the filters are cast
+            result = concat_chunks((cast_columns(self._filter(chunk), self.dtypes) for chunk in chunks),
+                                   needed or [self.date_col], self.dtypes)
+
+        result[self.date_col] = parse_dates(result[self.date_col], self.date_format)
+        if self.columns is not None:
+            result = result[[self.date_col] + [col for col in self.columns if col != self.date_col]]
+        if self.daily:
+            return get_daily_info(result, self.date_col)
+        return result
@@ -1,6 +1,10 @@
-import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 from dash import dcc
+from cache import cached
+from dataset import register_columns
+from figure_data import closed
+from kernel import aggregate, encode
 
 INJURY_TRANSLATIONS = {
     "injuries_no_indication": "Aucune blessure",
@@ -46,50 +50,45 @@ WEATHER_CONDITIONS = [
     "SNOW", 
 ]
 
-def prepare_radar_data(df):
-    df = df.copy()
-    df['lighting_condition'] = df['lighting_condition'].str.strip().str.upper()
-    df['weather_condition'] = df['weather_condition'].str.strip().str.upper()
-
-    lighting_conditions_upper = [c.upper() for c in LIGHTING_CONDITIONS]
-    weather_conditions_upper = [c.upper() for c in WEATHER_CONDITIONS]
-
-    df = df[df['lighting_condition'].isin(lighting_conditions_upper)]
-    df = df[df['weather_condition'].isin(weather_conditions_upper)]
+register_columns('radar', {
+    'lighting_condition': 'category',
+    'weather_condition': 'category',
+    **{col: 'uint16' if col == 'injuries_no_indication' else 'uint8' for col in INJURY_TRANSLATIONS},
+})
 
-    radar_data = df.groupby(['lighting_condition', 'weather_condition']).size().unstack(fill_value=0)
+@cached('radar')
+def prepare_radar_data(df):
+    '''
+        Sums the injury columns per lighting and weather condition in a single pass.
 
-    for condition in weather_conditions_upper:
-        if condition not in radar_data.columns:
-            radar_data[condition] = 0
+        Returns a (lighting, weather, injury) tensor following LIGHTING_CONDITIONS,
+        WEATHER_CONDITIONS and the injury columns present in the data. The last
+        weather slot gathers every other weather condition so that the overview
+        radar still accounts for all accidents.
+    '''
+    injury_cols = [col for col in INJURY_TRANSLATIONS if col in df.columns]
 
-    radar_data = radar_data[weather_conditions_upper]
-    return radar_data
+    # Normalizing the labels on the unique values is much cheaper than on every row
+    def normalize(value):
+        return str(value).strip().upper()
 
-def create_radar_charts(df):
-    df = df.copy()
-    df['lighting_condition'] = df['lighting_condition'].str.strip().str.upper()
-    df['weather_condition'] = df['weather_condition'].str.strip().str.upper()
+    tensor = aggregate([
+        encode(df['lighting_condition'], LIGHTING_CONDITIONS, normalize),
+        encode(df['weather_condition'], WEATHER_CONDITIONS, normalize, other='OTHER'),
+    ], [df[col] for col in injury_cols]).sums
+    return tensor, injury_cols
 
-    charts = []
+def create_radar_figures(df):
+    tensor, injury_cols = prepare_radar_data(df)
 
-    lighting_totals = df.groupby('lighting_condition').sum(numeric_only=True)
-    lighting_totals = lighting_totals.loc[[c for c in LIGHTING_CONDITIONS if c in lighting_totals.index]]
-    total_values = lighting_totals.sum(axis=1).tolist()
-    total_values.append(total_values[0])
-    translated_labels = [LIGHTING_TRANSLATIONS[c] for c in lighting_totals.index]
-    translated_labels.append(translated_labels[0])
+    figures = []
 
     fig_total = go.Figure()
     max_val = 0
 
-    for injury_col, injury_label in INJURY_TRANSLATIONS.items():
-        if injury_col not in df.columns:
-            continue
-
-        group = df.groupby('lighting_condition')[injury_col].sum().reindex(LIGHTING_CONDITIONS, fill_value=0)
-        values = group.tolist()
-        values.append(values[0])
+    for k, injury_col in enumerate(injury_cols):
+        injury_label = INJURY_TRANSLATIONS[injury_col]
+        values = closed(tensor[:, :, k].sum(axis=1))
         translated_labels = [LIGHTING_TRANSLATIONS.get(c, c) for c in LIGHTING_CONDITIONS]
         translated_labels.append(translated_labels[0])
 
@@ -108,7 +107,7 @@ def create_radar_charts(df):
             ),
         )
 
-        max_val = max(max_val, max(values[:-1]))
+        max_val = max(max_val, int(values[:-1].max()))
 
     fig_total.update_layout(
         title="Total des accidents par type d’éclairage et de blessure",
@@ -125,35 +124,15 @@ def create_radar_charts(df):
         ),
     )
 
-    charts.append(
-        dcc.Graph(
-            figure=fig_total,
-            config={
-                'displayModeBar': True,
-                'modeBarButtonsToRemove': [
-                    'pan2d', 'select2d', 'lasso2d', 'zoomIn2d', 'zoomOut2d',
-                    'autoScale2d', 'resetScale2d', 'hoverClosestCartesian', 'hoverCompareCartesian',
-                    'toggleSpikelines', 'toImage', 'sendDataToCloud'
-                ],
-                'modeBarButtonsToShow': [['zoom2d']],
-                'displaylogo': False
-            },
-            style={'height': '20rem', 'width': '65%'}
-        )
-    )
+    figures.append(fig_total)
 
     for i, lighting_condition in enumerate(LIGHTING_CONDITIONS):
         fig = go.Figure()
-        df_light = df[df['lighting_condition'] == lighting_condition]
-
         max_val = 0
 
-        for injury_col, injury_label in INJURY_TRANSLATIONS.items():
-            if injury_col not in df_light.columns:
-                continue
-            group = df_light.groupby('weather_condition')[injury_col].sum().reindex(WEATHER_CONDITIONS, fill_value=0)
-            values = group.tolist()
-            values.append(values[0])
+        for k, injury_col in enumerate(injury_cols):
+            injury_label = INJURY_TRANSLATIONS[injury_col]
+            values = closed(tensor[i, :len(WEATHER_CONDITIONS), k])
             translated_weather = [WEATHER_TRANSLATIONS[c] for c in WEATHER_CONDITIONS]
             translated_weather.append(translated_weather[0])
 
@@ -172,7 +151,7 @@ def create_radar_charts(df):
                 ),
             ),
 
-            max_val = max(max_val, max(values[:-1]))
+            max_val = max(max_val, int(values[:-1].max()))
 
         fig.update_layout(
             title=LIGHTING_TRANSLATIONS.get(lighting_condition, lighting_condition),
@@ -186,19 +165,38 @@ def create_radar_charts(df):
                 color="#031732",
             ),
         )
+        figures.append(fig)
+
+    return figures
+
+RADAR_GRAPH_CONFIG = {
+    'displayModeBar': True,
+    'modeBarButtonsToRemove': [
+        'pan2d', 'select2d', 'lasso2d', 'zoomIn2d', 'zoomOut2d',
+        'autoScale2d', 'resetScale2d', 'hoverClosestCartesian', 'hoverCompareCartesian',
+        'toggleSpikelines', 'toImage', 'sendDataToCloud'
+    ],
+    'modeBarButtonsToShow': [['zoom2d']],
+    'displaylogo': False
+}
+
+def create_radar_charts(df=None, figures=None):
+    if figures is None:
+        figures = create_radar_figures(df)
+
+    charts = [
+        dcc.Graph(
+            id='radar-chart-0',
+            figure=figures[0],
+            config=RADAR_GRAPH_CONFIG,
+            style={'height': '20rem', 'width': '65%'}
+        )
+    ]
+    for i, fig in enumerate(figures[1:], start=1):
         charts.append(dcc.Graph(
+            id=f'radar-chart-{i}',
             figure=fig, 
-            config={
-                'displayModeBar': True,
-                'modeBarButtonsToRemove': [
-                    'pan2d', 'select2d', 'lasso2d', 'zoomIn2d', 'zoomOut2d',
-                    'autoScale2d', 'resetScale2d', 'hoverClosestCartesian', 'hoverCompareCartesian',
-                    'toggleSpikelines', 'toImage', 'sendDataToCloud'
-                ],
-                'modeBarButtonsToShow': [['zoom2d']],
-                'displaylogo': False
-            },
+            config=RADAR_GRAPH_CONFIG,
             style={'height': '20rem', 'width': '40%'}
         ))
-
     return charts
\ No newline at end of file
@@ -0,0 +1,154 @@
+'''
+    Série quotidienne des accidents avec zoom sur une plage de dates.
+
+    Le nombre d'accidents par jour est calculé une seule fois, avec ses sommes
+    cumulées pour obtenir le total de n'importe quelle plage en O(1). La série
+    affichée est réduite par Largest-Triangle-Three-Buckets (LTTB) à un nombre
+    fixe de points pour la fenêtre visible.
+'''
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from dataset import register_columns
+from figure_data import epoch_ms
+
+MAX_POINTS = 1000
+LINE_COLOR = '#1f77b4'
+
+register_columns('daily_rollup', {'crash_date': None})
+
+
+def build_daily_rollup(df):
+    '''
+        Compte les accidents de chaque jour de la période (0 pour les jours sans
+        accident) et calcule leurs sommes cumulées.
+    '''
+    days = df['crash_date'].dropna().to_numpy().astype('datetime64[D]')
+    start = days.min()
+    counts = np.bincount((days - start).astype(np.int64))
+    return {
+        'dates': start + np.arange(len(counts)),
+        'counts': counts,
+        'prefix': np.concatenate([[0], np.cumsum(counts)]),
+    }
+
+
+def get_day_bounds(rollup, start=None, end=None):
+    '''
+        Convertit une plage de dates (inclusive) en positions dans la série quotidienne.
+    '''
+    first, last = 0, len(rollup['counts'])
+    if start is not None:
+        first = int((np.datetime64(pd.Timestamp(start), 'D') - rollup['dates'][0]).astype(np.int64))
+    if end is not None:
+        last = int((np.datetime64(pd.Timestamp(end), 'D') - rollup['dates'][0]).astype(np.int64)) + 1
+    first = min(max(first, 0), len(rollup['counts']))
+    return first, min(max(last, first), len(rollup['counts']))
+
+
+def range_total(rollup, start=None, end=None):
+    '''
+        Nombre total d'accidents entre deux dates (incluses), en temps constant.
+    '''
+    first, last = get_day_bounds(rollup, start, end)
+    return int(rollup['prefix'][last] - rollup['prefix'][first])
+
+
+def lttb(y, threshold):
+    '''
+        Retourne les positions des points conservés par Largest-Triangle-Three-Buckets.
+    '''
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    x = np.arange(n, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[next_lo:next_hi].mean() if next_hi > next_lo else x[-1]
+        next_y = y[next_lo:next_hi].mean() if next_hi > next_lo else y[-1]
+        area = np.abs((x[previous] - next_x) * (y[lo:hi] - y[previous])
+                      - (x[previous] - x[lo:hi]) * (next_y - y[previous]))
+        previous = lo + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def get_window_points(rollup, start=None, end=None, max_points=MAX_POINTS):
+    '''
+        Points à afficher pour la fenêtre visible : la fenêtre est réduite à
+        max_points points et le reste de la série à un aperçu grossier, pour
+        que le curseur de plage garde toute la période.
+    '''
+    first, last = get_day_bounds(rollup, start, end)
+    counts = rollup['counts']
+    overview = lttb(counts, max_points // 4)
+    window = first + lttb(counts[first:last], max_points)
+    positions = np.concatenate([overview[overview < first], window, overview[overview >= last]])
+    return rollup['dates'][positions], counts[positions]
+
+
+def create_daily_series(rollup, start=None, end=None, max_points=MAX_POINTS):
+    '''
+        Crée la série quotidienne des accidents pour la fenêtre demandée.
+    '''
+    dates, counts = get_window_points(rollup, start, end, max_points)
+    total = range_total(rollup, start, end)
+
+    fig = go.Figure(
+        go.Scatter(
+            x=epoch_ms(dates),
+            y=counts,
+            mode='lines',
+            name='Par jour',
+            line=dict(width=1, color=LINE_COLOR),
+            hovertemplate='<b>%{x|%d/%m/%Y}</b><br>%{y} accidents<extra></extra>',
+            hoverlabel=dict(bgcolor=LINE_COLOR, font=dict(color='white', family="Lato, sans-serif")),
+        )
+    )
+
+    fig.update_layout(
+        title=dict(text=f'{total:,} accidents dans la période affichée'.replace(',', ' '), x=0.5),
+        height=450,
+        width=900,
+        showlegend=False,
+        uirevision='daily-series',
+        margin=dict(l=50, r=50, t=50, b=50),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(
+            family="Lato, sans-serif",
+            size=12,
+            color="#031732",
+        ),
+        xaxis=dict(
+            title_text='Date',
+            rangeslider=dict(visible=True),
+            type='date',
+        ),
+        yaxis=dict(title_text="Nombre d'accidents"),
+    )
+    if start is not None and end is not None:
+        fig.update_xaxes(range=[start, end])
+
+    return fig
+
+
+def get_relayout_range(relayout_data):
+    '''
+        Extrait la plage visible d'un événement relayout de Plotly (None si dézoomé).
+    '''
+    if not relayout_data or relayout_data.get('xaxis.autorange'):
+        return None, None
+    if 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'][:2])
+    if 'xaxis.range[0]' in relayout_data:
+        return relayout_data['xaxis.range[0]'], relayout_data.get('xaxis.range[1]')
+    return None, None
@@ -1,11 +1,20 @@
-import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from dash import Patch
+from cache import cached
+from dataset import as_dataset, register_columns
+from figure_data import typed_array
+from kernel import aggregate, encode
 
 day_names_full = {1: 'Lundi', 2: 'Mardi', 3: 'Mercredi', 4: 'Jeudi', 5: 'Vendredi', 6: 'Samedi', 7: 'Dimanche'}
 month_names_full = {1: 'Janvier', 2: 'Février', 3: 'Mars', 4: 'Avril', 5: 'Mai', 6: 'Juin',
                     7: 'Juillet', 8: 'Août', 9: 'Septembre', 10: 'Octobre', 11: 'Novembre', 12: 'Décembre'}
 
+register_columns('temporal', {'crash_date': None})
+
+TITLE = 'Séries temporelles des accidents de la route'
+
 line_colors = {
     'Par heure': '#1f77b4',
     'Par jour': '#2ca02c',
@@ -13,21 +22,75 @@ line_colors = {
     'Par année': '#d62728',
 }
 
-def create_temporal_series(df):
-    df['crash_date'] = pd.to_datetime(df['crash_date'])
-    df['year'] = df['crash_date'].dt.year
-    df['month'] = df['crash_date'].dt.month
-    df['day'] = df['crash_date'].dt.day
-    df['hour'] = df['crash_date'].dt.hour
-    df['day_of_week'] = df['crash_date'].dt.dayofweek + 1
+@cached('temporal')
+def get_count_matrices(df, years=None):
+    '''
+        Counts the accidents per year and hour, weekday and month in one pass.
+
+        The rows are counted into a single (year, hour, weekday, month) cube
+        by the aggregation kernel; every matrix is a marginal of that cube.
+        years fixes the rows of the matrices (by default, the years of the data).
+    '''
+    df = as_dataset(df)
+    if years is None:
+        available_years = np.sort(df['year'].dropna().unique()).astype(int)
+    else:
+        available_years = np.asarray(years, dtype=int)
+    cube = aggregate([
+        encode(df['year'], available_years),
+        encode(df['hour'], range(24)),
+        encode(df['day_of_week'], range(1, 8)),
+        encode(df['month'], range(1, 13)),
+    ]).counts
+
+    by_hour = cube.sum(axis=(2, 3))
+    return {
+        'years': available_years.tolist(),
+        'hour': by_hour,
+        'weekday': cube.sum(axis=(1, 3)),
+        'month': cube.sum(axis=(1, 2)),
+        'total': by_hour.sum(axis=1),
+    }
+
+def get_series(counts, year=None):
+    '''
+        Returns the y values of the figure's traces: the accidents per hour,
+        weekday and month of one year (all years by default), then per year.
+    '''
+    if year is None:
+        rows = [counts[key].sum(axis=0) for key in ['hour', 'weekday', 'month']]
+    else:
+        i = counts['years'].index(year)
+        rows = [counts[key][i] for key in ['hour', 'weekday', 'month']]
+    return rows + [counts['total']]
+
+
+def get_title(year=None):
+    '''
+        Title of the figure for a year (all years by default).
+    '''
+    return f"{TITLE} - {'Toutes les années' if year is None else year}"
+
+
+def patch_temporal_series(df, years, year=None):
+    '''
+        Updates the y values of the series (and the title) in place, for the
+        rows of df and the given year. years are the years of the figure.
+    '''
+    patch = Patch()
+    for i, values in enumerate(get_series(get_count_matrices(df, tuple(years)), year)):
+        patch['data'][i]['y'] = typed_array(values)
+    patch['layout']['title']['text'] = get_title(year)
+    return patch
 
+
+def create_temporal_series(df):
     day_names = {1: 'Lun', 2: 'Mar', 3: 'Mer', 4: 'Jeu', 5: 'Ven', 6: 'Sam', 7: 'Dim'}
-    df['day_name'] = df['day_of_week'].map(day_names)
     month_names = {1: 'Jan', 2: 'Fév', 3: 'Mar', 4: 'Avr', 5: 'Mai', 6: 'Juin',
                    7: 'Juil', 8: 'Août', 9: 'Sep', 10: 'Oct', 11: 'Nov', 12: 'Déc'}
-    df['month_name'] = df['month'].map(month_names)
 
-    available_years = sorted(df['year'].unique())
+    counts = get_count_matrices(df)
+    available_years = counts['years']
 
     fig = make_subplots(
         rows=2, cols=2,
@@ -38,143 +101,58 @@ def create_temporal_series(df):
         horizontal_spacing=0.08
     )
 
-    buttons = []
+    hour_y, weekday_y, month_y, total_y = get_series(counts)
 
-    hour_counts_all = df.groupby('hour').size()
     fig.add_trace(
         go.Scatter(
-            x=list(range(24)),
-            y=[hour_counts_all.get(hour, 0) for hour in range(24)],
+            x=np.arange(24),
+            y=hour_y,
             mode='lines+markers',
-            name='Par heure (toutes années)',
+            name='Par heure',
             line=dict(width=2, color=line_colors['Par heure']),
             hovertemplate='<b>%{x}h</b><br>%{y} accidents<extra></extra>',
             hoverlabel=dict(bgcolor=line_colors['Par heure'], font=dict(color='white', family="Lato, sans-serif")),
-            visible=True
         ),
         row=1, col=1
     )
 
-    day_counts_all = df['day_of_week'].value_counts().sort_index()
     fig.add_trace(
         go.Scatter(
             x=[day_names[d] for d in day_names.keys()],
-            y=[day_counts_all.get(d, 0) for d in day_names.keys()],
+            y=weekday_y,
             mode='lines+markers',
-            name='Par jour (toutes années)',
+            name='Par jour',
             line=dict(width=2, color=line_colors['Par jour']),
             customdata=[[day_names_full[d]] for d in day_names.keys()],
             hovertemplate='<b>%{customdata[0]}</b><br>%{y} accidents<extra></extra>',
             hoverlabel=dict(bgcolor=line_colors['Par jour'], font=dict(color='white', family="Lato, sans-serif")),
-            visible=True
         ),
         row=1, col=2
     )
 
-    month_counts_all = df['month'].value_counts().sort_index()
     fig.add_trace(
         go.Scatter(
             x=[month_names[m] for m in month_names.keys()],
-            y=[month_counts_all.get(m, 0) for m in month_names.keys()],
+            y=month_y,
             mode='lines+markers',
-            name='Par mois (toutes années)',
+            name='Par mois',
             line=dict(width=2, color=line_colors['Par mois']),
             customdata=[[month_names_full[m]] for m in month_names.keys()],
             hovertemplate='<b>%{customdata[0]}</b><br>%{y} accidents<extra></extra>',
             hoverlabel=dict(bgcolor=line_colors['Par mois'], font=dict(color='white', family="Lato, sans-serif")),
-            visible=True
         ),
         row=2, col=1
     )
 
-    nb_years = len(available_years)
-    visibility_all_years = [True, True, True] + [False] * (nb_years * 3) + [True]
-    buttons.insert(0, dict(
-        method='update',
-        args=[
-            {'visible': visibility_all_years},
-            {'title': "Séries temporelles des accidents de la route - Toutes les années"}
-        ],
-        label="Toutes les années"
-    ))
-
-    for i, year in enumerate(available_years):
-        year_data = df[df['year'] == year]
-        visible = False
-
-        hour_counts = year_data.groupby('hour').size()
-        fig.add_trace(
-            go.Scatter(
-                x=list(range(24)),
-                y=[hour_counts.get(hour, 0) for hour in range(24)],
-                mode='lines+markers',
-                name=f'Par heure ({year})',
-                line=dict(width=2, color=line_colors['Par heure']),
-                hovertemplate='<b>%{x}h</b><br>%{y} accidents<extra></extra>',
-                hoverlabel=dict(bgcolor=line_colors['Par heure'], font=dict(color='white', family="Lato, sans-serif")),
-                visible=visible
-            ),
-            row=1, col=1
-        )
-
-        day_counts = year_data['day_of_week'].value_counts().sort_index()
-        days = list(day_names.keys())
-        days_short = [day_names[d] for d in days]
-        days_full = [day_names_full[d] for d in days]
-        fig.add_trace(
-            go.Scatter(
-                x=days_short,
-                y=[day_counts.get(d, 0) for d in days],
-                mode='lines+markers',
-                name=f'Par jour ({year})',
-                line=dict(width=2, color=line_colors['Par jour']),
-                customdata=[[d] for d in days_full],
-                hovertemplate='<b>%{customdata[0]}</b><br>%{y} accidents<extra></extra>',
-                hoverlabel=dict(bgcolor=line_colors['Par jour'], font=dict(color='white', family="Lato, sans-serif")),
-                visible=visible
-            ),
-            row=1, col=2
-        )
-
-        month_counts = year_data['month'].value_counts().sort_index()
-        months = list(month_names.keys())
-        months_short = [month_names[m] for m in months]
-        months_full = [month_names_full[m] for m in months]
-        fig.add_trace(
-            go.Scatter(
-                x=months_short,
-                y=[month_counts.get(m, 0) for m in months],
-                mode='lines+markers',
-                name=f'Par mois ({year})',
-                line=dict(width=2, color=line_colors['Par mois']),
-                customdata=[[m] for m in months_full],
-                hovertemplate='<b>%{customdata[0]}</b><br>%{y} accidents<extra></extra>',
-                hoverlabel=dict(bgcolor=line_colors['Par mois'], font=dict(color='white', family="Lato, sans-serif")),
-                visible=visible
-            ),
-            row=2, col=1
-        )
-
-        visibility = [False, False, False] + [False] * (len(available_years) * 3)
-        visibility[3 + i*3 : 3 + (i+1)*3] = [True, True, True]
-        buttons.append(dict(
-            method='update',
-            args=[{'visible': visibility + [True]},
-                  {'title': f'Séries temporelles des accidents de la route - {year}'}],
-            label=str(year)
-        ))
-
-    year_counts = df['year'].value_counts().sort_index()
     fig.add_trace(
         go.Scatter(
-            x=year_counts.index,
-            y=year_counts.values,
+            x=np.asarray(available_years),
+            y=total_y,
             mode='lines+markers',
             name='Par année',
             line=dict(width=2, color=line_colors['Par année']),
             hovertemplate='<b>%{x}</b><br>%{y} accidents<extra></extra>',
             hoverlabel=dict(bgcolor=line_colors['Par année'], font=dict(color='white', family="Lato, sans-serif")),
-            visible=True
         ),
         row=2, col=2
     )
@@ -196,24 +174,8 @@ def create_temporal_series(df):
             size=12,
             color="#031732",
         ),
-        updatemenus=[dict(
-            buttons=buttons,
-            direction="down",
-            showactive=True,
-            x=0.55,  
-            xanchor="right",
-            y=1.1,
-            yanchor="top",
-            bgcolor="white",
-            bordercolor="lightgrey",
-            borderwidth=1,
-            font=dict(
-                family="Lato, sans-serif",
-            ),
-        )]
     )
 
-
     fig.update_xaxes(title_text="Heure", row=1, col=1)
     fig.update_yaxes(title_text="Nombre d'accidents", row=1, col=1)
     fig.update_xaxes(title_text="Jour de la semaine", row=1, col=2)
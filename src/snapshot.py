@@ -0,0 +1,148 @@
+'''
+    Immutable snapshots of the dataset and everything built from it.
+
+    The dashboard always reads the current snapshot through current(). A
+    reload builds a complete new snapshot in the background and then swaps
+    the reference in one assignment: requests already running keep the
+    snapshot they started with, new ones get the new data.
+'''
+import os
+import signal
+import threading
+import time
+from collections import namedtuple
+
+from builder import ROW_INDEXED, build_figures
+from cache import fingerprint_file, get_figure_cache_key, load_figures, save_figures
+from dataset import Dataset, get_required_columns
+from partitions import get_source_info, ingest
+
+Snapshot = namedtuple('Snapshot', ['version', 'source', 'dataset', 'figures', 'loaded_at'])
+
+# Seconds between two checks of the CSV file (0 disables the watcher)
+WATCH_INTERVAL = float(os.environ.get('DATA_WATCH_INTERVAL', 30))
+RELOAD_SIGNAL = getattr(signal, 'SIGUSR2', None)
+
+_current = None
+_reload_lock = threading.Lock()
+_status = {'reloading': False, 'last_error': None, 'reloads': 0}
+
+
+def load_snapshot(csv_path):
+    '''
+        Loads the dataset and its figures (from the disk cache when valid).
+        The aggregates indexed by row position are always built from the
+        loaded frame.
+    '''
+    source = get_source_info(csv_path)
+    version = fingerprint_file(csv_path)
+    dataset = Dataset(ingest(csv_path, version=version, columns=get_required_columns()))
+
+    figure_cache_key = get_figure_cache_key(version)
+    figures = load_figures(figure_cache_key)
+    if figures is None:
+        figures = build_figures(dataset)
+        save_figures(figure_cache_key, {name: figure for name, figure in figures.items() if name not in ROW_INDEXED})
+    else:
+        figures.update(build_figures(dataset, ROW_INDEXED))
+    return Snapshot(version, source, dataset, figures, time.time())
+
+
+def current():
+    '''
+        Returns the snapshot to use for the whole duration of a request.
+    '''
+    return _current
+
+
+def get_status():
+    '''
+        Describes the current snapshot and the state of the reloads.
+    '''
+    snapshot = _current
+    return dict(
+        _status,
+        version=snapshot.version if snapshot else None,
+        loaded_at=snapshot.loaded_at if snapshot else None,
+        rows=len(snapshot.dataset) if snapshot else 0,
+    )
+
+
+def initialize(csv_path):
+    '''
+        Loads the first snapshot synchronously.
+    '''
+    global _current
+    _current = load_snapshot(csv_path)
+    return _current
+
+
+def reload(csv_path, background=True):
+    '''
+        Builds a new snapshot and swaps it in. Returns False if a reload is
+        already running, in which case this one is skipped.
+    '''
+    if not _reload_lock.acquire(blocking=False):
+        return False
+
+    def run():
+        global _current
+        _status['reloading'] = True
+        try:
+            snapshot = load_snapshot(csv_path)
+            if _current is None or snapshot.version != _current.version:
+                _current = snapshot
+                _status['reloads'] += 1
+            else:
+                # Same content (e.g. only touched): keep the snapshot but track the new source
+                _current = _current._replace(source=snapshot.source)
+            _status['last_error'] = None
+        except Exception as error:  # pylint: disable=broad-except
+            # A broken file must not take the dashboard down: keep serving the old snapshot
+            _status['last_error'] = repr(error)
+        finally:
+            _status['reloading'] = False
+            _reload_lock.release()
+
+    if background:
+        threading.Thread(target=run, name='snapshot-reload', daemon=True).start()
+    else:
+        run()
+    return True
+
+
+def watch(csv_path, interval=WATCH_INTERVAL):
+    '''
+        Starts a daemon thread reloading the snapshot when the CSV file changes.
+    '''
+    if interval <= 0:
+        return None
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                source = get_source_info(csv_path)
+            except OSError:
+                continue
+            snapshot = _current
+            if snapshot is not None and source != snapshot.source:
+                reload(csv_path, background=False)
+
+    thread = threading.Thread(target=run, name='snapshot-watcher', daemon=True)
+    thread.start()
+    return thread
+
+
+def install_signal_handler(csv_path, signal_number=RELOAD_SIGNAL):
+    '''
+        Reloads the snapshot in the background when the process receives the signal.
+    '''
+    if signal_number is None:
+        return False
+    try:
+        signal.signal(signal_number, lambda *_: reload(csv_path))
+    except ValueError:
+        # Signal handlers can only be installed from the main thread
+        return False
+    return True
@@ -0,0 +1,195 @@
+'''
+    Fingerprinted static assets, cached by browsers for good.
+
+    The build (python static_assets.py) copies the assets to the dist folder
+    under names holding the hash of their content, rewrites the url()
+    references of the stylesheets to those names, gzips the text assets and
+    writes a manifest mapping each asset to its fingerprinted name. When the
+    manifest exists, the app serves the dist folder instead of assets/ and
+    the fingerprinted files are sent with an immutable, one year cache
+    lifetime (gzipped when the browser accepts it): as a new content gets a
+    new name, browsers never need to revalidate them.
+
+    Without a build, the app serves assets/ as is, with Flask's defaults.
+'''
+import functools
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+import sys
+
+from flask import request, send_file
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+DIST_DIR = os.environ.get('ASSETS_DIST_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dist'))
+MANIFEST = 'manifest.json'
+
+# Assets copied to the dist folder (the data files are not assets)
+ASSET_EXTENSIONS = {'.css', '.js', '.woff', '.woff2', '.jpg', '.png', '.svg', '.ico'}
+# Assets worth compressing; fonts and images already are
+TEXT_EXTENSIONS = {'.css', '.js', '.svg'}
+# Dash looks the favicon up by its name
+UNHASHED = {'favicon.ico'}
+
+CACHE_MAX_AGE = 365 * 24 * 3600
+
+# Fonts the page needs at once, preloaded by the index page
+PRELOADED_FONTS = [
+    'fonts/roboto/roboto-v20-latin-regular.woff2',
+    'fonts/roboto-slab/roboto-slab-v12-latin-regular.woff2',
+]
+
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def fingerprint(path, content):
+    '''
+        Name of an asset holding the hash of its content, e.g. style.0123456789ab.css.
+    '''
+    if posixpath.basename(path) in UNHASHED:
+        return path
+    root, extension = posixpath.splitext(path)
+    return f'{root}.{hashlib.sha256(content).hexdigest()[:12]}{extension}'
+
+
+def rewrite_css(css, css_path, manifest):
+    '''
+        Points the relative url() references of a stylesheet to the
+        fingerprinted assets.
+    '''
+    def replace(match):
+        quote, url = match.groups()
+        if re.match(r'^([a-z]+:|/|#)', url):
+            return match.group(0)
+        base = posixpath.dirname(css_path)
+        target = posixpath.normpath(posixpath.join(base, url))
+        if target not in manifest:
+            return match.group(0)
+        return f'url({quote}{posixpath.relpath(manifest[target], base or ".")}{quote})'
+    return CSS_URL.sub(replace, css)
+
+
+def list_assets(source_dir=SOURCE_DIR):
+    '''
+        Paths of the assets to build, relative to source_dir with forward
+        slashes. Stylesheets come last, as they refer to the other assets.
+    '''
+    paths = []
+    for current, _, files in os.walk(source_dir):
+        for name in files:
+            if os.path.splitext(name)[1] in ASSET_EXTENSIONS:
+                relative = os.path.relpath(os.path.join(current, name), source_dir)
+                paths.append(relative.replace(os.sep, '/'))
+    return sorted(paths, key=lambda path: (path.endswith('.css'), path))
+
+
+def build(source_dir=SOURCE_DIR, dist_dir=DIST_DIR):
+    '''
+        Builds the fingerprinted assets and their manifest in dist_dir
+        (replaced) and returns the manifest.
+    '''
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    manifest = {}
+    for path in list_assets(source_dir):
+        with open(os.path.join(source_dir, path), 'rb') as asset_file:
+            content = asset_file.read()
+        if path.endswith('.css'):
+            content = rewrite_css(content.decode('utf-8'), path, manifest).encode('utf-8')
+        manifest[path] = fingerprint(path, content)
+
+        target = os.path.join(dist_dir, manifest[path])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as asset_file:
+            asset_file.write(content)
+        if posixpath.splitext(path)[1] in TEXT_EXTENSIONS:
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+            if len(compressed) < len(content):
+                with open(f'{target}.gz', 'wb') as asset_file:
+                    asset_file.write(compressed)
+
+    with open(os.path.join(dist_dir, MANIFEST), 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    return manifest
+
+
+@functools.lru_cache(maxsize=None)
+def load_manifest(dist_dir=DIST_DIR):
+    '''
+        Manifest of the built assets, or an empty dict without a build.
+    '''
+    try:
+        with open(os.path.join(dist_dir, MANIFEST), encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_assets_folder():
+    '''
+        Folder the app serves its assets from: the build if there is one.
+    '''
+    return DIST_DIR if load_manifest() else SOURCE_DIR
+
+
+def get_asset_path(path, dist_dir=DIST_DIR):
+    '''
+        Path of an asset in the served folder: its fingerprinted name, or
+        the path itself when it was not built.
+    '''
+    return load_manifest(dist_dir).get(path, path)
+
+
+def get_preload_links(asset_url):
+    '''
+        Preload hints of the fonts, for the index page. asset_url turns an
+        asset path into its URL (e.g. app.get_asset_url).
+    '''
+    return '\n'.join(
+        f'<link rel="preload" href="{asset_url(get_asset_path(path))}" as="font" type="font/woff2" crossorigin>'
+        for path in PRELOADED_FONTS
+    )
+
+
+def install(server, url_path='/assets/', dist_dir=DIST_DIR):
+    '''
+        Serves the fingerprinted assets with immutable cache headers, and
+        their gzipped version to the browsers accepting it.
+    '''
+    fingerprinted = {name for path, name in load_manifest(dist_dir).items() if name != path}
+    if not fingerprinted:
+        return
+
+    @server.before_request
+    def serve_fingerprinted_asset():
+        if not request.path.startswith(url_path):
+            return None
+        name = request.path[len(url_path):]
+        if name not in fingerprinted:
+            return None
+
+        path = os.path.join(dist_dir, name)
+        compressed = f'{path}.gz'
+        if 'gzip' in request.accept_encodings and os.path.exists(compressed):
+            response = send_file(compressed, mimetype=mimetypes.guess_type(name)[0], max_age=CACHE_MAX_AGE)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = send_file(path, max_age=CACHE_MAX_AGE)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+def main():
+    manifest = build()
+    print(f'{len(manifest)} assets built in {os.path.relpath(DIST_DIR)}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,15 @@
 '''
     Contains the template to use in the data visualization.
+
+    The cached figures hold no theme: a theme is applied to a serialized
+    figure when it is sent to the page (see apply_theme). Switching themes
+    therefore only restyles the figures, without rebuilding them.
 '''
+import functools
+
 import plotly.graph_objects as go
 import plotly.io as pio
+from dash import Patch
 
 THEME = {
     'background_color': '#ffffff',
@@ -13,36 +20,180 @@ THEME = {
     'line_chart_color': 'black',
     'label_font_size': 14,
     'label_background_color': '#ffffff',
-    'colorscale': 'Bluyl'
+    'colorscale': 'Bluyl',
+    # Set on the figures over the styling of the charts
+    'text_color': '#031732',
+    'figure_background': 'rgba(0,0,0,0)',
 }
 
-def create_custom_theme():
+THEMES = {
+    'default': THEME,
+    'dark': {
+        **THEME,
+        'background_color': '#1E1F24',
+        'dark_color': '#E4E4E7',
+        'pale_color': '#3A3B42',
+        'line_chart_color': '#E4E4E7',
+        'label_background_color': '#2A2B2E',
+        'colorscale': 'Viridis',
+        'text_color': '#E4E4E7',
+        'grid_color': '#3A3B42',
+    },
+    'high_contrast': {
+        **THEME,
+        'background_color': '#000000',
+        'dark_color': '#ffffff',
+        'pale_color': '#ffffff',
+        'line_chart_color': '#ffffff',
+        'label_font_size': 16,
+        'label_background_color': '#000000',
+        'colorscale': 'Cividis',
+        'text_color': '#ffffff',
+        'grid_color': '#808080',
+    },
+}
+DEFAULT_THEME = 'default'
+
+THEME_LABELS = {
+    'default': 'Clair',
+    'dark': 'Sombre',
+    'high_contrast': 'Contraste élevé',
+}
+
+def create_custom_theme(theme=THEME, name='custom_theme'):
     template = go.layout.Template()
     template.layout = go.Layout(
-        font=dict(family=THEME['font_family'], color=THEME['dark_color']),
-        paper_bgcolor=THEME['background_color'],
-        plot_bgcolor=THEME['background_color'],
+        font=dict(family=theme['font_family'], color=theme['dark_color']),
+        paper_bgcolor=theme['background_color'],
+        plot_bgcolor=theme['background_color'],
         hoverlabel=dict(
             font=dict(
-                family=THEME['font_family'],
-                color=THEME['dark_color'],
-                size=THEME['label_font_size']
+                family=theme['font_family'],
+                color=theme['dark_color'],
+                size=theme['label_font_size']
             ),
-            bgcolor=THEME['label_background_color']
+            bgcolor=theme['label_background_color']
         ),
         hovermode='closest',
         xaxis=dict(tickangle=45),
         coloraxis_colorbar=dict(
-            title=dict(font=dict(family=THEME['font_family'], color=THEME['dark_color']))
+            title=dict(font=dict(family=theme['font_family'], color=theme['dark_color']))
         )
     )
-    template.data.scatter = [go.Scatter(line=dict(color=THEME['line_chart_color']))]
-    template.layout.colorscale.sequential = THEME['colorscale']
-    pio.templates['custom_theme'] = template
-    return template 
+    if 'grid_color' in theme:
+        # The default theme keeps Plotly's axes, which suit a light background
+        for axis in [template.layout.xaxis, template.layout.yaxis]:
+            axis.update(gridcolor=theme['grid_color'], linecolor=theme['grid_color'], zerolinecolor=theme['grid_color'])
+        template.layout.polar = dict(
+            bgcolor=theme['figure_background'],
+            angularaxis=dict(gridcolor=theme['grid_color'], linecolor=theme['grid_color']),
+            radialaxis=dict(gridcolor=theme['grid_color'], linecolor=theme['grid_color']),
+        )
+    template.data.scatter = [go.Scatter(line=dict(color=theme['line_chart_color']))]
+    template.layout.colorscale.sequential = theme['colorscale']
+    if name is not None:
+        pio.templates[name] = template
+    return template
 
 def set_default_theme():
     combined_template = pio.templates['plotly_white']
     pio.templates['custom_theme'] = combined_template
     pio.templates['custom_theme'].layout = create_custom_theme().layout
-    pio.templates.default = 'custom_theme'
\ No newline at end of file
+    pio.templates.default = 'custom_theme'
+
+@functools.lru_cache(maxsize=None)
+def get_theme_template(theme_name):
+    '''
+        Serialized template of a theme.
+    '''
+    return create_custom_theme(THEMES[theme_name], name=None).to_plotly_json()
+
+def _paths(properties, prefix=()):
+    for key, value in properties.items():
+        if isinstance(value, dict):
+            yield from _paths(value, prefix + (key,))
+        elif prefix or key != 'type':
+            yield prefix + (key,), value
+
+@functools.lru_cache(maxsize=None)
+def get_theme_trace_defaults(theme_name):
+    '''
+        Trace properties a theme sets, as {trace type: {path: value}}.
+    '''
+    return {
+        trace_type: dict(_paths(entries[0]))
+        for trace_type, entries in get_theme_template(theme_name)['data'].items()
+    }
+
+# Trace properties set by the themes, which compactor.py leaves on the traces
+# so that the figure templates never hold them (see get_theme_patch)
+THEMED_TRACE_PROPERTIES = {
+    trace_type: set(properties) for trace_type, properties in get_theme_trace_defaults(DEFAULT_THEME).items()
+}
+
+def get_theme_layout(theme_name):
+    '''
+        Layout values a theme sets on the figures, over the styling of the charts.
+    '''
+    theme = THEMES[theme_name]
+    return {
+        'font': {'color': theme['text_color']},
+        'paper_bgcolor': theme['figure_background'],
+        'plot_bgcolor': theme['figure_background'],
+    }
+
+def _merge(base, override):
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            value = _merge(merged[key], value)
+        merged[key] = value
+    return merged
+
+def apply_theme(figure, theme_name=DEFAULT_THEME):
+    '''
+        Returns a copy of a serialized figure styled by a theme; other values
+        are returned unchanged. The figure itself is not modified, so cached
+        figures can be shared by all the themes.
+
+        The trace defaults of the theme are merged with those of the
+        figure's own template (see compactor.py), which never sets the
+        properties of THEMED_TRACE_PROPERTIES: switching themes therefore
+        only has to update those and the layout (see get_theme_patch).
+    '''
+    if isinstance(figure, list):
+        return [apply_theme(item, theme_name) for item in figure]
+    if not isinstance(figure, dict) or 'data' not in figure:
+        return figure
+    layout = figure.get('layout', {})
+    template = layout.get('template', {})
+    template_data = get_theme_template(theme_name)['data']
+    for trace_type, traces in template.get('data', {}).items():
+        template_data = {**template_data, trace_type: [_merge(template_data.get(trace_type, [{}])[0], traces[0])]}
+    return {
+        **figure,
+        'layout': {
+            **_merge(layout, get_theme_layout(theme_name)),
+            'template': {'data': template_data, 'layout': get_theme_template(theme_name)['layout']},
+        },
+    }
+
+def get_theme_patch(theme_name):
+    '''
+        Restyles a figure already on the page with another theme.
+    '''
+    patch = Patch()
+    patch['layout']['template']['layout'] = get_theme_template(theme_name)['layout']
+    for trace_type, properties in get_theme_trace_defaults(theme_name).items():
+        for path, value in properties.items():
+            target = patch['layout']['template']['data'][trace_type][0]
+            for key in path[:-1]:
+                target = target[key]
+            target[path[-1]] = value
+    for key, value in get_theme_layout(theme_name).items():
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                patch['layout'][key][sub_key] = sub_value
+        else:
+            patch['layout'][key] = value
+    return patch
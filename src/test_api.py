@@ -0,0 +1,129 @@
+'''
+    Tests of the aggregate query API against pandas groupbys of the dataset.
+'''
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow
+import pytest
+from flask import Flask
+
+import api
+
+
+@pytest.fixture
+def client(current_snapshot):
+    server = Flask(__name__)
+    server.register_blueprint(api.blueprint)
+    return server.test_client()
+
+
+def get_columns(dataset, columns):
+    return pd.DataFrame({column: dataset[column] for column in columns})
+
+
+def matching(dataset, filters):
+    mask = np.ones(len(dataset), dtype=bool)
+    for column, values in filters.items():
+        mask &= dataset[column].isin(values).to_numpy()
+    return mask
+
+
+def test_aggregate_matches_groupby(client, current_snapshot):
+    dataset = current_snapshot.dataset
+    filters = {'weather_condition': ['RAIN'], 'month': [1, 2, 3]}
+
+    response = client.get('/api/aggregate', query_string={
+        'dims': 'year,hour', 'measures': 'count,injuries_fatal,injuries_no_indication',
+        'filters': json.dumps(filters)})
+
+    assert response.status_code == 200
+    actual = pd.DataFrame(response.get_json()['data']).set_index(['year', 'hour'])
+    rows = get_columns(dataset, ['year', 'hour', 'injuries_fatal', 'injuries_no_indication'])[matching(dataset, filters)]
+    expected = rows.dropna().astype({'year': int, 'hour': int}).groupby(['year', 'hour']).agg(
+        count=('injuries_fatal', 'size'), injuries_fatal=('injuries_fatal', 'sum'),
+        injuries_no_indication=('injuries_no_indication', 'sum'))
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_aggregate_without_dimensions_counts_every_row(client, current_snapshot):
+    response = client.post('/api/aggregate', json={'measures': ['count', 'injuries_incapacitating']})
+
+    assert response.get_json()['data'] == [{
+        'count': len(current_snapshot.dataset),
+        'injuries_incapacitating': int(current_snapshot.dataset['injuries_incapacitating'].sum()),
+    }]
+
+
+def test_aggregate_csv_matches_json(client):
+    query = {'dims': 'day_type,injury_type', 'measures': 'count,injuries_fatal'}
+
+    data = client.get('/api/aggregate', query_string=query).get_json()['data']
+    response = client.get('/api/aggregate', query_string={**query, 'format': 'csv'})
+
+    assert response.mimetype == 'text/csv'
+    pd.testing.assert_frame_equal(pd.read_csv(io.StringIO(response.get_data(as_text=True))), pd.DataFrame(data))
+
+
+def test_rows_export_matches_the_filtered_dataset(client, current_snapshot, monkeypatch):
+    monkeypatch.setattr(api, 'CSV_CHUNK_ROWS', 7)
+    dataset = current_snapshot.dataset
+    filters = {'year': [2019], 'roadway_surface_cond': ['WET']}
+
+    response = client.post('/api/rows', json={'filters': filters})
+
+    assert response.status_code == 200
+    expected = dataset.frame[matching(dataset, filters)]
+    assert len(expected) > 7
+    assert response.get_data(as_text=True) == expected.to_csv(index=False)
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'json': [1]},
+    {'json': {'filters': {'year': {'a': 1}}}},
+    {'json': {'filters': {'year': [[1]]}}},
+    {'json': {'dims': [1]}},
+    {'json': {'format': ['csv']}},
+    {'query_string': {'dims': 'year,year'}},
+    {'query_string': {'dims': 'unknown'}},
+    {'query_string': {'measures': 'unknown'}},
+    {'query_string': {'filters': '{bad'}},
+    {'query_string': [('dims', 'year'), ('dims', 'year')]},
+    {'query_string': [('format', 'csv'), ('format', 'json')]},
+])
+def test_malformed_queries_are_rejected(client, kwargs):
+    for path in ['/api/aggregate', '/api/rows']:
+        response = client.post(path, **kwargs) if 'json' in kwargs else client.get(path, **kwargs)
+        assert response.status_code == 400, (path, kwargs)
+        assert 'error' in response.get_json()
+
+
+def test_repeated_dimensions_are_all_grouped_by(client):
+    query = [('dims', 'year'), ('dims', 'lighting_condition'), ('measures', 'count'), ('measures', 'injuries_fatal')]
+
+    repeated = client.get('/api/aggregate', query_string=query).get_json()
+    joined = client.get('/api/aggregate', query_string={'dims': 'year,lighting_condition',
+                                                        'measures': 'count,injuries_fatal'}).get_json()
+
+    assert repeated['dims'] == ['year', 'lighting_condition']
+    assert repeated['data'] == joined['data']
+
+
+def test_arrow_needs_pyarrow(client, monkeypatch):
+    monkeypatch.setattr(api, 'pa', None)
+
+    response = client.get('/api/aggregate', query_string={'dims': 'hour', 'format': 'arrow'})
+
+    assert response.status_code == 501
+
+
+def test_arrow_matches_json(client):
+    query = {'dims': 'year,lighting_condition', 'measures': 'count,injuries_fatal'}
+
+    data = client.get('/api/aggregate', query_string=query).get_json()['data']
+    response = client.get('/api/aggregate', query_string={**query, 'format': 'arrow'})
+
+    table = pyarrow.ipc.open_stream(response.get_data()).read_all()
+    assert table.to_pylist() == data
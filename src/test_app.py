@@ -0,0 +1,92 @@
+'''
+    Tests of the dashboard callbacks, on the app loaded with the synthetic accidents.
+'''
+import functools
+import importlib
+import json
+
+import pytest
+
+import cache
+import partitions
+import snapshot
+from conftest import make_accidents
+from preprocess import DATE_FORMAT
+
+
+@pytest.fixture(scope='module')
+def dash_app(tmp_path_factory):
+    '''
+        The app module, serving the accidents of a CSV file of its own.
+    '''
+    root = tmp_path_factory.mktemp('app')
+    accidents = make_accidents()
+    csv_path = root / 'traffic_accidents.csv'
+    accidents.assign(crash_date=accidents['crash_date'].dt.strftime(DATE_FORMAT)).to_csv(csv_path, index=False)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('ACCIDENTS_CSV', str(csv_path))
+        patch.setattr(snapshot, 'ingest', functools.partial(partitions.ingest, root=str(root / 'partitions')))
+        patch.setattr(snapshot, 'load_figures', functools.partial(cache.load_figures, cache_dir=str(root / 'figures')))
+        patch.setattr(snapshot, 'save_figures', functools.partial(cache.save_figures, cache_dir=str(root / 'figures')))
+        app = importlib.import_module('app')
+        yield app
+
+
+def call(dash_app, output, inputs, state):
+    '''
+        Runs a callback as the page does; returns its outputs, or None when
+        it does not update anything.
+    '''
+    outputs = [dict(zip(['id', 'property'], item.split('.'))) for item in output.strip('.').split('...')]
+    response = dash_app.server.test_client().post('/_dash-update-component', json={
+        'output': output, 'outputs': outputs, 'inputs': inputs, 'state': state,
+        'changedPropIds': [f"{inputs[0]['id']}.{inputs[0]['property']}"],
+    })
+    if response.status_code == 204:
+        return None
+    assert response.status_code == 200
+    return json.loads(response.data)['response']
+
+
+def find_graphs(component):
+    if getattr(component, 'figure', None) is not None and getattr(component, 'id', None):
+        yield component.id, component.figure
+    children = getattr(component, 'children', None)
+    for child in children if isinstance(children, list) else [children]:
+        if child is not None and not isinstance(child, str):
+            yield from find_graphs(child)
+
+
+def test_lazy_sections_are_sent_with_placeholders(dash_app):
+    figures = dict(find_graphs(dash_app.serve_layout()))
+
+    lazy_graphs = [graph for graphs in dash_app.LAZY_SECTIONS.values() for graph in graphs]
+    assert lazy_graphs
+    assert all(figures[graph] == dash_app.PLACEHOLDER_FIGURE for graph in lazy_graphs)
+    assert figures['temporal-series'] != dash_app.PLACEHOLDER_FIGURE
+
+
+def test_sections_load_the_snapshot_figures_once(dash_app):
+    snap = snapshot.current()
+
+    for section, graphs in dash_app.LAZY_SECTIONS.items():
+        loaded_id = dash_app.get_loaded_id(section)
+        key = next(key for key in dash_app.app.callback_map if key.startswith(f'..{loaded_id}.data'))
+
+        def load(visible, loaded, key=key, loaded_id=loaded_id):
+            return call(dash_app, key, [{'id': 'visible-sections', 'property': 'data', 'value': visible}],
+                        [{'id': loaded_id, 'property': 'data', 'value': loaded},
+                         {'id': 'theme', 'property': 'value', 'value': 'dark'}])
+
+        response = load([section], False)
+        assert response[loaded_id]['data'] is True
+        expected = dash_app.apply_theme(dash_app.get_section_figures(snap, graphs), 'dark')
+        assert [response[graph]['figure'] for graph in graphs] == json.loads(json.dumps(expected))
+        for graph, figure in zip(graphs, expected):
+            chart = dash_app.GRAPH_CHARTS.get(graph)
+            if chart is not None:
+                built = snap.figures[chart]
+                built = built[dash_app.CHART_GRAPHS[chart].index(graph)] if isinstance(built, list) else built
+                assert figure['data'] == built['data']
+        assert load([section], True) is None
+        assert load(['other-section'], False) is None
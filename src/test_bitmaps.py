@@ -0,0 +1,49 @@
+'''
+    Tests of the packed bitmap indexes against pandas boolean masks.
+'''
+import numpy as np
+import pandas as pd
+
+from bitmaps import BitmapIndex
+
+
+def make_index(n_rows=1003, seed=2):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'year': rng.integers(2015, 2020, n_rows),
+        'weather': rng.choice(['clear', 'CLEAR ', 'rain', None], n_rows),
+    })
+    index = BitmapIndex(n_rows)
+    index.add_column('year', frame['year'])
+    index.add_column('weather', frame['weather'], lambda value: value.strip().upper())
+    normalized = frame['weather'].str.strip().str.upper()
+    return index, frame.assign(weather=normalized)
+
+
+def test_select_matches_boolean_masks():
+    index, frame = make_index()
+
+    for filters in [{}, {'year': [2016]}, {'year': [2016, 2018], 'weather': ['RAIN']}, {'weather': ['FOG']}]:
+        mask = np.ones(len(frame), dtype=bool)
+        for column, values in filters.items():
+            mask &= frame[column].isin(values).to_numpy()
+        np.testing.assert_array_equal(index.rows(filters), np.flatnonzero(mask))
+        assert index.count(filters) == mask.sum()
+
+
+def test_normalized_values_share_a_bitmap():
+    index, frame = make_index()
+
+    assert sorted(index.get_values('weather')) == ['CLEAR', 'RAIN']
+    assert index.count({'weather': ['CLEAR']}) == (frame['weather'] == 'CLEAR').sum()
+
+
+def test_codes_follow_the_indexed_values():
+    index, frame = make_index()
+
+    codes = index.codes('weather')
+    labels = np.asarray(index.get_values('weather') + [None], dtype=object)
+
+    assert codes.shape == (len(frame),)
+    assert list(labels[codes]) == [None if pd.isna(value) else value for value in frame['weather']]
+    np.testing.assert_array_equal(np.asarray(index.get_values('year'))[index.codes('year')], frame['year'])
@@ -0,0 +1,57 @@
+'''
+    Tests of the trimmed plotly.js bundle build (without Node.js).
+'''
+import hashlib
+
+import build_plotly
+import builder
+from build_plotly import TRACE_TYPES, write_bundle, write_entry
+from serie_quotidienne import create_daily_series
+from treemap2 import create_treemap
+
+
+def get_trace_types(figure):
+    if isinstance(figure, list):
+        return set().union(*map(get_trace_types, figure))
+    if isinstance(figure, dict) and 'data' in figure:
+        return {trace.get('type', 'scatter') for trace in figure['data']}
+    return set()
+
+
+def test_bundle_holds_every_trace_type_of_the_charts(accidents):
+    figures = builder.build_figures(accidents, executor='serial')
+    figures['treemap'] = builder.serialize(create_treemap(figures['treemap_rollups']))
+    figures['daily_series'] = builder.serialize(create_daily_series(figures['daily_rollup']))
+
+    used = set().union(*map(get_trace_types, figures.values()))
+
+    assert {'bar', 'pie', 'scatter', 'scatterpolar', 'treemap', 'heatmap'} <= used
+    # scatter is part of the plotly.js core
+    assert used - {'scatter'} <= set(TRACE_TYPES)
+
+
+def test_entry_registers_the_trace_types(tmp_path):
+    with open(write_entry(str(tmp_path)), encoding='utf-8') as entry_file:
+        entry = entry_file.read()
+
+    assert "require('plotly.js/lib/core')" in entry
+    assert all(f"require('plotly.js/lib/{trace_type}')" in entry for trace_type in TRACE_TYPES)
+
+
+def test_bundles_are_fingerprinted_and_replaced(tmp_path):
+    (tmp_path / 'plotly-3.0.0-000000000000.min.js').write_text('old')
+    (tmp_path / 'style.css').write_text('body {}')
+
+    path = write_bundle(b'new bundle', '3.0.0', str(tmp_path))
+
+    assert path == str(tmp_path / f"plotly-3.0.0-{hashlib.sha256(b'new bundle').hexdigest()[:12]}.min.js")
+    assert sorted(item.name for item in tmp_path.iterdir()) == sorted([path.rsplit('/', 1)[1], 'style.css'])
+    assert write_bundle(b'new bundle', '3.0.0', str(tmp_path)) == path
+
+
+def test_nothing_is_built_without_npm(monkeypatch, capsys):
+    monkeypatch.setattr(build_plotly.shutil, 'which', lambda name: None)
+    monkeypatch.setattr(build_plotly, 'bundle', None)
+
+    assert build_plotly.main() == 0
+    assert 'full plotly.js bundle' in capsys.readouterr().err
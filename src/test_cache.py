@@ -0,0 +1,54 @@
+'''
+    Tests of the result cache: LRU eviction within a byte budget, and TTL.
+'''
+import numpy as np
+
+import cache
+from cache import ResultCache
+
+
+def block(n_bytes):
+    return np.zeros(n_bytes, dtype=np.uint8)
+
+
+def test_least_recently_used_entries_are_evicted_first():
+    result_cache = ResultCache(max_bytes=300)
+    for key in 'abc':
+        result_cache.put(key, block(100))
+    assert result_cache.get('a')[0]
+
+    result_cache.put('d', block(100))
+
+    assert [result_cache.get(key)[0] for key in 'abcd'] == [True, False, True, True]
+    stats = result_cache.stats()
+    assert stats['bytes'] == 300 and stats['entries'] == 3 and stats['evictions'] == 1
+
+
+def test_values_larger_than_the_budget_are_not_cached():
+    result_cache = ResultCache(max_bytes=100)
+    result_cache.put('small', block(60))
+    result_cache.put('large', block(101))
+
+    assert result_cache.get('large') == (False, None)
+    assert result_cache.get('small')[0]
+
+
+def test_replacing_an_entry_updates_the_size():
+    result_cache = ResultCache(max_bytes=1000)
+    result_cache.put('a', block(400))
+    result_cache.put('a', block(100))
+
+    assert result_cache.stats()['bytes'] == 100
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    result_cache = ResultCache(ttl=10)
+    result_cache.put('a', 1)
+
+    now[0] += 9
+    assert result_cache.get('a') == (True, 1)
+    now[0] += 2
+    assert result_cache.get('a') == (False, None)
+    assert result_cache.stats()['entries'] == 0
@@ -0,0 +1,61 @@
+'''
+    Tests of the calendar table and of the holiday rules against pandas dates.
+'''
+import numpy as np
+import pandas as pd
+
+from calendrier import (HOLIDAY, MONDAY, THURSDAY, WEEKEND, build_calendar, fixed, match_days, nth_weekday,
+                        weekday_before)
+
+YEARS = np.arange(1990, 2041)
+
+
+def as_dates(days):
+    return list(pd.to_datetime(days).date)
+
+
+def reference_nth_weekday(year, month, weekday, n):
+    days = pd.date_range(f'{year}-{month:02d}-01', periods=pd.Period(f'{year}-{month:02d}').days_in_month)
+    return days[days.dayofweek == weekday][n - 1 if n > 0 else n].date()
+
+
+def test_nth_weekday_matches_pandas():
+    for month, weekday, n in [(1, MONDAY, 3), (5, MONDAY, -1), (9, MONDAY, 1), (11, THURSDAY, 4), (2, 6, 4)]:
+        assert as_dates(nth_weekday(month, weekday, n)(YEARS)) == [
+            reference_nth_weekday(year, month, weekday, n) for year in YEARS]
+
+
+def test_known_holidays():
+    assert as_dates(nth_weekday(11, THURSDAY, 4)([2019])) == [pd.Timestamp('2019-11-28').date()]
+    assert as_dates(nth_weekday(5, MONDAY, -1)([2021])) == [pd.Timestamp('2021-05-31').date()]
+    victoria_days = weekday_before(5, 25, MONDAY)([2019, 2020, 2022])
+    assert as_dates(victoria_days) == as_dates(['2019-05-20', '2020-05-18', '2022-05-23'])
+
+
+def test_weekday_before_matches_pandas():
+    for month, day, weekday in [(5, 25, MONDAY), (3, 1, 4), (12, 7, 6)]:
+        expected = []
+        for year in YEARS:
+            days = pd.date_range(end=pd.Timestamp(year, month, day) - pd.Timedelta(days=1), periods=7)
+            expected.append(days[days.dayofweek == weekday][-1].date())
+        assert as_dates(weekday_before(month, day, weekday)(YEARS)) == expected
+
+
+def test_calendar_types_match_pandas():
+    calendar = build_calendar(2016, 2020, [fixed(1, 1), fixed(12, 25)])
+    days = pd.date_range('2016-01-01', '2020-12-31')
+    holidays = (days.month == 1) & (days.day == 1) | (days.month == 12) & (days.day == 25)
+
+    assert len(calendar['date']) == len(days)
+    np.testing.assert_array_equal(calendar['year'], days.year)
+    np.testing.assert_array_equal(calendar['type'] == HOLIDAY, holidays)
+    np.testing.assert_array_equal(calendar['type'] == WEEKEND, ~holidays & (days.dayofweek >= 5))
+
+
+def test_match_days_selects_months_and_weekdays():
+    calendar = build_calendar(2018, 2019)
+    days = pd.date_range('2018-01-01', '2019-12-31')
+
+    np.testing.assert_array_equal(match_days(calendar, [2, 3], [1, 7]),
+                                  days.month.isin([2, 3]) & days.dayofweek.isin([0, 6]))
+    assert match_days(calendar).all()
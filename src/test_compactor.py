@@ -0,0 +1,92 @@
+'''
+    Tests that compacting a figure leaves the resolved trace properties unchanged.
+'''
+import copy
+import json
+
+from compactor import HOVER_PROPERTIES, NOT_TEMPLATED, TRACE_DEFAULTS, _has_points, _leaves, compact_figure
+from conftest import make_accidents
+from pie_and_bar import plot_dimension_vs_injury
+from radar_chart2 import create_radar_figures
+
+
+def resolve(figure):
+    '''
+        Resolves the scalar properties of every trace as Plotly does: the
+        trace's own value, else the one of the template entry of its type
+        (cycled through by the traces of that type), else the default.
+    '''
+    templates = figure['layout'].get('template', {}).get('data', {})
+    seen = {}
+    resolved = []
+    for trace in figure['data']:
+        trace_type = trace.get('type', 'scatter')
+        entries = templates.get(trace_type) or [{}]
+        entry = entries[seen.get(trace_type, 0) % len(entries)]
+        seen[trace_type] = seen.get(trace_type, 0) + 1
+
+        properties = {(key,): value for key, value in TRACE_DEFAULTS.items()}
+        properties.update((path, value) for path, value in _leaves(entry)
+                          if path[0] not in NOT_TEMPLATED and path != ('type',))
+        properties.update(_leaves(trace))
+        if not _has_points(trace):
+            # Traces without points are never hovered
+            properties = {path: value for path, value in properties.items() if path[0] not in HOVER_PROPERTIES}
+        resolved.append({str(path): (type(value), value) for path, value in properties.items()})
+    return resolved
+
+
+def assert_compaction_keeps_the_properties(figure):
+    compacted = compact_figure(copy.deepcopy(figure))
+
+    assert resolve(compacted) == resolve(figure)
+    assert len(json.dumps(compacted)) <= len(json.dumps(figure))
+    return compacted
+
+
+def test_mixed_traces_with_overrides():
+    font = {'color': 'white', 'family': 'Lato, sans-serif'}
+    figure = {
+        'data': [
+            {'type': 'bar', 'y': [1], 'marker': {'color': 'red'}, 'hoverlabel': {'font': dict(font)}, 'opacity': 1},
+            {'type': 'bar', 'y': [2], 'marker': {'color': 'red'}, 'hoverlabel': {'font': dict(font)}, 'visible': True},
+            {'type': 'bar', 'y': [3], 'marker': {'color': 'blue'}, 'hoverlabel': {'font': dict(font)}, 'opacity': 0.5},
+            {'type': 'scatter', 'y': [1, 2], 'line': {'width': 1}, 'mode': 'lines', 'xaxis': 'x'},
+            {'type': 'scatter', 'y': [3, 4], 'line': {'width': 2}, 'mode': 'lines', 'xaxis': 'x2'},
+            {'type': 'scatter', 'y': [5, 6], 'line': {'width': 2}, 'mode': 'markers', 'showlegend': True},
+            {'type': 'pie', 'values': [1, 2], 'labels': ['a', 'b'], 'hole': 0.3},
+        ],
+        'layout': {'template': {'data': {'scatter': [{'type': 'scatter', 'mode': 'markers'}],
+                                         'bar': [{'type': 'bar', 'opacity': 0.5}]}}},
+    }
+
+    compacted = assert_compaction_keeps_the_properties(figure)
+
+    # The shared values moved to the template, the overrides stayed on their trace
+    assert compacted['layout']['template']['data']['bar'][0]['marker'] == {'color': 'red'}
+    assert compacted['data'][2]['marker'] == {'color': 'blue'}
+    assert 'hoverlabel' not in compacted['data'][0]
+    assert compacted['data'][0]['opacity'] == 1
+    assert compacted['data'][5]['mode'] == 'markers'
+
+
+def test_several_template_entries_are_left_alone():
+    figure = {
+        'data': [{'type': 'bar', 'y': [i], 'marker': {'color': 'red'}} for i in range(3)],
+        'layout': {'template': {'data': {'bar': [{'marker': {'color': 'blue'}}, {'marker': {'color': 'green'}}]}}},
+    }
+
+    compacted = assert_compaction_keeps_the_properties(figure)
+
+    assert all(trace['marker'] == {'color': 'red'} for trace in compacted['data'])
+
+
+def test_built_figures_keep_their_properties():
+    frame = make_accidents()
+    figures = [plot_dimension_vs_injury(frame, 'roadway_surface_cond'), *create_radar_figures(frame)]
+
+    for figure in figures:
+        serialized = json.loads(figure.to_json())
+        assert_compaction_keeps_the_properties(serialized)
+        serialized['layout'].pop('template')
+        assert_compaction_keeps_the_properties(serialized)
@@ -0,0 +1,42 @@
+'''
+    Tests of the cross-filter index and of the day-type rates under cross-filters.
+'''
+import numpy as np
+import pandas as pd
+
+from crossfilter import build_filter_index
+from dataset import Dataset
+from histogramme_type_jour import get_day_type_data, get_rates
+
+
+def test_rows_without_date_get_no_date_codes(accidents):
+    index = build_filter_index(accidents)
+
+    assert index.count({}) == len(accidents)
+    for column in ['year', 'day_type']:
+        indexed = sum(index.count({column: [value]}) for value in index.get_values(column))
+        assert indexed == len(accidents) - 2
+    assert all(isinstance(year, int) for year in index.get_values('year'))
+
+    rows = index.rows({'year': [2019], 'month': [3]})
+    expected = np.flatnonzero((accidents['crash_date'].dt.year == 2019) & (accidents['crash_date'].dt.month == 3))
+    np.testing.assert_array_equal(rows, expected)
+
+
+def test_weekday_filter_only_counts_matching_days(accidents):
+    dataset = Dataset(accidents)
+    filters = {'day_of_week': [1]}
+    rows = build_filter_index(accidents).rows(filters)
+
+    rates, _ = get_rates(get_day_type_data(dataset.take(rows, filters)), 2018)
+
+    days = pd.date_range('2018-01-01', '2018-12-31')
+    mondays = days[days.dayofweek == 0]
+    holidays = mondays.isin(pd.to_datetime(['2018-01-01', '2018-12-25']))
+    dates = accidents['crash_date'].dropna()
+    mondays_2018 = dates[(dates.dt.year == 2018) & (dates.dt.dayofweek == 0)].dt.normalize()
+    on_holiday = mondays_2018.isin(pd.to_datetime(['2018-01-01', '2018-12-25']))
+
+    assert rates[0] == (~on_holiday).sum() / (~holidays).sum()
+    assert rates[1] == 0
+    assert rates[2] == on_holiday.sum() / holidays.sum()
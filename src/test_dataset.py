@@ -0,0 +1,45 @@
+'''
+    Tests of the dataset loaded with the columns and dtypes the charts declare.
+'''
+import base64
+
+import numpy as np
+import pandas as pd
+
+import builder
+from dataset import get_required_columns
+from partitions import ingest
+from preprocess import DATE_FORMAT
+
+
+def as_values(result):
+    # Plain values of a built result, the typed arrays decoded
+    if isinstance(result, dict) and {'dtype', 'bdata'} <= set(result):
+        return np.frombuffer(base64.b64decode(result['bdata']), dtype=result['dtype']).tolist()
+    if isinstance(result, dict):
+        return {key: as_values(value) for key, value in result.items()}
+    if isinstance(result, (list, tuple)):
+        return [as_values(value) for value in result]
+    if isinstance(result, pd.Series):
+        return as_values(result.to_dict())
+    if isinstance(result, np.ndarray):
+        return result.tolist()
+    return result
+
+
+def test_compact_columns_give_the_same_figures(tmp_path, accidents_csv):
+    columns = get_required_columns()
+    compact = ingest(accidents_csv, str(tmp_path / 'partitions'), version='test-compact-columns', columns=columns)
+    plain = pd.read_csv(accidents_csv)
+    plain['crash_date'] = pd.to_datetime(plain['crash_date'], format=DATE_FORMAT)
+
+    assert list(compact.columns) == list(columns)
+    assert {column: str(compact[column].dtype) for column, dtype in columns.items() if dtype} == \
+        {column: dtype for column, dtype in columns.items() if dtype}
+    names = [name for name in builder.BUILDERS if name not in builder.ROW_INDEXED]
+    assert as_values(builder.build_figures(compact, names, executor='serial')) == \
+        as_values(builder.build_figures(plain, names, executor='serial'))
+
+    compact_index, plain_index = (builder.BUILDERS['filter_index'](frame) for frame in [compact, plain])
+    for filters in [{}, {'year': [2019]}, {'weather_condition': ['RAIN'], 'hour': [8, 9, 17]}]:
+        np.testing.assert_array_equal(compact_index.rows(filters), plain_index.rows(filters))
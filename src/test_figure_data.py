@@ -0,0 +1,50 @@
+'''
+    Tests of the typed arrays sent as figure data.
+'''
+import base64
+
+import numpy as np
+import pandas as pd
+
+from builder import serialize
+from figure_data import closed, epoch_ms, typed_array
+from serie_quotidienne import build_daily_rollup, create_daily_series
+from serie_temporelle import create_temporal_series
+
+
+def decode(spec):
+    return np.frombuffer(base64.b64decode(spec['bdata']), dtype=spec['dtype'])
+
+
+def test_typed_arrays_round_trip():
+    for values in [np.arange(300, dtype=np.int64), np.array([0.1, 2.5, -3.0]), np.array([7], dtype=np.uint8)]:
+        spec = typed_array(values)
+        assert set(spec) >= {'dtype', 'bdata'}
+        np.testing.assert_array_equal(decode(spec), values)
+    # Integers are sent in the smallest type holding them
+    assert typed_array(np.arange(300, dtype=np.int64))['dtype'] == 'i2'
+    assert closed(np.array([1, 2, 3])).tolist() == [1, 2, 3, 1]
+
+
+def test_epoch_ms_gives_the_dates():
+    dates = pd.to_datetime(['1969-12-31 00:00', '2019-03-01 12:30', '2021-02-28 00:00']).to_numpy()
+
+    millis = epoch_ms(dates)
+
+    assert millis.dtype == np.float64
+    np.testing.assert_array_equal(pd.to_datetime(millis, unit='ms').to_numpy(), dates)
+
+
+def test_serialized_figures_hold_the_list_values(accidents):
+    temporal = serialize(create_temporal_series(accidents))
+    dates = accidents['crash_date'].dropna()
+
+    hours = temporal['data'][0]['y']
+    assert set(hours) >= {'dtype', 'bdata'}
+    assert decode(hours).tolist() == dates.dt.hour.value_counts().reindex(range(24), fill_value=0).tolist()
+
+    rollup = build_daily_rollup(accidents)
+    daily = serialize(create_daily_series(rollup))['data'][0]
+    days = dates.dt.normalize().value_counts()
+    x = pd.to_datetime(decode(daily['x']), unit='ms')
+    assert dict(zip(x, decode(daily['y']).tolist())) == days.reindex(x, fill_value=0).to_dict()
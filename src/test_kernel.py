@@ -0,0 +1,70 @@
+'''
+    Tests of the bincount aggregation kernel against pandas groupby.
+'''
+import numpy as np
+import pandas as pd
+
+import kernel
+from kernel import aggregate, encode, to_frame
+
+
+def make_rows(n_rows=5000, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'hour': rng.integers(0, 24, n_rows),
+        'weather': pd.Categorical(rng.choice(['CLEAR', 'RAIN', 'SNOW'], n_rows)),
+        'surface': rng.choice(['dry ', 'WET', 'Ice', None], n_rows),
+        'injuries': rng.integers(0, 5, n_rows),
+        'weight': rng.random(n_rows),
+    })
+
+
+def expected_groups(frame, keys, values):
+    frame = frame.astype({key: object for key in keys})
+    return frame.dropna(subset=keys).groupby(keys).agg(
+        count=(values[0], 'size'), **{value: (value, 'sum') for value in values})
+
+
+def test_counts_and_sums_match_groupby():
+    frame = make_rows()
+    keys = [encode(frame['hour']), encode(frame['weather']), encode(frame['surface'])]
+    result = aggregate(keys, [frame['injuries'], frame['weight']])
+
+    actual = to_frame(result.counts, keys, ['hour', 'weather', 'surface'], result.sums, ['injuries', 'weight'])
+    expected = expected_groups(frame, ['hour', 'weather', 'surface'], ['injuries', 'weight'])
+
+    pd.testing.assert_frame_equal(actual[['count', 'injuries']], expected[['count', 'injuries']],
+                                  check_dtype=False, check_index_type=False)
+    np.testing.assert_allclose(actual['weight'], expected['weight'])
+    assert result.sums.dtype == np.float64
+
+
+def test_integer_sums_stay_integers():
+    frame = make_rows()
+    result = aggregate([encode(frame['hour'])], [frame['injuries']])
+
+    key = encode(frame['hour'])
+    assert result.sums.dtype == np.int64
+    np.testing.assert_array_equal(result.sums[:, 0], frame.groupby('hour')['injuries'].sum()[key.labels].to_numpy())
+
+
+def test_threaded_chunks_give_the_same_result(monkeypatch):
+    frame = make_rows(n_rows=10_001)
+    keys = [encode(frame['hour']), encode(frame['surface'])]
+    serial = aggregate(keys, [frame['weight']], threads=1)
+
+    monkeypatch.setattr(kernel, 'MIN_CHUNK_ROWS', 1000)
+    threaded = aggregate(keys, [frame['weight']], threads=4)
+
+    np.testing.assert_array_equal(threaded.counts, serial.counts)
+    np.testing.assert_allclose(threaded.sums, serial.sums)
+
+
+def test_encode_normalizes_and_folds_unknown_values():
+    values = pd.Series(['dry ', 'WET', 'Ice', None, 'fog'])
+
+    key = encode(values, labels=['DRY', 'WET', 'ICE'], normalize=lambda value: value.strip().upper(), other='OTHER')
+
+    assert key.labels == ['DRY', 'WET', 'ICE', 'OTHER']
+    np.testing.assert_array_equal(key.codes, [0, 1, 2, -1, 3])
+    np.testing.assert_array_equal(encode(values, labels=['DRY', 'WET'], normalize=str.upper).codes, [-1, 1, -1, -1, -1])
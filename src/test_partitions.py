@@ -0,0 +1,59 @@
+'''
+    Tests of the year-partitioned storage of the accident data.
+'''
+import os
+
+import pandas as pd
+
+from partitions import ingest
+from preprocess import Query
+
+CSV = '''crash_date,weather_condition,injuries_fatal
+07/04/2019 10:00:00 AM,RAIN,0
+01/02/2016 08:30:00 PM,CLEAR,1
+,CLEAR,0
+12/31/2019 11:59:00 PM,SNOW,2
+03/15/2016 07:00:00 AM,RAIN,0
+'''
+
+
+def write_csv(tmp_path):
+    path = tmp_path / 'accidents.csv'
+    path.write_text(CSV, encoding='utf-8')
+    return str(path)
+
+
+def test_ingest_gives_the_same_frame_on_every_boot(tmp_path):
+    csv_path = write_csv(tmp_path)
+    root = str(tmp_path / 'partitions')
+    columns = {'crash_date': None, 'weather_condition': 'category', 'injuries_fatal': 'uint8'}
+
+    cold = ingest(csv_path, root, columns=columns)
+    warm = ingest(csv_path, root, columns=columns)
+
+    assert len(cold) == 5 and cold['crash_date'].isna().sum() == 1
+    pd.testing.assert_frame_equal(cold, warm)
+    assert cold.attrs == warm.attrs
+
+
+def test_corrupt_partitions_are_read_again_from_the_csv(tmp_path):
+    csv_path = write_csv(tmp_path)
+    root = str(tmp_path / 'partitions')
+    cold = ingest(csv_path, root)
+    with open(os.path.join(root, 'year=2019.pkl'), 'wb') as partition:
+        partition.write(b'truncated')
+
+    pd.testing.assert_frame_equal(ingest(csv_path, root), cold)
+    pd.testing.assert_frame_equal(ingest(csv_path, root), cold)
+    assert not [name for name in os.listdir(root) if name.endswith('.tmp')]
+
+
+def test_year_queries_skip_the_undated_rows(tmp_path):
+    csv_path = write_csv(tmp_path)
+    root = str(tmp_path / 'partitions')
+    ingest(csv_path, root)
+
+    frame = Query(root).years(2016, 2016).collect()
+
+    assert frame['crash_date'].dt.year.tolist() == [2016, 2016]
+    assert frame['crash_date'].is_monotonic_increasing
@@ -0,0 +1,69 @@
+'''
+    Tests that the patches of the cross-filtered charts set the values of a
+    full rebuild of the figures.
+'''
+import base64
+
+import numpy as np
+
+from builder import serialize
+from heatmap import get_figure as get_heatmap_figure, patch_heatmap
+from histogramme_type_jour import create_day_type_histogram, patch_day_type_histogram
+from serie_temporelle import create_temporal_series, get_count_matrices, patch_temporal_series
+
+
+def as_values(value):
+    if isinstance(value, dict) and {'dtype', 'bdata'} <= set(value):
+        return np.frombuffer(base64.b64decode(value['bdata']), dtype=value['dtype']).tolist()
+    return value
+
+
+def get_patched_values(patch):
+    '''
+        Maps the location of every value a patch assigns to the value.
+    '''
+    values = {}
+    for operation in patch.to_plotly_json()['operations']:
+        assert operation['operation'] == 'Assign'
+        values[tuple(operation['location'])] = as_values(operation['params']['value'])
+    return values
+
+
+def get_value(figure, location):
+    for key in location:
+        figure = figure[key]
+    return as_values(figure)
+
+
+def assert_patch_matches(patch, rebuilt, ignored=()):
+    values = get_patched_values(patch)
+    assert values
+    for location in ignored:
+        values.pop(location)
+    for location, value in values.items():
+        assert value == get_value(rebuilt, location), location
+
+
+def test_patches_match_the_rebuilt_figures(accidents):
+    subset = accidents[accidents['weather_condition'] == 'RAIN']
+
+    years = get_count_matrices(accidents)['years']
+    # The title follows the year, as the year buttons of the figure set it
+    assert_patch_matches(patch_temporal_series(subset, years), serialize(create_temporal_series(subset)),
+                         ignored=[('layout', 'title', 'text')])
+    assert_patch_matches(patch_day_type_histogram(subset), serialize(create_day_type_histogram(subset)))
+    assert_patch_matches(patch_heatmap(subset), serialize(get_heatmap_figure(subset)))
+
+
+def test_year_patches_match_the_rebuilt_year(accidents):
+    subset = accidents[accidents['weather_condition'] == 'RAIN']
+    in_2019 = subset[subset['crash_date'].dt.year == 2019]
+
+    assert get_patched_values(patch_day_type_histogram(subset, 2019)) == \
+        get_patched_values(patch_day_type_histogram(in_2019, 2019))
+
+    temporal = get_patched_values(patch_temporal_series(subset, [2018, 2019], 2019))
+    rebuilt = serialize(create_temporal_series(in_2019))
+    for trace in range(3):
+        assert temporal[('data', trace, 'y')] == get_value(rebuilt, ('data', trace, 'y'))
+    assert temporal[('layout', 'title', 'text')].endswith('2019')
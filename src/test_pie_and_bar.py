@@ -0,0 +1,74 @@
+'''
+    Tests of the pie/bar figures against per-dimension pandas aggregates.
+'''
+import base64
+
+import numpy as np
+import pandas as pd
+
+import builder
+import pie_and_bar
+from cache import tag_frame
+from conftest import make_accidents
+from dataset import Dataset
+from pie_and_bar import (INJURY_COLS, get_category_totals, patch_dimension_vs_injury, plot_dimension_vs_injury,
+                         prepare_category_data, translate_categories)
+
+
+def test_figures_match_per_dimension_aggregates():
+    frame = make_accidents()
+    rng = np.random.default_rng(2)
+    # Rare road conditions are folded under OTHERS
+    frame['roadway_surface_cond'] = pd.Categorical(rng.choice(['DRY', 'WET', 'ICE', 'SNOW OR SLUSH'], len(frame)))
+
+    for column in ['roadway_surface_cond', 'intersection_related_i']:
+        fig = plot_dimension_vs_injury(frame, column)
+
+        folded = frame[column].astype(str).replace({'ICE': 'OTHERS', 'SNOW OR SLUSH': 'OTHERS'})
+        expected = frame[INJURY_COLS].groupby(folded).sum().assign(Count=folded.value_counts())
+        expected.index = translate_categories(expected.index, column)
+        pie = fig.data[0]
+        assert dict(zip(pie.labels, pie.values.tolist())) == expected['Count'].to_dict()
+
+        bars = fig.data[1 + len(pie.labels):]
+        for j, injury in enumerate(INJURY_COLS):
+            for i, label in enumerate(pie.labels):
+                value = expected.loc[label, injury]
+                assert bars[j * len(pie.labels) + i].y.tolist() == [value if value else 0.1]
+
+
+def test_both_figures_share_one_aggregation(monkeypatch):
+    dataset = Dataset(tag_frame(make_accidents(), 'test-pie-bar-shared'))
+    calls = []
+    aggregate = pie_and_bar.aggregate
+    monkeypatch.setattr(pie_and_bar, 'aggregate', lambda *args: calls.append(1) or aggregate(*args))
+
+    figures = builder.build_figures(dataset, ['pie_bar_road', 'pie_bar_intersection'], executor='thread', workers=2)
+
+    assert len(calls) == 1
+    assert set(figures) == {'pie_bar_road', 'pie_bar_intersection'}
+
+
+def decode(spec):
+    assert set(spec) >= {'dtype', 'bdata'}
+    return np.frombuffer(base64.b64decode(spec['bdata']), dtype=spec['dtype']).tolist()
+
+
+def test_patch_sends_the_rebuilt_values_as_typed_arrays():
+    frame = make_accidents()
+    column = 'roadway_surface_cond'
+    categories = get_category_totals(prepare_category_data(frame), column).index.tolist()
+    subset = frame[frame['crash_date'].dt.year == 2019]
+
+    operations = patch_dimension_vs_injury(subset, column, categories).to_plotly_json()['operations']
+
+    rebuilt = plot_dimension_vs_injury(subset, column)
+    labels = list(rebuilt.data[0].labels)
+    position = [labels.index(label) for label in translate_categories(categories, column)]
+    values = {tuple(operation['location']): decode(operation['params']['value']) for operation in operations}
+    assert values.pop(('data', 0, 'values')) == rebuilt.data[0].values[position].tolist()
+    for j in range(len(INJURY_COLS)):
+        for i, k in enumerate(position):
+            bar = rebuilt.data[1 + len(labels) + j * len(labels) + k]
+            assert values.pop(('data', 1 + len(categories) + j * len(categories) + i, 'y')) == bar.y.tolist()
+    assert not values
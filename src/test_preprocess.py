@@ -0,0 +1,58 @@
+'''
+    Tests of the lazy queries against plain pandas reads.
+'''
+import pandas as pd
+
+from preprocess import DATE_FORMAT, Query, concat_chunks
+
+DTYPES = {'weather_condition': 'category', 'lighting_condition': 'category', 'injuries_fatal': 'uint8'}
+
+
+def read_plain(path):
+    frame = pd.read_csv(path)
+    frame['crash_date'] = pd.to_datetime(frame['crash_date'], format=DATE_FORMAT)
+    return frame
+
+
+def assert_same_rows(result, expected):
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True),
+                                  check_dtype=False, check_categorical=False)
+
+
+def test_projections_match_a_plain_read(accidents_csv):
+    plain = read_plain(accidents_csv)
+    query = Query(accidents_csv, chunksize=64)
+
+    assert_same_rows(query.collect(), plain)
+    assert_same_rows(query.years(2019).collect(), plain[plain['crash_date'].dt.year >= 2019])
+    assert_same_rows(query.years(end=2018).years(2017).collect(), plain[plain['crash_date'].dt.year == 2018])
+    assert_same_rows(query.where_in('weather_condition', ['RAIN']).where_in('weather_condition', ['RAIN', 'CLEAR'])
+                     .collect(), plain[plain['weather_condition'] == 'RAIN'])
+
+    selected = query.years(2018, 2018).where_in('lighting_condition', ['DUSK', 'DAYLIGHT']) \
+        .select('weather_condition', 'injuries_fatal').collect()
+    rows = (plain['crash_date'].dt.year == 2018) & (plain['lighting_condition'] == 'DAYLIGHT')
+    assert list(selected.columns) == ['crash_date', 'weather_condition', 'injuries_fatal']
+    assert_same_rows(selected, plain.loc[rows, ['crash_date', 'weather_condition', 'injuries_fatal']])
+
+
+def test_casts_apply_to_the_filtered_rows(accidents_csv):
+    plain = read_plain(accidents_csv)
+
+    result = Query(accidents_csv, chunksize=64).years(2019).astype(DTYPES).collect()
+
+    assert {column: str(result[column].dtype) for column in DTYPES} == DTYPES
+    assert set(result['weather_condition'].cat.categories) == {'CLEAR', 'RAIN'}
+    assert_same_rows(result, plain[plain['crash_date'].dt.year >= 2019])
+    # A dataframe source is filtered and cast the same way, without being modified
+    assert_same_rows(Query(plain).years(2019).astype(DTYPES).collect(), result)
+    assert plain['weather_condition'].dtype == object
+
+
+def test_empty_results_keep_the_projected_schema(accidents_csv):
+    result = Query(accidents_csv).years(2030).select('weather_condition').astype(DTYPES).collect()
+
+    assert result.empty and list(result.columns) == ['crash_date', 'weather_condition']
+    assert str(result['weather_condition'].dtype) == 'category'
+    assert pd.api.types.is_datetime64_any_dtype(result['crash_date'])
+    assert list(concat_chunks([], ['crash_date', 'injuries_fatal'], DTYPES).dtypes) == [object, 'uint8']
@@ -0,0 +1,40 @@
+'''
+    Tests of the radar charts against per-condition pandas sums.
+'''
+import numpy as np
+import pandas as pd
+
+from radar_chart2 import INJURY_TRANSLATIONS, LIGHTING_CONDITIONS, WEATHER_CONDITIONS, create_radar_figures
+
+
+def make_conditions(n_rows=300, seed=1):
+    # Labels as they come in the CSV: padded, mixed case, some outside the charts
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'lighting_condition': rng.choice(['DAYLIGHT', ' daylight', 'DARKNESS', 'DUSK', 'DAWN'], n_rows),
+        'weather_condition': rng.choice(['CLEAR', 'rain ', 'SNOW', 'FOG/SMOKE/HAZE'], n_rows),
+    })
+    for col in INJURY_TRANSLATIONS:
+        frame[col] = rng.integers(0, 3, n_rows).astype(np.uint8)
+    return frame.astype({'lighting_condition': 'category', 'weather_condition': 'category'})
+
+
+def test_radar_values_match_pandas_sums():
+    frame = make_conditions()
+    normalized = frame.assign(**{col: frame[col].astype(str).str.strip().str.upper()
+                                 for col in ['lighting_condition', 'weather_condition']})
+
+    overview, *by_lighting = create_radar_figures(frame)
+
+    lighting_sums = normalized.groupby('lighting_condition')[list(INJURY_TRANSLATIONS)].sum()
+    for trace, col in zip(overview.data, INJURY_TRANSLATIONS):
+        expected = lighting_sums[col].reindex(LIGHTING_CONDITIONS, fill_value=0).tolist()
+        assert trace.r.tolist() == expected + expected[:1]
+
+    assert len(by_lighting) == len(LIGHTING_CONDITIONS)
+    for fig, lighting in zip(by_lighting, LIGHTING_CONDITIONS):
+        rows = normalized[normalized['lighting_condition'] == lighting]
+        weather_sums = rows.groupby('weather_condition')[list(INJURY_TRANSLATIONS)].sum()
+        for trace, col in zip(fig.data, INJURY_TRANSLATIONS):
+            expected = weather_sums[col].reindex(WEATHER_CONDITIONS, fill_value=0).tolist()
+            assert trace.r.tolist() == expected + expected[:1]
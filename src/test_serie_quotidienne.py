@@ -0,0 +1,58 @@
+'''
+    Tests of the daily rollup and of its LTTB downsampling.
+'''
+import numpy as np
+import pandas as pd
+
+from serie_quotidienne import build_daily_rollup, lttb, range_total
+
+
+def reference_lttb(y, threshold):
+    # Plain loop over the same buckets as lttb
+    n = len(y)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = [0]
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo = edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = sum(range(next_lo, next_hi)) / (next_hi - next_lo)
+        next_y = sum(y[next_lo:next_hi]) / (next_hi - next_lo)
+        a = selected[-1]
+        areas = [abs((a - next_x) * (y[j] - y[a]) - (a - j) * (next_y - y[a])) for j in range(lo, hi)]
+        selected.append(lo + areas.index(max(areas)))
+    return selected + [n - 1]
+
+
+def test_lttb_matches_the_reference():
+    y = np.random.default_rng(3).normal(size=2000).cumsum()
+
+    for threshold in [3, 10, 137, 500]:
+        np.testing.assert_array_equal(lttb(y, threshold), reference_lttb(list(y), threshold))
+
+
+def test_lttb_keeps_the_ends_and_the_spikes():
+    y = np.zeros(1000)
+    y[417] = 50
+
+    selected = lttb(y, 20)
+
+    assert len(selected) == 20 and selected[0] == 0 and selected[-1] == 999
+    assert np.all(np.diff(selected) > 0)
+    assert 417 in selected
+    np.testing.assert_array_equal(lttb(y[:15], 20), np.arange(15))
+
+
+def test_range_totals_match_the_rows():
+    rng = np.random.default_rng(4)
+    dates = pd.Series(pd.Timestamp('2019-03-01') + pd.to_timedelta(rng.integers(0, 400 * 24, 3000), unit='h'))
+    rollup = build_daily_rollup(pd.DataFrame({'crash_date': dates}))
+    days = dates.dt.normalize()
+
+    assert range_total(rollup) == len(dates)
+    for start, end in [('2019-03-01', '2019-03-01'), ('2019-05-10', '2019-08-31'), ('2018-01-01', '2019-04-01'),
+                       ('2020-03-01', '2021-01-01'), ('2021-01-01', '2021-02-01')]:
+        expected = ((days >= pd.Timestamp(start)) & (days <= pd.Timestamp(end))).sum()
+        assert range_total(rollup, start, end) == expected
+    np.testing.assert_array_equal(rollup['counts'], days.value_counts().reindex(
+        pd.date_range(days.min(), days.max()), fill_value=0).to_numpy())
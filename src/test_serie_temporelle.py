@@ -0,0 +1,39 @@
+'''
+    Tests of the temporal count matrices against pandas.
+'''
+import numpy as np
+
+from dataset import Dataset
+from serie_temporelle import get_count_matrices, get_series
+
+
+def test_count_matrices_match_pandas(accidents):
+    counts = get_count_matrices(Dataset(accidents))
+    dates = accidents['crash_date'].dropna()
+
+    assert counts['years'] == [2018, 2019]
+    for i, year in enumerate(counts['years']):
+        in_year = dates[dates.dt.year == year]
+        expected = {
+            'hour': in_year.dt.hour.value_counts().reindex(range(24), fill_value=0),
+            'weekday': (in_year.dt.dayofweek + 1).value_counts().reindex(range(1, 8), fill_value=0),
+            'month': in_year.dt.month.value_counts().reindex(range(1, 13), fill_value=0),
+        }
+        for key, values in expected.items():
+            np.testing.assert_array_equal(counts[key][i], values.to_numpy())
+        assert counts['total'][i] == len(in_year)
+
+
+def test_series_of_all_years_sum_the_years(accidents):
+    counts = get_count_matrices(Dataset(accidents))
+    dates = accidents['crash_date'].dropna()
+
+    hours, weekdays, months, totals = get_series(counts)
+
+    np.testing.assert_array_equal(hours, dates.dt.hour.value_counts().reindex(range(24), fill_value=0).to_numpy())
+    np.testing.assert_array_equal(weekdays, dates.dt.dayofweek.value_counts().reindex(range(7), fill_value=0).to_numpy())
+    np.testing.assert_array_equal(months, dates.dt.month.value_counts().reindex(range(1, 13), fill_value=0).to_numpy())
+    np.testing.assert_array_equal(totals, dates.dt.year.value_counts().sort_index().to_numpy())
+    # Fixed years (as the patches use them) keep rows for years without accidents
+    fixed = get_count_matrices(Dataset(accidents), (2017, 2018, 2019))
+    assert fixed['total'].tolist() == [0, *counts['total'].tolist()]
@@ -0,0 +1,44 @@
+'''
+    Tests of the snapshots loaded at every boot.
+'''
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import builder
+import snapshot
+
+
+def test_second_boot_gives_the_same_frame_and_row_positions(snapshot_storage, accidents_csv):
+    first = snapshot.load_snapshot(accidents_csv)
+    second = snapshot.load_snapshot(accidents_csv)
+
+    pd.testing.assert_frame_equal(first.dataset.frame, second.dataset.frame)
+    assert second.figures['temporal'] == first.figures['temporal']
+
+    frame = second.dataset.frame
+    for filters in [{'year': [2019]}, {'month': [2], 'hour': [8, 17]}, {'weather_condition': ['RAIN']}]:
+        rows = second.figures['filter_index'].rows(filters)
+        np.testing.assert_array_equal(rows, first.figures['filter_index'].rows(filters))
+        expected = np.ones(len(frame), dtype=bool)
+        for column, values in filters.items():
+            expected &= second.dataset[column].isin(values).to_numpy()
+        np.testing.assert_array_equal(rows, np.flatnonzero(expected))
+
+
+def test_builds_outside_the_main_thread_do_not_fork(monkeypatch, accidents):
+    def fork(*args, **kwargs):
+        raise AssertionError('the build workers were forked from a background thread')
+    monkeypatch.setattr(builder, 'ProcessPoolExecutor', fork)
+
+    with ThreadPoolExecutor(max_workers=1) as reload_thread:
+        figures = reload_thread.submit(builder.build_figures, accidents, executor='process', workers=2).result()
+    assert set(figures) == set(builder.BUILDERS)
+
+
+def test_process_builds_release_the_dataset(accidents):
+    figures = builder.build_figures(accidents, ['temporal', 'heatmap'], executor='process', workers=2)
+
+    assert set(figures) == {'temporal', 'heatmap'}
+    assert builder._dataframe is None  # pylint: disable=protected-access
@@ -0,0 +1,62 @@
+'''
+    Tests of the fingerprinted static assets and their cache headers.
+'''
+import gzip
+
+from flask import Flask
+
+from static_assets import CACHE_MAX_AGE, build, get_asset_path, install
+
+CSS = 'body { background: url("img/logo.png"); } @font-face { src: url(fonts/font.woff2); }'
+SCRIPT = 'window.ready = true;\n' * 50
+
+
+def build_assets(tmp_path):
+    source_dir = tmp_path / 'assets'
+    (source_dir / 'img').mkdir(parents=True)
+    (source_dir / 'fonts').mkdir()
+    (source_dir / 'data').mkdir()
+    (source_dir / 'style.css').write_text(CSS)
+    (source_dir / 'script.js').write_text(SCRIPT)
+    (source_dir / 'img' / 'logo.png').write_bytes(b'\x89PNG logo')
+    (source_dir / 'fonts' / 'font.woff2').write_bytes(b'wOF2 font')
+    (source_dir / 'favicon.ico').write_bytes(b'icon')
+    (source_dir / 'data' / 'accidents.csv').write_text('crash_date\n')
+    dist_dir = str(tmp_path / 'dist')
+    return build(str(source_dir), dist_dir), dist_dir
+
+
+def test_build_fingerprints_the_assets(tmp_path):
+    manifest, dist_dir = build_assets(tmp_path)
+
+    assert sorted(manifest) == ['favicon.ico', 'fonts/font.woff2', 'img/logo.png', 'script.js', 'style.css']
+    assert manifest['favicon.ico'] == 'favicon.ico'
+    assert all(name != path and name.rsplit('.', 1)[1] == path.rsplit('.', 1)[1]
+               for path, name in manifest.items() if path != 'favicon.ico')
+    with open(f"{dist_dir}/{manifest['style.css']}", encoding='utf-8') as css_file:
+        css = css_file.read()
+    assert f'url("{manifest["img/logo.png"]}")' in css and f'url({manifest["fonts/font.woff2"]})' in css
+    assert get_asset_path('style.css', dist_dir) == manifest['style.css']
+    # Assets outside the build keep their path
+    assert get_asset_path('unknown.css', dist_dir) == 'unknown.css'
+
+
+def test_fingerprinted_assets_are_cached_for_good(tmp_path):
+    manifest, dist_dir = build_assets(tmp_path)
+    server = Flask(__name__)
+    install(server, dist_dir=dist_dir)
+    client = server.test_client()
+
+    response = client.get(f"/assets/{manifest['script.js']}")
+    assert response.status_code == 200 and response.data == SCRIPT.encode()
+    assert response.cache_control.immutable and response.cache_control.public
+    assert response.cache_control.max_age == CACHE_MAX_AGE
+
+    compressed = client.get(f"/assets/{manifest['script.js']}", headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip' and compressed.headers['Vary'] == 'Accept-Encoding'
+    assert compressed.mimetype == 'text/javascript' and compressed.cache_control.immutable
+    assert gzip.decompress(compressed.data) == SCRIPT.encode()
+
+    # Other paths are left to the app (here, nothing serves them)
+    assert client.get('/assets/script.js').status_code == 404
+    assert client.get('/assets/favicon.ico').status_code == 404
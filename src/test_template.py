@@ -0,0 +1,54 @@
+'''
+    Tests of the themes applied to the serialized figures.
+'''
+import copy
+
+import plotly.graph_objects as go
+
+from builder import serialize
+from template import THEMES, apply_theme, get_theme_patch
+
+
+def apply_patch(figure, patch):
+    figure = copy.deepcopy(figure)
+    for operation in patch.to_plotly_json()['operations']:
+        assert operation['operation'] == 'Assign'
+        *path, key = operation['location']
+        target = figure
+        for step in path:
+            target = target[step]
+        target[key] = operation['params']['value']
+    return figure
+
+
+def make_figure():
+    # Two lines sharing a color (which could be moved to the template) and one
+    # line styled by the theme
+    return serialize(go.Figure([
+        go.Scatter(y=[1, 2], line=dict(color='red')),
+        go.Scatter(y=[2, 3], line=dict(color='red')),
+        go.Scatter(y=[3, 1]),
+        go.Bar(y=[1, 2], marker=dict(color='blue')),
+        go.Bar(y=[2, 1], marker=dict(color='blue')),
+    ]))
+
+
+def test_themes_set_their_trace_defaults():
+    figure = make_figure()
+
+    for theme_name, theme in THEMES.items():
+        themed = apply_theme(figure, theme_name)
+        template_data = themed['layout']['template']['data']
+        assert template_data['scatter'][0]['line']['color'] == theme['line_chart_color']
+        assert template_data['bar'][0]['marker']['color'] == 'blue'
+        assert [trace.get('line', {}).get('color') for trace in themed['data'][:3]] == ['red', 'red', None]
+    assert 'template' not in figure['layout'] or 'scatter' not in figure['layout']['template']['data']
+
+
+def test_theme_patches_give_the_themed_figure():
+    figure = make_figure()
+
+    for old_theme in THEMES:
+        for new_theme in THEMES:
+            patched = apply_patch(apply_theme(figure, old_theme), get_theme_patch(new_theme))
+            assert patched == apply_theme(figure, new_theme)
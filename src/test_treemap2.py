@@ -0,0 +1,47 @@
+'''
+    Tests of the treemap rollups against pandas groupby.
+'''
+from dataset import Dataset
+from treemap2 import TREEMAP_LEVELS, create_treemap, prepare_treemap_rollups
+
+
+def get_injury_type(row):
+    # Most severe injury of an accident, one row at a time
+    for column, injury_type in [('injuries_fatal', 'Fatal'),
+                                ('injuries_incapacitating', 'Incapacitating injury'),
+                                ('injuries_non_incapacitating', 'Non-incapacitating injury'),
+                                ('injuries_reported_not_evident', 'Reported, not evident')]:
+        if row[column] > 0:
+            return injury_type
+    return 'No indication of injury'
+
+
+def as_paths(counts):
+    return {key if isinstance(key, tuple) else (key,): value for key, value in counts.items()}
+
+
+def test_rollups_match_pandas_groupby(accidents):
+    rollups = prepare_treemap_rollups(Dataset(accidents))
+    frame = accidents.assign(injury_type=accidents.apply(get_injury_type, axis=1))
+
+    assert sorted(rollups) == list(range(1, len(TREEMAP_LEVELS) + 1))
+    for depth, counts in rollups.items():
+        levels = TREEMAP_LEVELS[:depth]
+        expected = frame.astype({level: str for level in levels}).groupby(levels).size()
+        expected = expected[expected > 0]
+        assert list(counts.index.names) == levels
+        assert as_paths(counts[counts > 0]) == as_paths(expected)
+
+
+def test_treemap_nodes_total_their_children(accidents):
+    rollups = prepare_treemap_rollups(Dataset(accidents))
+
+    treemap = create_treemap(rollups, depth=len(TREEMAP_LEVELS)).data[0]
+
+    values = dict(zip(treemap.ids, treemap.values.tolist()))
+    assert sum(value for node, value in values.items() if '/' not in node) == len(accidents)
+    children = {}
+    for node, parent in zip(treemap.ids, treemap.parents):
+        if parent:
+            children[parent] = children.get(parent, 0) + values[node]
+    assert all(values[parent] == total for parent, total in children.items())
@@ -1,43 +1,95 @@
-import plotly.express as px
+import numpy as np
+import plotly.graph_objects as go
 
-def create_treemap(dataframe):
+from dataset import as_dataset, register_columns
+from kernel import aggregate, encode, to_frame
+from heatmap import INJURY_TRANSLATIONS as SEVERITY_TRANSLATIONS
+from pie_and_bar import ROAD_COND_TRANSLATIONS
+from radar_chart2 import LIGHTING_TRANSLATIONS, WEATHER_TRANSLATIONS
+
+# Hierarchy shown by the treemap, from the outermost to the innermost level
+TREEMAP_LEVELS = ['lighting_condition', 'weather_condition', 'roadway_surface_cond', 'injury_type']
+register_columns('treemap_rollups', {level: 'category' for level in TREEMAP_LEVELS if level != 'injury_type'})
+
+LEVEL_TRANSLATIONS = {
+    'lighting_condition': LIGHTING_TRANSLATIONS,
+    'weather_condition': WEATHER_TRANSLATIONS,
+    'roadway_surface_cond': ROAD_COND_TRANSLATIONS,
+    'injury_type': SEVERITY_TRANSLATIONS,
+}
+
+WEATHER_COLORS = {
+    'DAYLIGHT': 'white',
+    'CLEAR': 'powderblue',
+    'RAIN': 'deepskyblue',
+    'SNOW': 'snow',
+    'CLOUDY/OVERCAST': 'lightgray',
+    'SUNLIGHT': 'yellow',
+    'FOG/SMOKE/HAZE': 'gray',
+    'BLOWING SNOW': 'whitesmoke',
+    'FREEZING RAIN/DRIZZLE': 'steelblue',
+    'SLEET/HAIL': 'Turquoise',
+    'SEVERE CROSS WIND GATE': 'lightgreen',
+    'BLOWING SAND, SOIL, DIRT': 'tan',
+    'UNKNOWN': 'darkgray',
+    'OTHER': 'black',
+}
+
+
+def prepare_treemap_rollups(dataframe, levels=TREEMAP_LEVELS):
     """
-    Create a treemap where each type of lighting condition contains every type of weather condition.
-    The percentages are determined by the number of accidents corresponding to the conditions.
+    Count the accidents at every level of the hierarchy.
+
+    Only the deepest level is counted from the row-level data; each shallower
+    level is summed from the level below it, so the returned dict maps a
+    depth (1 to len(levels)) to a Series indexed by the path to each node.
     """
-    # Group data by lighting and weather conditions, and count the number of accidents
-    grouped_data = dataframe.groupby(['lighting_condition', 'weather_condition']).size().reset_index(name='Accident Count')
-    print(dataframe['weather_condition'].unique())
-    # Create the treemap
-    fig = px.treemap(
-        grouped_data,
-        path=['lighting_condition', 'weather_condition'],
-        values='Accident Count',
-        color='weather_condition',
-        color_discrete_map={
-            'lighting_condition': 'green',
-            'DAYLIGHT': 'white',
-            'CLEAR': 'powderblue',
-            'RAIN': 'deepskyblue',
-            'SNOW': 'snow',
-            'CLOUDY/OVERCAST': 'lightgray',
-            'SUNLIGHT': 'yellow',
-            'FOG/SMOKE/HAZE': 'gray',
-            'BLOWING SNOW': 'whitesmoke',
-            'FREEZING RAIN/DRIZZLE': 'steelblue',
-            'SLEET/HAIL': 'Turquoise',
-            'SEVERE CROSS WIND GATE': 'lightgreen',
-            'BLOWING SAND, SOIL, DIRT': 'tan',
-            'UNKNOWN': 'darkgray',
-            'OTHER': 'black',
-        },
-        width=1000,
-        height=700,
+    dataframe = as_dataset(dataframe)
+    keys = [encode(dataframe[level]) for level in levels]
+    counts = aggregate(keys).counts
+    rollups = {}
+    for depth in range(len(levels), 0, -1):
+        rollups[depth] = to_frame(counts, keys[:depth], levels[:depth])['count'].rename(None)
+        counts = counts.sum(axis=-1)
+    return rollups
+
+
+def create_treemap(rollups, depth=2):
+    """
+    Create a treemap drilling down the hierarchy of conditions up to the given depth.
+    The sizes are the number of accidents corresponding to each path of conditions.
+    """
+    ids, labels, parents, values, colors = [], [], [], [], []
+    for level in range(1, depth + 1):
+        counts = rollups[level]
+        names = counts.index.names
+        for path, count in counts.items():
+            path = path if isinstance(path, tuple) else (path,)
+            ids.append('/'.join(map(str, path)))
+            labels.append(LEVEL_TRANSLATIONS.get(names[level - 1], {}).get(path[-1], str(path[-1])))
+            parents.append('/'.join(map(str, path[:-1])))
+            values.append(count)
+            # Nodes inherit the color of their weather condition, as in the original treemap
+            colors.append(WEATHER_COLORS.get(path[min(level, 2) - 1], 'lightgray'))
+
+    fig = go.Figure(
+        go.Treemap(
+            ids=ids,
+            labels=labels,
+            parents=parents,
+            values=np.asarray(values),
+            branchvalues='total',
+            marker=dict(colors=colors),
+            hovertemplate='<b>%{label}</b><br>%{value} accidents<br>%{percentParent:.1%} du parent<extra></extra>',
+        )
     )
 
-        # Make the background transparent
+    # Make the background transparent
     fig.update_layout(
+        width=1000,
+        height=700,
+        margin=dict(l=10, r=10, t=30, b=10),
         paper_bgcolor='rgba(0,0,0,0)',  # Transparent background
         plot_bgcolor='rgba(0,0,0,0)'   # Transparent plot area
     )
-    return fig
\ No newline at end of file
+    return fig